@@ -0,0 +1,777 @@
+# axis.py
+# Per-axis control: pluggable control laws plus the AxisController that runs
+# one axis (direction-change settle, stall detection, breakaway search).
+#
+# Errors, positions and velocities are in encoder degrees (positive = encoder
+# increases; EL physical degrees have the same sign), so everything here works
+# on either axis given that axis' motor + forward sign.
+#
+# Nothing in here blocks: every wait is a state with a deadline checked on the
+# next tick, so a pause on one axis never holds up the other.
+
+import math
+import time
+from collections import deque
+
+import config
+import movement
+
+from movement import Adafruit_MotorHAT
+
+
+def clamp(x, lo, hi):
+    return lo if x < lo else hi if x > hi else x
+
+
+# ---------------------------
+# Control laws
+# ---------------------------
+# Selected per axis with AZ_CONTROL_LAW / EL_CONTROL_LAW in config.py.
+
+class AxisLaw:
+    """
+    update() drives the motor for one tick toward err_deg and returns True
+    once inside the deadband. last_pwm is what it commanded (0 = released),
+    which the AxisController uses for stall detection. reset() drops
+    internal state.
+    """
+    name = "base"
+    last_pwm = 0
+
+    def reset(self):
+        self.last_pwm = 0
+
+    def update(self, err_deg, vel_dps, now, pos_deg):
+        raise NotImplementedError
+
+    def ff_pwm(self, direction, speed_dps, pos_deg):
+        """
+        Open-loop PWM to hold speed_dps, for velocity tracking of a moving
+        target. None: this law can't, the axis falls back to update().
+        """
+        return None
+
+
+class TieredLaw(AxisLaw):
+    """
+    Original FAST/SLOW/CREEP speed tiers (movement.drive_toward_error).
+    For velocity tracking, CREEP_SPEED (the slowest tier that keeps the axis
+    turning) plus TRACK_FF_PWM_PER_DPS per deg/s; the AxisController's
+    learned trim and speed loop take up the rest.
+    """
+    name = "tiers"
+
+    def __init__(self, motor, forward_sign):
+        self.motor = motor
+        self.forward_sign = forward_sign
+        self.track_base_pwm = int(getattr(config, "CREEP_SPEED", 100))
+        self.track_pwm_per_dps = float(getattr(config, "TRACK_FF_PWM_PER_DPS", 4.0))
+
+    def ff_pwm(self, direction, speed_dps, pos_deg):
+        return self.track_base_pwm + self.track_pwm_per_dps * speed_dps
+
+    def update(self, err_deg, vel_dps, now, pos_deg):
+        done = movement.drive_toward_error(self.motor, self.forward_sign, err_deg)
+        self.last_pwm = 0 if done else int(movement.speed_for_error(abs(err_deg)))
+        return done
+
+
+class ProfileLaw(AxisLaw):
+    """
+    Trapezoidal profile (movement.AzProfile); tiers while no velocity estimate exists.
+    """
+    name = "profile"
+
+    def __init__(self, motor, forward_sign):
+        self.motor = motor
+        self.forward_sign = forward_sign
+        self.profile = movement.AzProfile.from_config()
+        self.tiers = TieredLaw(motor, forward_sign)
+
+    def reset(self):
+        self.profile.reset()
+        self.last_pwm = 0
+
+    def ff_pwm(self, direction, speed_dps, pos_deg):
+        return self.profile.ff_offset + self.profile.ff_per_dps * speed_dps
+
+    def update(self, err_deg, vel_dps, now, pos_deg):
+        if vel_dps is None:
+            done = self.tiers.update(err_deg, vel_dps, now, pos_deg)
+            self.last_pwm = self.tiers.last_pwm
+            return done
+        done = self.profile.tick(self.motor, self.forward_sign, err_deg, vel_dps, now)
+        self.last_pwm = self.profile.last_pwm
+        return done
+
+
+class PIDLaw(AxisLaw):
+    """
+    PID on position error with feedforward, anti-windup and deadzone compensation.
+
+      u   = kp*e + ki*I + kd*(-velocity)
+      out = sign(u) * (deadzone + |u| * (255 - deadzone) / 255) + ff(direction, pos)
+
+    The deadzone term lifts any nonzero command above the PWM where the axis
+    stops responding. The integrator is clamped to +-i_limit and frozen while the
+    output is saturated in the direction of the error (conditional integration).
+    """
+    name = "pid"
+
+    def __init__(self, motor, forward_sign, kp, ki, kd, i_limit, deadzone_pwm,
+                 ff_pos_pwm=0.0, ff_neg_pwm=0.0, deadband_deg=1.0, kv=5.0):
+        self.motor = motor
+        self.forward_sign = forward_sign
+        self.kp = float(kp)
+        self.ki = float(ki)
+        self.kd = float(kd)
+        self.i_limit = float(i_limit)
+        self.deadzone = float(deadzone_pwm)
+        self.ff_pos = float(ff_pos_pwm)
+        self.ff_neg = float(ff_neg_pwm)
+        self.deadband = float(deadband_deg)
+        self.kv = float(kv)
+        self.reset()
+
+    @classmethod
+    def from_config(cls, axis, motor, forward_sign):
+        def g(key, default):
+            return getattr(config, f"{axis}_PID_{key}", default)
+        return cls(
+            motor, forward_sign,
+            kp=g("KP", 30.0), ki=g("KI", 5.0), kd=g("KD", 2.0),
+            i_limit=g("I_LIMIT", 20.0), deadzone_pwm=g("DEADZONE_PWM", 60),
+            ff_pos_pwm=g("FF_POS_PWM", 0.0), ff_neg_pwm=g("FF_NEG_PWM", 0.0),
+            deadband_deg=config.DEADBAND_DEG, kv=g("KV", 5.0),
+        )
+
+    def reset(self):
+        self.integral = 0.0
+        self.last_err = None
+        self.last_ts = None
+        self.last_pwm = 0
+
+    def feedforward(self, direction, pos_deg):
+        return self.ff_pos if direction > 0 else -self.ff_neg
+
+    def ff_pwm(self, direction, speed_dps, pos_deg):
+        return self.deadzone + abs(self.feedforward(direction, pos_deg)) + self.kv * speed_dps
+
+    def update(self, err_deg, vel_dps, now, pos_deg):
+        if abs(err_deg) <= self.deadband:
+            self.motor.run(Adafruit_MotorHAT.RELEASE)
+            self.reset()
+            return True
+
+        self.last_pwm = 0
+        dt = 0.02 if self.last_ts is None else min(0.2, max(1e-3, now - self.last_ts))
+        if vel_dps is not None:
+            d_term = -self.kd * vel_dps
+        elif self.last_err is not None:
+            d_term = self.kd * (err_deg - self.last_err) / dt
+        else:
+            d_term = 0.0
+        self.last_err = err_deg
+        self.last_ts = now
+
+        u = self.kp * err_deg + self.ki * self.integral + d_term
+        if u == 0.0:
+            self.motor.run(Adafruit_MotorHAT.RELEASE)
+            return False
+
+        direction = 1.0 if u > 0 else -1.0
+        out = direction * (self.deadzone + min(255.0, abs(u)) * (255.0 - self.deadzone) / 255.0)
+        out += self.feedforward(direction, pos_deg)
+        sat = abs(out) >= 255.0
+        out = max(-255.0, min(255.0, out))
+
+        # anti-windup: only integrate if not pushing further into saturation
+        if not (sat and (out * err_deg) > 0):
+            self.integral = max(-self.i_limit, min(self.i_limit, self.integral + err_deg * dt))
+
+        if out * direction <= 0:
+            self.motor.run(Adafruit_MotorHAT.RELEASE)
+            return False
+
+        self.last_pwm = int(abs(out))
+        movement.motor_set_speed(self.motor, self.last_pwm)
+        self.motor.run(movement.motor_dir_for_error(self.forward_sign, out))
+        return False
+
+
+class ElLoadModel:
+    """
+    EL drive PWM for a wanted speed, per direction (gravity load on the dish):
+
+        pwm = offset + k_cos * cos(el) + per_dps * speed
+
+    Coefficients are (offset, k_cos, per_dps) for UP and DOWN; fit() gets
+    them by least squares from logged (direction, el, pwm, speed) samples.
+    """
+    def __init__(self, up, down):
+        self.coef = {+1: tuple(float(v) for v in up), -1: tuple(float(v) for v in down)}
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            up=(getattr(config, "EL_FF_UP_OFFSET_PWM", 110.0),
+                getattr(config, "EL_FF_UP_COS_PWM", 60.0),
+                getattr(config, "EL_FF_UP_PWM_PER_DPS", 4.0)),
+            down=(getattr(config, "EL_FF_DOWN_OFFSET_PWM", 190.0),
+                  getattr(config, "EL_FF_DOWN_COS_PWM", -60.0),
+                  getattr(config, "EL_FF_DOWN_PWM_PER_DPS", 4.0)),
+        )
+
+    def pwm(self, direction, el_deg, speed_dps):
+        off, k, per = self.coef[+1 if direction > 0 else -1]
+        u = off + k * math.cos(math.radians(el_deg)) + per * abs(speed_dps)
+        return int(clamp(round(u), 0, 255))
+
+    @staticmethod
+    def fit(samples, min_samples=20):
+        """
+        {+1: (offset, k_cos, per_dps), -1: ...} for each direction with
+        enough well-spread samples; directions that can't be fitted are left out.
+        """
+        out = {}
+        for d in (+1, -1):
+            rows = [(math.cos(math.radians(el)), spd, pwm) for (sd, el, pwm, spd) in samples if sd == d]
+            if len(rows) < min_samples:
+                continue
+            # normal equations for pwm ~ [1, cos, speed]
+            ata = [[0.0] * 3 for _ in range(3)]
+            atb = [0.0] * 3
+            for c, v, y in rows:
+                x = (1.0, c, v)
+                for r in range(3):
+                    atb[r] += x[r] * y
+                    for q in range(3):
+                        ata[r][q] += x[r] * x[q]
+            sol = _solve3(ata, atb)
+            if sol is not None:
+                out[d] = tuple(round(v, 2) for v in sol)
+        return out
+
+
+def _solve3(a, b):
+    """
+    Gaussian elimination with partial pivoting; None if singular.
+    """
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(3):
+        piv = max(range(col, 3), key=lambda r: abs(m[r][col]))
+        if abs(m[piv][col]) < 1e-9:
+            return None
+        m[col], m[piv] = m[piv], m[col]
+        for r in range(col + 1, 3):
+            f = m[r][col] / m[col][col]
+            for q in range(col, 4):
+                m[r][q] -= f * m[col][q]
+    x = [0.0] * 3
+    for r in (2, 1, 0):
+        x[r] = (m[r][3] - sum(m[r][q] * x[q] for q in range(r + 1, 3))) / m[r][r]
+    return x
+
+
+class ElScheduleLaw(AxisLaw):
+    """
+    Classic EL RUN speeds: creep/approach windows near the target, travel
+    speed elsewhere. With EL_FF_MODEL each window is a target slew rate
+    turned into PWM by ElLoadModel (continuous in elevation); otherwise the
+    original UP bands by elevation and fixed DOWN/approach/creep PWM, and
+    velocity tracking starts from the creep PWM like TieredLaw.
+    Used with breakaway_first, this is the EL "breakaway" controller.
+
+    Steady driving is logged to `samples` (direction, el, pwm, speed) for
+    ElLoadModel.fit().
+    """
+    name = "breakaway"
+
+    def __init__(self, motor, forward_sign, model=None):
+        self.motor = motor
+        self.forward_sign = forward_sign
+        self.model = model
+        self.approach_window = float(getattr(config, "EL_APPROACH_WINDOW_DEG", 8.0))
+        self.creep_window = float(getattr(config, "EL_CREEP_WINDOW_DEG", 2.5))
+        self.approach_speed = int(getattr(config, "EL_APPROACH_SPEED", 120))
+        self.creep_speed = int(getattr(config, "EL_CREEP_SPEED", 80))
+        self.up_break_1 = float(getattr(config, "EL_UP_BREAK_1_DEG", 25.0))
+        self.up_break_2 = float(getattr(config, "EL_UP_BREAK_2_DEG", 45.0))
+        self.up_speed_0_25 = int(getattr(config, "EL_UP_SPEED_0_25", 250))
+        self.up_speed_25_45 = int(getattr(config, "EL_UP_SPEED_25_45", 200))
+        self.up_speed_45_max = int(getattr(config, "EL_UP_SPEED_45_MAX", 125))
+        self.down_travel_speed = int(getattr(config, "EL_DOWN_TRAVEL_SPEED", 200))
+        self.travel_dps = float(getattr(config, "EL_TRAVEL_DPS", 12.0))
+        self.approach_dps = float(getattr(config, "EL_APPROACH_DPS", 5.0))
+        self.creep_dps = float(getattr(config, "EL_CREEP_DPS", 2.0))
+        self.track_pwm_per_dps = float(getattr(config, "TRACK_FF_PWM_PER_DPS", 4.0))
+
+        self.samples = deque(maxlen=int(getattr(config, "EL_FF_LOG_MAX_SAMPLES", 5000)))
+        self._log_settle_s = float(getattr(config, "EL_FF_LOG_SETTLE_S", 0.3))
+        self._pwm_ref = None       # (pwm, since) for steady-state detection
+
+    def reset(self):
+        self.last_pwm = 0
+        self._pwm_ref = None
+
+    def up_schedule_speed(self, el_deg):
+        if el_deg < self.up_break_1:
+            return self.up_speed_0_25
+        if el_deg < self.up_break_2:
+            return self.up_speed_25_45
+        return self.up_speed_45_max
+
+    def speed_for(self, err_deg, el_deg):
+        aerr = abs(err_deg)
+        d = 1 if err_deg > 0 else -1
+        if self.model is not None:
+            if aerr <= self.creep_window:
+                dps = self.creep_dps
+            elif aerr <= self.approach_window:
+                dps = self.approach_dps
+            else:
+                dps = self.travel_dps
+            return self.model.pwm(d, el_deg, dps)
+
+        if aerr <= self.creep_window:
+            return self.creep_speed
+        if aerr <= self.approach_window:
+            return self.approach_speed
+        if d > 0:
+            return self.up_schedule_speed(el_deg)
+        return self.down_travel_speed
+
+    def ff_pwm(self, direction, speed_dps, pos_deg):
+        if self.model is None:
+            return self.creep_speed + self.track_pwm_per_dps * speed_dps
+        return self.model.pwm(direction, pos_deg, speed_dps)
+
+    def _log_sample(self, direction, el_deg, pwm, vel_dps, now):
+        ref = self._pwm_ref
+        if ref is None or abs(pwm - ref[0]) > 8:
+            self._pwm_ref = (pwm, now)
+            return
+        if vel_dps is None or (vel_dps * direction) <= 0 or (now - ref[1]) < self._log_settle_s:
+            return
+        self.samples.append((direction, round(el_deg, 2), pwm, round(abs(vel_dps), 2)))
+
+    def update(self, err_deg, vel_dps, now, pos_deg):
+        if abs(err_deg) <= config.DEADBAND_DEG:
+            self.motor.run(Adafruit_MotorHAT.RELEASE)
+            self.reset()
+            return True
+
+        direction = 1 if err_deg > 0 else -1
+        self.last_pwm = int(clamp(self.speed_for(err_deg, pos_deg), 0, 255))
+        movement.motor_set_speed(self.motor, self.last_pwm)
+        self.motor.run(movement.motor_dir_for_error(self.forward_sign, err_deg))
+        self._log_sample(direction, pos_deg, self.last_pwm, vel_dps, now)
+        return False
+
+
+def make_law(axis, motor, forward_sign):
+    """
+    The configured law for "AZ" or "EL".
+    """
+    if axis == "AZ":
+        name = str(getattr(config, "AZ_CONTROL_LAW", "tiers"))
+    else:
+        name = str(getattr(config, "EL_CONTROL_LAW", "breakaway"))
+
+    if name == "tiers":
+        return TieredLaw(motor, forward_sign)
+    if name == "profile":
+        return ProfileLaw(motor, forward_sign)
+    if name == "pid":
+        return PIDLaw.from_config(axis, motor, forward_sign)
+    if name == "breakaway" and axis == "EL":
+        model = ElLoadModel.from_config() if bool(getattr(config, "EL_FF_MODEL", False)) else None
+        return ElScheduleLaw(motor, forward_sign, model=model)
+    raise ValueError(f"unknown {axis} control law: {name!r}")
+
+
+# ---------------------------
+# Axis controller
+# ---------------------------
+
+class AxisController:
+    """
+    Runs one axis around its control law:
+
+      IDLE      -> stopped (arrived, stop requested, safety clamp)
+      SETTLE    -> direction reversal while moving: motor released until a deadline
+      BREAKAWAY -> PWM stepped up every bk_interval_s until movement is seen
+      DRIVE     -> the law is in charge; driven but not moving for
+                   stall_time_s -> BREAKAWAY starting at the stalled PWM
+      STOPPING  -> predictive stop: power cut (BRAKE or RELEASE) because the
+                   learned coast distance at the current speed reaches the target
+
+    Given a reference velocity (a moving target, see tracking.TargetRate) of
+    at least track_drive_min_dps, DRIVE tracks it instead:
+    v_cmd = ref + track_kp * err and
+    PWM = law.ff_pwm(v_cmd) + trim + max(0, track_vel_kp * (v_cmd - velocity)),
+    with no deadband stop, so the axis keeps moving through a pass. trim is a
+    per-direction PWM correction to the law's feedforward, integrated from
+    the speed error (track_vel_ki) while moving and kept across moves like
+    coast_s; a breakaway hands over by setting it so DRIVE starts at the
+    PWM that broke the axis loose. Slower targets are stepped: the axis
+    waits until the target leaves the deadband, then aims
+    track_step_lead_deg past it so the target drifts back across the whole
+    deadband before the next step.
+
+    bk_* and coast_s are (positive direction, negative direction) pairs.
+    Movement is |velocity| >= move_vel_dps when an estimate exists, otherwise
+    at least move_thresh_deg over move_window_s. Coast distance is modelled as
+    coast_s * |velocity| and re-learned from every predictive stop.
+    """
+    def __init__(self, name, motor, forward_sign, law, clock=time,
+                 settle_s=0.25, move_vel_dps=1.0, move_thresh_deg=0.25, move_window_s=0.30,
+                 stall_time_s=0.45, stall_detect=True, breakaway_first=False,
+                 bk_start=(100, 100), bk_step=(25, 25), bk_max=(255, 255), bk_interval_s=(0.30, 0.30),
+                 predictive_stop=False, stop_mode="brake", coast_s=(0.05, 0.05),
+                 coast_learn_rate=0.3, stop_timeout_s=1.0,
+                 track_min_dps=0.02, track_drive_min_dps=2.0, track_step_lead_deg=1.0,
+                 track_kp=1.0, track_max_corr_dps=5.0, track_vel_kp=4.0,
+                 track_vel_ki=20.0, track_trim_max_pwm=80.0,
+                 breakaway_table=None, events=None, log=None):
+        self.name = name
+        self.motor = motor
+        self.forward_sign = forward_sign
+        self.law = law
+        self.clock = clock
+        self.settle_s = float(settle_s)
+        self.move_vel_dps = float(move_vel_dps)
+        self.move_thresh_deg = float(move_thresh_deg)
+        self.move_window_s = float(move_window_s)
+        self.stall_time_s = float(stall_time_s)
+        self.stall_detect = bool(stall_detect)
+        self.breakaway_first = bool(breakaway_first)
+        self.bk_start = tuple(int(v) for v in bk_start)
+        self.bk_step = tuple(int(v) for v in bk_step)
+        self.bk_max = tuple(int(v) for v in bk_max)
+        self.bk_interval_s = tuple(float(v) for v in bk_interval_s)
+        self.predictive_stop = bool(predictive_stop)
+        self.stop_cmd = Adafruit_MotorHAT.BRAKE if stop_mode == "brake" else Adafruit_MotorHAT.RELEASE
+        self.coast_s = [float(v) for v in coast_s]
+        self.coast_learn_rate = float(coast_learn_rate)
+        self.stop_timeout_s = float(stop_timeout_s)
+        self.track_min_dps = float(track_min_dps)
+        self.track_drive_min_dps = float(track_drive_min_dps)
+        self.track_step_lead_deg = float(track_step_lead_deg)
+        self.track_kp = float(track_kp)
+        self.track_max_corr_dps = float(track_max_corr_dps)
+        self.track_vel_kp = float(track_vel_kp)
+        self.track_vel_ki = float(track_vel_ki)
+        self.track_trim_max_pwm = float(track_trim_max_pwm)
+        self.track_trim = [0.0, 0.0]
+        self.tracking = False
+        self.breakaway_table = breakaway_table
+        self.events = events if events is not None else {}
+        self._key = name.lower()
+        for k in ("breakaway", "rekick", "settle"):
+            self.events.setdefault(f"{self._key}_{k}", 0)
+        self._log = log or (lambda msg: None)
+        self.begin_move()
+        self.reset()
+
+    @classmethod
+    def from_config(cls, axis, motor, forward_sign, clock=time, breakaway_table=None, events=None,
+                    log=None, brake_ok=True):
+        """
+        EL has separate UP/DOWN breakaway settings (EL_UP_BREAKAWAY_*), AZ one
+        set for both directions (AZ_BREAKAWAY_*). brake_ok=False (the plain
+        Adafruit library ignores run(BRAKE)) turns predictive BRAKE into RELEASE.
+        """
+        def g(key, default):
+            return getattr(config, f"{axis}_{key}", default)
+
+        def bk(key, default):
+            if axis == "EL":
+                return (g(f"UP_BREAKAWAY_{key}", default), g(f"DOWN_BREAKAWAY_{key}", default))
+            v = g(f"BREAKAWAY_{key}", default)
+            return (v, v)
+
+        law = make_law(axis, motor, forward_sign)
+        return cls(
+            axis, motor, forward_sign, law, clock=clock,
+            settle_s=g("DIR_CHANGE_SETTLE_S", 0.25),
+            move_vel_dps=g("MOVE_VEL_DPS", 1.0),
+            move_thresh_deg=g("MOVE_THRESH_DEG", 0.25),
+            move_window_s=g("MOVE_WINDOW_S", 0.30),
+            stall_time_s=g("STALL_TIME_S", 0.45),
+            stall_detect=g("STALL_DETECT", True),
+            breakaway_first=(law.name == "breakaway"),
+            bk_start=bk("START_SPEED", 150),
+            bk_step=bk("STEP_SPEED", 25),
+            bk_max=bk("MAX_SPEED", 255),
+            bk_interval_s=bk("INTERVAL_S", 0.30),
+            predictive_stop=g("PREDICTIVE_STOP", False),
+            stop_mode=g("STOP_MODE", "brake") if brake_ok else "release",
+            coast_s=(g("COAST_S", 0.05), g("COAST_S", 0.05)),
+            coast_learn_rate=getattr(config, "COAST_LEARN_RATE", 0.3),
+            track_min_dps=getattr(config, "TRACK_MIN_RATE_DPS", 0.02),
+            track_drive_min_dps=g("TRACK_DRIVE_MIN_DPS", 2.0),
+            track_step_lead_deg=getattr(config, "TRACK_STEP_LEAD_DEG", 1.0),
+            track_kp=getattr(config, "TRACK_POS_KP", 1.0),
+            track_max_corr_dps=getattr(config, "TRACK_MAX_CORR_DPS", 5.0),
+            track_vel_kp=g("TRACK_VEL_KP", 4.0),
+            track_vel_ki=g("TRACK_VEL_KI", 20.0),
+            track_trim_max_pwm=g("TRACK_TRIM_MAX_PWM", 80.0),
+            breakaway_table=breakaway_table,
+            events=events,
+            log=log,
+        )
+
+    # ---------------------------
+    # State
+    # ---------------------------
+
+    def begin_move(self):
+        """
+        Zero the per-move counters reported in move_stats() (new target).
+        """
+        self.move = {
+            "reversals": 0,          # direction changes while driving (correction cycles)
+            "predictive_stops": 0,
+            "breakaways": 0,
+            "last_coast_deg": None,  # distance travelled after the last predictive stop
+            "last_stop_err_deg": None,
+        }
+
+    def move_stats(self):
+        st = dict(self.move)
+        st["coast_s"] = [round(v, 4) for v in self.coast_s]
+        return st
+
+    def reset(self):
+        self.law.reset()
+        self.state = "IDLE"
+        self.last_dir = 0            # direction last driven (-1, 0, +1)
+        self.settle_until = 0.0
+        self.bk_pwm = 0
+        self.bk_next_step_ts = 0.0
+        self.stall_start_ts = None
+        self._move_anchor = None     # (ts, pos) for window-based movement detection
+        self._stop = None            # (start ts, start pos, |velocity|, direction) while STOPPING
+        self._track_ts = None        # last velocity-tracking tick, for the trim integrator
+
+    def stop(self):
+        self.reset()
+        movement.stop_motor(self.motor)
+
+    def _idx(self, direction):
+        return 0 if direction > 0 else 1
+
+    def _drive(self, direction, pwm):
+        movement.motor_set_speed(self.motor, pwm)
+        self.motor.run(movement.motor_dir_for_error(self.forward_sign, direction))
+        self.last_dir = direction
+
+    def _moving(self, vel_dps, pos_deg, now, min_dps=None):
+        if vel_dps is not None:
+            return abs(vel_dps) >= (self.move_vel_dps if min_dps is None else min_dps)
+
+        if self._move_anchor is None:
+            self._move_anchor = (now, pos_deg)
+            return False
+        t0, p0 = self._move_anchor
+        if (now - t0) < self.move_window_s:
+            return False
+        self._move_anchor = (now, pos_deg)
+        return abs(pos_deg - p0) >= self.move_thresh_deg
+
+    def _enter_settle(self, now):
+        self.stop()
+        self.state = "SETTLE"
+        self.settle_until = now + self.settle_s
+        self.events[f"{self._key}_settle"] += 1
+        self._log(f"[{self.name}] dir change: SETTLE {self.settle_s:.2f}s")
+
+    def _enter_breakaway(self, direction, pos_deg, now, floor_pwm=0):
+        i = self._idx(direction)
+        start = self.bk_start[i]
+        if self.breakaway_table is not None:
+            start = self.breakaway_table.start_pwm(direction, pos_deg, start)
+        self.state = "BREAKAWAY"
+        self.bk_pwm = int(clamp(max(start, floor_pwm), 0, 255))
+        self.bk_next_step_ts = now + self.bk_interval_s[i]
+        self.stall_start_ts = None
+        self._move_anchor = (now, pos_deg)
+        self.events[f"{self._key}_breakaway"] += 1
+        self.move["breakaways"] += 1
+        self._log(f"[{self.name}] enter BREAKAWAY dir={direction} start_speed={self.bk_pwm}")
+
+    def _should_stop(self, err_deg, vel_dps, direction):
+        if not self.predictive_stop or vel_dps is None or (vel_dps * direction) < self.move_vel_dps:
+            return False
+        coast = self.coast_s[self._idx(direction)] * abs(vel_dps)
+        return abs(err_deg) <= coast + config.DEADBAND_DEG / 2.0
+
+    def _enter_stopping(self, err_deg, vel_dps, now, pos_deg, direction):
+        self.law.reset()
+        self.motor.run(self.stop_cmd)
+        self.state = "STOPPING"
+        self._stop = (now, pos_deg, abs(vel_dps), direction)
+        self.move["predictive_stops"] += 1
+        self._log(f"[{self.name}] predictive stop err={err_deg:.2f} vel={vel_dps:.1f}")
+
+    def _finish_stopping(self, err_deg, pos_deg):
+        t0, p0, v0, direction = self._stop
+        coast = abs(pos_deg - p0)
+        i = self._idx(direction)
+        if v0 > 0:
+            self.coast_s[i] += self.coast_learn_rate * (coast / v0 - self.coast_s[i])
+        self.move["last_coast_deg"] = round(coast, 3)
+        self.move["last_stop_err_deg"] = round(err_deg, 3)
+        self._log(f"[{self.name}] stopped: coast={coast:.2f} err={err_deg:.2f} coast_s={self.coast_s[i]:.3f}")
+        self.stop()
+
+    def _track_cmd(self, err_deg, ref_vel_dps):
+        corr = clamp(self.track_kp * err_deg, -self.track_max_corr_dps, self.track_max_corr_dps)
+        return ref_vel_dps + corr
+
+    def _track_drive(self, v_cmd, vel_dps, pos_deg, now):
+        """
+        Velocity tracking for one tick; returns the PWM commanded (0 = coasting).
+        """
+        direction = 1 if v_cmd > 0 else -1
+        i = self._idx(direction)
+        hold = self.law.ff_pwm(direction, abs(v_cmd), pos_deg) + self.track_trim[i]
+        u = hold
+        if vel_dps is not None:
+            err_v = abs(v_cmd) - vel_dps * direction
+            # only ever push above hold: dropping under it is how a slow axis
+            # falls below its running friction and stalls
+            u = max(hold + self.track_vel_kp * err_v, hold)
+            if self._track_ts is not None and vel_dps * direction > 0.0 and 0.0 < u < 255.0:
+                # learn only while moving (a stall is BREAKAWAY's job) and
+                # while the output isn't saturated
+                dt = min(now - self._track_ts, 0.1)
+                lim = self.track_trim_max_pwm
+                self.track_trim[i] = clamp(self.track_trim[i] + self.track_vel_ki * err_v * dt, -lim, lim)
+            self._track_ts = now
+        if u <= 0:
+            self.motor.run(Adafruit_MotorHAT.RELEASE)
+            return 0
+        pwm = int(clamp(u, 0, 255))
+        self._drive(direction, pwm)
+        return pwm
+
+    # ---------------------------
+    # Tick
+    # ---------------------------
+
+    def update(self, err_deg, vel_dps, now, pos_deg, ref_vel_dps=0.0):
+        """
+        One non-blocking step toward err_deg. Returns True inside the deadband
+        (never while tracking a moving target).
+        """
+        tracking = (abs(ref_vel_dps) >= self.track_drive_min_dps
+                    and self.law.ff_pwm(1, 0.0, pos_deg) is not None)
+        if tracking != self.tracking:
+            self.law.reset()
+            self.tracking = tracking
+        if not tracking and abs(ref_vel_dps) >= self.track_min_dps and self.state != "IDLE":
+            err_deg += math.copysign(self.track_step_lead_deg, ref_vel_dps)
+
+        if self.state == "STOPPING":
+            still = vel_dps is None or abs(vel_dps) < self.move_vel_dps
+            if not still and (now - self._stop[0]) < self.stop_timeout_s:
+                self.motor.run(self.stop_cmd)
+                return False
+            self._finish_stopping(err_deg, pos_deg)
+
+        if tracking:
+            v_cmd = self._track_cmd(err_deg, ref_vel_dps)
+            direction = 1 if v_cmd > 0 else -1
+            if v_cmd * ref_vel_dps <= 0 and abs(err_deg) <= config.DEADBAND_DEG:
+                # Ahead of the target: wait for it rather than reverse
+                if self.state != "IDLE":
+                    self.stop()
+                return False
+        else:
+            direction = 1 if err_deg > 0 else -1
+
+        # Checked before the deadband, so an axis entering it at speed is
+        # still braked instead of released to coast through it.
+        if not tracking and self.state == "DRIVE" and self._should_stop(err_deg, vel_dps, direction):
+            self._enter_stopping(err_deg, vel_dps, now, pos_deg, direction)
+            return False
+
+        if not tracking and abs(err_deg) <= config.DEADBAND_DEG:
+            if self.state != "IDLE":
+                self.stop()
+            else:
+                self.law.update(err_deg, vel_dps, now, pos_deg)
+            return True
+
+        if self.state != "SETTLE" and self.last_dir != 0 and direction != self.last_dir:
+            self.move["reversals"] += 1
+            still = vel_dps is not None and abs(vel_dps) < self.move_vel_dps
+            if still or self.settle_s <= 0:
+                self.reset()
+            else:
+                self._enter_settle(now)
+
+        if self.state == "SETTLE":
+            if now < self.settle_until:
+                return False
+            self.state = "IDLE"
+
+        if self.state == "IDLE":
+            if self.breakaway_first:
+                self._enter_breakaway(direction, pos_deg, now)
+            else:
+                self.state = "DRIVE"
+                self.stall_start_ts = None
+
+        if self.state == "BREAKAWAY":
+            self._drive(direction, self.bk_pwm)
+            if self._moving(vel_dps, pos_deg, now):
+                if self.breakaway_table is not None:
+                    self.breakaway_table.record_break(direction, pos_deg, self.bk_pwm)
+                self._log(f"[{self.name}] movement detected -> DRIVE (bk_speed={self.bk_pwm})")
+                if tracking:
+                    # hand over at the PWM that just broke it loose; the trim
+                    # then walks down to the running PWM for v_cmd
+                    i = self._idx(direction)
+                    ff = self.law.ff_pwm(direction, abs(v_cmd), pos_deg)
+                    lim = self.track_trim_max_pwm
+                    self.track_trim[i] = clamp(self.bk_pwm - ff, -lim, lim)
+                    self._track_ts = None
+                self.state = "DRIVE"
+                self.stall_start_ts = None
+                return False
+
+            if now >= self.bk_next_step_ts:
+                i = self._idx(direction)
+                old = self.bk_pwm
+                self.bk_pwm = int(clamp(old + self.bk_step[i], 0, self.bk_max[i]))
+                self.bk_next_step_ts = now + self.bk_interval_s[i]
+                self._log(f"[{self.name}] breakaway step {old}->{self.bk_pwm} (max={self.bk_max[i]})")
+            return False
+
+        # DRIVE
+        if tracking:
+            done = False
+            pwm = self._track_drive(v_cmd, vel_dps, pos_deg, now)
+        else:
+            done = self.law.update(err_deg, vel_dps, now, pos_deg)
+            pwm = int(self.law.last_pwm)
+        if pwm > 0:
+            self.last_dir = direction
+
+        min_dps = min(self.move_vel_dps, 0.5 * abs(v_cmd)) if tracking else None
+        if not self.stall_detect or pwm <= 0 or self._moving(vel_dps, pos_deg, now, min_dps):
+            self.stall_start_ts = None
+            return done
+
+        if self.stall_start_ts is None:
+            self.stall_start_ts = now
+        elif (now - self.stall_start_ts) >= self.stall_time_s:
+            self._log(f"[{self.name}] stall at sp={pwm} -> re-breakaway (dir={direction})")
+            self.events[f"{self._key}_rekick"] += 1
+            if self.breakaway_table is not None:
+                self.breakaway_table.record_stall(direction, pos_deg, pwm)
+            self._enter_breakaway(direction, pos_deg, now, floor_pwm=pwm)
+        return done
@@ -0,0 +1,516 @@
+# bench.py
+# Slew/settle benchmark for RotatorController against the simulated rotator (sim.py).
+#
+# Runs a fixed set of moves on a virtual clock and reports per move:
+#   - time_to_deadband_s : first time both axes are inside DEADBAND_DEG
+#   - settle_s           : time after which both axes stay inside DEADBAND_DEG
+#   - arrive_s           : time until the controller reported [ARRIVED]
+#   - overshoot_az/el    : worst excursion past the target (true plant angle)
+#   - el_rekicks         : EL stalls in RUN that forced a new breakaway
+#   - el_breakaways      : EL breakaway searches started
+#   - corrections        : direction reversals on either axis after the target was set
+#   - predictive_stops   : early BRAKE/RELEASE stops on either axis
+#   - motor_cmds         : setSpeed/run calls that reached the MotorHAT (after the write cache)
+#   - i2c_transactions   : MotorHAT + both encoders
+#
+# Usage:
+#   python3 bench.py                         # print table
+#   python3 bench.py --out before.json       # save results
+#   python3 bench.py --compare before.json   # print deltas vs a saved run
+#   python3 bench.py --az-law pid --el-law pid   # override AZ/EL_CONTROL_LAW
+#   python3 bench.py --warm                  # one unmeasured pass first, sharing the
+#                                            # learned EL breakaway table across moves
+#   python3 bench.py --fit-el-ff             # fit the EL load model (EL_FF_*) from the
+#                                            # simulated moves, driven with the UP bands
+#   python3 bench.py --fit-el-ff rotator_el_load.csv   # ...or from logged hardware runs
+#   python3 bench.py --pass                  # follow synthetic satellite passes: stepped,
+#                                            # target-rate tracked (TRACK_*), program track
+#   python3 bench.py --wrap                  # back-to-back passes: large slews and cable
+#                                            # excursion per AZ planner (AZ_WRAP_*)
+#
+# Each move starts from a fresh controller that is first driven to the start
+# pose; counters are measured from the moment the benchmark target is set.
+
+import contextlib
+import io
+import json
+import math
+import random
+import subprocess
+import time
+
+import axis
+import config
+import movement
+import position
+import sim
+from controller import RotatorController
+
+
+# name, start (az, el), target (az, el)
+MOVES = [
+    ("az_step_5",       (0.0, 0.0),    (5.0, 0.0)),
+    ("az_step_2",       (20.0, 0.0),   (22.0, 0.0)),
+    ("az_swing_180",    (0.0, 0.0),    (180.0, 0.0)),
+    ("az_wrap_cross",   (350.0, 0.0),  (10.0, 0.0)),
+    ("el_up_0_90",      (0.0, 0.0),    (0.0, 90.0)),
+    ("el_down_90_0",    (0.0, 90.0),   (0.0, 0.0)),
+    ("combined",        (0.0, 0.0),    (135.0, 60.0)),
+    ("combined_return", (135.0, 60.0), (300.0, 20.0)),
+]
+
+MOVE_TIMEOUT_S = 90.0
+HOLD_AFTER_ARRIVE_S = 2.0
+
+# Synthetic passes: name, AZ start, AZ span, EL peak, AZ turn time constant
+# (None: smooth cosine sweep; seconds: AZ swings through the span around
+# culmination, like an overhead pass)
+PASSES = [
+    ("low_pass",  150.0, 160.0, 70.0, None),
+    ("overhead",  100.0, 180.0, 85.0, 20.0),
+]
+PASS_S = 300.0
+PASS_UPDATE_S = 2.0
+
+
+def _true_pose(backend, rc):
+    plant = backend.plant
+    az = (plant.az.load_deg - rc.cal["az_offset_deg"]) % 360.0
+    el = plant.el_phys()
+    return az, el
+
+
+def _counters(backend, rc):
+    i2c = backend.motorhat.i2c_transactions + sum(e.i2c_transactions for e in backend.encoders)
+    outs = rc.motor_outputs
+    if outs is not None:
+        motor_cmds = outs.stats["calls"] - outs.stats["calls_avoided"]
+    else:
+        motor_cmds = backend.motorhat.commands
+    return {
+        "motor_cmds": motor_cmds,
+        "i2c_transactions": i2c,
+        "el_rekicks": rc.events["el_rekick"],
+        "el_breakaways": rc.events["el_breakaway"],
+    }
+
+
+def _move_counters(rc):
+    a, e = rc.az_axis.move, rc.el_axis.move
+    return {
+        "corrections": a["reversals"] + e["reversals"],
+        "predictive_stops": a["predictive_stops"] + e["predictive_stops"],
+    }
+
+
+def run_move(name, start, target, seed=1, el_breakaway=None, el_samples=None):
+    backend = sim.SimBackend(seed=seed)
+    rc = RotatorController(debug=False, backend=backend)
+    if el_breakaway is not None and rc.el_breakaway is not None:
+        rc.el_breakaway = el_breakaway
+    period = 1.0 / float(config.CONTROL_HZ)
+    db = float(config.DEADBAND_DEG)
+
+    # Get to the start pose (not measured)
+    if start != (0.0, 0.0):
+        rc.set_target(*start)
+        sim.run(rc, MOVE_TIMEOUT_S, until=lambda r: r._arrived_reported)
+        sim.run(rc, 1.0)
+
+    az0, el0 = _true_pose(backend, rc)
+    az_dir = 1.0 if position.wrap_delta_deg(target[0], az0) >= 0 else -1.0
+    el_dir = 1.0 if (target[1] - el0) >= 0 else -1.0
+
+    c0 = _counters(backend, rc)
+    clock = rc.clock
+    t0 = clock.monotonic()
+    rc.set_target(*target)
+
+    t_deadband = None
+    t_settle = None
+    t_arrive = None
+    over_az = 0.0
+    over_el = 0.0
+
+    while True:
+        now = clock.monotonic() - t0
+        if now > MOVE_TIMEOUT_S:
+            break
+
+        rc._tick()
+
+        az, el = _true_pose(backend, rc)
+        e_az = position.wrap_delta_deg(az, target[0])
+        e_el = el - target[1]
+        over_az = max(over_az, az_dir * e_az)
+        over_el = max(over_el, el_dir * e_el)
+
+        inside = abs(e_az) <= db and abs(e_el) <= db
+        if inside:
+            if t_deadband is None:
+                t_deadband = now
+            if t_settle is None:
+                t_settle = now
+        else:
+            t_settle = None
+
+        if t_arrive is None and rc._arrived_reported:
+            t_arrive = now
+        if t_arrive is not None and now - t_arrive >= HOLD_AFTER_ARRIVE_S:
+            break
+
+        clock.sleep(period)
+
+    c1 = _counters(backend, rc)
+    az, el = _true_pose(backend, rc)
+    res = {
+        "start": list(start),
+        "target": list(target),
+        "time_to_deadband_s": t_deadband,
+        "settle_s": t_settle,
+        "arrive_s": t_arrive,
+        "overshoot_az_deg": round(over_az, 3),
+        "overshoot_el_deg": round(over_el, 3),
+        "final_err_az_deg": round(position.wrap_delta_deg(az, target[0]), 3),
+        "final_err_el_deg": round(el - target[1], 3),
+        "timed_out": t_arrive is None,
+    }
+    for k in c1:
+        res[k] = c1[k] - c0[k]
+    res.update(_move_counters(rc))
+    if el_samples is not None:
+        el_samples.extend(getattr(rc.el_axis.law, "samples", ()))
+    rc.shutdown()
+    return res
+
+
+def run_all(verbose=False, seed=1, warm=False, el_samples=None):
+    table = movement.BreakawayTable.from_config() if warm else None
+    results = {}
+    for p in range(2 if warm else 1):
+        for name, start, target in MOVES:
+            kw = dict(seed=seed, el_breakaway=table, el_samples=el_samples)
+            if verbose:
+                results[name] = run_move(name, start, target, **kw)
+            else:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = run_move(name, start, target, **kw)
+    return results
+
+
+def fit_el_ff(csv_path=None, seed=1):
+    """
+    Fit axis.ElLoadModel and print the EL_FF_* lines for config.py.
+    """
+    if csv_path:
+        samples = config.load_el_load_log(csv_path)
+        src = csv_path
+    else:
+        config.EL_CONTROL_LAW = "breakaway"
+        config.EL_FF_MODEL = False
+        samples = []
+        run_all(seed=seed, el_samples=samples)
+        src = "simulator"
+    coef = axis.ElLoadModel.fit(samples)
+    print(f"# EL load model fitted from {len(samples)} samples ({src})")
+    for d, label in ((+1, "UP"), (-1, "DOWN")):
+        if d not in coef:
+            print(f"# {label}: not enough samples")
+            continue
+        off, k, per = coef[d]
+        print(f"EL_FF_{label}_OFFSET_PWM  = {off}")
+        print(f"EL_FF_{label}_COS_PWM     = {k}")
+        print(f"EL_FF_{label}_PWM_PER_DPS = {per}")
+
+
+def pass_target(spec, t, duration=PASS_S):
+    """
+    (az, el) of a PASSES entry at t seconds after AOS.
+    """
+    _, az0, span, el_max, tau = spec
+    x = min(max(t / duration, 0.0), 1.0)
+    if tau is None:
+        f = 0.5 - 0.5 * math.cos(math.pi * x)
+    else:
+        half = duration / 2.0
+        f = 0.5 + 0.5 * math.tanh((x * duration - half) / tau) / math.tanh(half / tau)
+    return (az0 + span * f) % 360.0, el_max * math.sin(math.pi * x)
+
+
+def run_pass(spec, mode, seed=1):
+    """
+    Follow pass_target(): "stepped" / "tracked" send set_target() every
+    PASS_UPDATE_S like a tracking client, without / with target-rate
+    tracking; "program" uploads the whole pass once as a program track at
+    1 s resolution. Pointing error is measured every tick against the true
+    (continuous) target.
+    """
+    config.TRACK_RATE_ENABLED = mode != "stepped"
+    backend = sim.SimBackend(seed=seed)
+    rc = RotatorController(debug=False, backend=backend)
+    period = 1.0 / float(config.CONTROL_HZ)
+
+    rc.set_target(*pass_target(spec, 0.0))
+    sim.run(rc, MOVE_TIMEOUT_S, until=lambda r: r._arrived_reported)
+    sim.run(rc, 1.0)
+
+    c0 = _counters(backend, rc)
+    plant = backend.plant
+    bk0 = plant.az.breakaways + plant.el.breakaways
+    clock = rc.clock
+    t0 = clock.monotonic()
+    next_update = 0.0
+    if mode == "program":
+        w0 = clock.time()
+        rc.load_program_track((w0 + t, *pass_target(spec, t)) for t in range(int(PASS_S) + 1))
+        next_update = float("inf")
+    sq = 0.0
+    n = 0
+    worst = 0.0
+    while True:
+        t = clock.monotonic() - t0
+        if t > PASS_S:
+            break
+        if t >= next_update:
+            rc.set_target(*pass_target(spec, t))
+            next_update += PASS_UPDATE_S
+        rc._tick()
+        az, el = _true_pose(backend, rc)
+        taz, tel = pass_target(spec, clock.monotonic() - t0)
+        e = math.hypot(position.wrap_delta_deg(az, taz), el - tel)
+        sq += e * e
+        n += 1
+        worst = max(worst, e)
+        clock.sleep(period)
+
+    c1 = _counters(backend, rc)
+    res = {
+        "mode": mode,
+        "rms_err_deg": round(math.sqrt(sq / max(1, n)), 3),
+        "max_err_deg": round(worst, 3),
+        "starts": plant.az.breakaways + plant.el.breakaways - bk0,
+    }
+    for k in c1:
+        res[k] = c1[k] - c0[k]
+    rc.shutdown()
+    return res
+
+
+PASS_COLUMNS = [
+    ("rms_err_deg", "rms"),
+    ("max_err_deg", "max"),
+    ("starts", "starts"),
+    ("el_breakaways", "el_bk"),
+    ("el_rekicks", "rekick"),
+    ("motor_cmds", "m_cmds"),
+]
+
+
+def print_pass_table(rows):
+    print(f"{'pass':18}" + "".join(f"{h:>9}" for _, h in PASS_COLUMNS))
+    for name, r in rows.items():
+        print(f"{name:18}" + "".join(f"  {_fmt(r.get(k))}" for k, _ in PASS_COLUMNS))
+
+
+# Cable-wrap benchmark: WRAP_PASSES random passes back to back on one
+# controller (the cable stays wherever the last pass left it), each
+# prepositioned WRAP_PREPOSITION_S before AOS.
+WRAP_PASSES = 8
+WRAP_PASS_S = 120.0
+WRAP_PREPOSITION_S = 60.0
+LARGE_SLEW_DEG = 90.0
+
+
+def wrap_passes(seed=1):
+    rng = random.Random(seed)
+    out = []
+    for i in range(WRAP_PASSES):
+        span = rng.choice((-1.0, 1.0)) * rng.uniform(100.0, 220.0)
+        out.append((f"p{i}", rng.uniform(0.0, 360.0), span, rng.uniform(20.0, 80.0), None))
+    return out
+
+
+def run_wrap(planner, mode, seed=1):
+    """
+    planner: "shortest" (no cable limits), "limited" (limits, no lookahead),
+    "planned" (limits + lookahead). mode: "tracked" (set_target every
+    PASS_UPDATE_S from AOS) or "program" (whole pass uploaded before AOS).
+    Counts large slews (AZ error above LARGE_SLEW_DEG) between AOS and LOS
+    and the largest cable excursion from home.
+    """
+    config.TRACK_RATE_ENABLED = True
+    config.AZ_WRAP_LIMITS = planner != "shortest"
+    config.AZ_WRAP_LOOKAHEAD = planner == "planned"
+    backend = sim.SimBackend(seed=seed)
+    rc = RotatorController(debug=False, backend=backend)
+    clock = rc.clock
+    period = 1.0 / float(config.CONTROL_HZ)
+    off = rc.cal["az_offset_deg"]
+    lo, hi = float(config.AZ_WRAP_MIN_DEG), float(config.AZ_WRAP_MAX_DEG)
+
+    slews = 0
+    cable_max = 0.0
+    outside = 0
+    for spec in wrap_passes(seed):
+        aos = clock.monotonic() + WRAP_PREPOSITION_S
+        if mode == "program":
+            w_aos = clock.time() + WRAP_PREPOSITION_S
+            rc.load_program_track((w_aos + t, *pass_target(spec, t, WRAP_PASS_S))
+                                  for t in range(int(WRAP_PASS_S) + 1))
+        else:
+            rc.set_target(*pass_target(spec, 0.0, WRAP_PASS_S))
+        next_update = aos
+        large = False
+        while clock.monotonic() < aos + WRAP_PASS_S:
+            now = clock.monotonic()
+            if mode != "program" and now >= next_update:
+                rc.set_target(*pass_target(spec, now - aos, WRAP_PASS_S))
+                next_update += PASS_UPDATE_S
+            rc._tick()
+            cable = rc.az_tracker.unwrapped - off
+            cable_max = max(cable_max, abs(cable))
+            if now >= aos:
+                az, _ = _true_pose(backend, rc)
+                taz, _ = pass_target(spec, clock.monotonic() - aos, WRAP_PASS_S)
+                err = abs(position.wrap_delta_deg(az, taz))
+                if err > LARGE_SLEW_DEG and not large:
+                    slews += 1
+                    large = True
+                elif err < LARGE_SLEW_DEG / 2.0:
+                    large = False
+                if not lo <= cable <= hi:
+                    outside += 1
+            clock.sleep(period)
+    rc.shutdown()
+    return {
+        "large_slews": slews,
+        "cable_max_deg": round(cable_max, 1),
+        "outside_limits_s": round(outside * period, 1),
+    }
+
+
+WRAP_COLUMNS = [
+    ("large_slews", "slews"),
+    ("cable_max_deg", "cable"),
+    ("outside_limits_s", "outside"),
+]
+
+
+def _git_rev():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def _fmt(v):
+    if v is None:
+        return "   -   "
+    if isinstance(v, float):
+        return f"{v:7.2f}"
+    return f"{v:7}"
+
+
+COLUMNS = [
+    ("time_to_deadband_s", "t_db"),
+    ("settle_s", "settle"),
+    ("arrive_s", "arrive"),
+    ("overshoot_az_deg", "os_az"),
+    ("overshoot_el_deg", "os_el"),
+    ("el_rekicks", "rekick"),
+    ("corrections", "corr"),
+    ("predictive_stops", "pstop"),
+    ("motor_cmds", "m_cmds"),
+    ("i2c_transactions", "i2c"),
+]
+
+
+def print_table(moves, baseline=None):
+    print(f"{'move':18}" + "".join(f"{h:>9}" for _, h in COLUMNS))
+    for name, r in moves.items():
+        row = f"{name:18}"
+        for key, _ in COLUMNS:
+            v = r.get(key)
+            if baseline is not None and name in baseline:
+                b = baseline[name].get(key)
+                if isinstance(v, (int, float)) and isinstance(b, (int, float)):
+                    v = v - b
+            row += f"  {_fmt(v)}"
+        if r.get("timed_out"):
+            row += "  TIMEOUT"
+        print(row)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser(description="Slew/settle benchmark against the simulated rotator.")
+    p.add_argument("--out", help="write results JSON here")
+    p.add_argument("--compare", help="baseline JSON from an earlier run; prints deltas")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--verbose", action="store_true")
+    p.add_argument("--warm", action="store_true", help="learn EL breakaway on a first pass, report the second")
+    p.add_argument("--az-law", help="override config.AZ_CONTROL_LAW (tiers, profile, pid)")
+    p.add_argument("--el-law", help="override config.EL_CONTROL_LAW (breakaway, tiers, pid)")
+    p.add_argument("--fit-el-ff", nargs="?", const="", metavar="CSV",
+                   help="fit the EL load model from the simulator, or from a logged CSV, and exit")
+    p.add_argument("--wrap", action="store_true",
+                   help="back-to-back passes: large slews and cable excursion per AZ planner, and exit")
+    p.add_argument("--pass", dest="run_pass", action="store_true",
+                   help="follow synthetic passes stepped, rate-tracked and as a program track, and exit")
+    args = p.parse_args()
+
+    if args.fit_el_ff is not None:
+        fit_el_ff(args.fit_el_ff or None, seed=args.seed)
+        raise SystemExit(0)
+
+    if args.az_law:
+        config.AZ_CONTROL_LAW = args.az_law
+    if args.el_law:
+        config.EL_CONTROL_LAW = args.el_law
+
+    if args.wrap:
+        print(f"{'wrap':18}" + "".join(f"{h:>9}" for _, h in WRAP_COLUMNS))
+        for mode, planner in (("program", "shortest"), ("program", "limited"),
+                              ("program", "planned"), ("tracked", "planned")):
+            with contextlib.redirect_stdout(io.StringIO()):
+                r = run_wrap(planner, mode, seed=args.seed)
+            print(f"{mode + '/' + planner:18}" + "".join(f"  {_fmt(r[k])}" for k, _ in WRAP_COLUMNS))
+        raise SystemExit(0)
+
+    if args.run_pass:
+        rows = {}
+        for spec in PASSES:
+            for mode in ("stepped", "tracked", "program"):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    rows[f"{spec[0]}/{mode}"] = run_pass(spec, mode, seed=args.seed)
+        print_pass_table(rows)
+        raise SystemExit(0)
+
+    wall0 = time.perf_counter()
+    moves = run_all(verbose=args.verbose, seed=args.seed, warm=args.warm)
+    wall = time.perf_counter() - wall0
+
+    out = {
+        "commit": _git_rev(),
+        "seed": args.seed,
+        "warm": args.warm,
+        "control_hz": float(config.CONTROL_HZ),
+        "az_law": config.AZ_CONTROL_LAW,
+        "el_law": config.EL_CONTROL_LAW,
+        "wall_s": round(wall, 3),
+        "moves": moves,
+    }
+
+    print_table(moves)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            base = json.load(f)
+        print(f"\nDelta vs {args.compare} (commit {base.get('commit')}):")
+        print_table(moves, baseline=base.get("moves", {}))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(out, f, indent=2, sort_keys=True)
+        print(f"\nSaved {args.out}")
@@ -13,6 +13,11 @@ ENCODER2_BUS = 3   # Encoder2 -> Motor2 (El)
 MOTOR_HAT_ADDR = 0x60
 MOTOR_HAT_BUS = 1
 
+# Only write PCA9685 channels whose value changed (movement.MotorOutputs),
+# and send contiguous dirty channels as one auto-increment block write.
+MOTOR_WRITE_CACHE  = True
+MOTOR_BLOCK_WRITES = True
+
 # Direction mapping from your tests:
 # +1 means: commanding FORWARD causes encoder angle to increase
 M1_FORWARD_SIGN = -1   # Motor1 FORWARD decreases encoder
@@ -27,13 +32,62 @@ EL_MAX_DEG = 90.0
 # ----------------------------
 # Control tuning
 # ----------------------------
-CONTROL_HZ = 15.0                  # controller loop rate
+CONTROL_HZ = 50.0                  # controller loop rate (encoder reads come from the samplers)
+
+# Scheduler (controller._loop): absolute deadlines on the monotonic clock.
+CONTROL_OVERRUN_POLICY = "skip"    # "skip", "catch_up" or "degrade"
+CONTROL_MAX_CATCHUP    = 3         # catch_up: max missed ticks to run back to back
+CONTROL_DEGRADE_AFTER  = 5         # degrade: overruns in a row before halving the rate
+CONTROL_RECOVER_AFTER  = 100       # degrade: on-time ticks before doubling it again
+CONTROL_MIN_HZ         = 5.0       # degrade: floor
+CONTROL_ACTUATE_EVERY  = 1         # sense every tick, drive motors every Nth tick
 READ_INTERVAL = 0.05               # used for debug-style loops (not required by control loop)
 
 SAMPLES_PER_READ = 5
 I2C_RETRIES = 3
 MAX_JUMP_DEG = 25.0
 
+# AS5600 angle read mode:
+#   True  -> one 2-byte block read per sample (both bytes from the same conversion)
+#   False -> legacy two readU8 calls per sample, 2 ms gap between oversamples
+AS5600_BURST_READ = True
+
+# AS5600 on-chip filtering (CONF register, written at startup, never burned).
+# When applied, software oversampling drops to AS5600_ONCHIP_SAMPLES_PER_READ.
+AS5600_CONFIGURE_CONF          = True
+AS5600_SLOW_FILTER             = 0      # 0=16x 1=8x 2=4x 3=2x (16x is quietest)
+AS5600_FAST_FILTER_THRESHOLD   = 3      # 0=slow only, 1..7 = 6,7,9,18,21,24,10 LSB
+AS5600_HYSTERESIS              = 1      # 0=off, 1..3 LSB on the ANGLE output
+AS5600_ONCHIP_SAMPLES_PER_READ = 1
+
+# STATUS/AGC/MAGNITUDE poll period (seconds, 0 disables). Weak/strong/lost
+# magnet conditions are printed once and counted in AS5600.health.
+AS5600_HEALTH_INTERVAL_S = 1.0
+
+# Background encoder sampling (controller only; manual.py reads directly).
+# Each encoder is polled by its own thread into a ring buffer, and the
+# control loop reads the newest filtered value without touching the bus.
+ENCODER_SAMPLER_ENABLED = True
+ENCODER1_SAMPLE_HZ = 200.0         # E1 on hardware bus 1
+ENCODER2_SAMPLE_HZ = 100.0         # E2 on bit-banged bus 3 (slower)
+ENCODER_RING_SIZE  = 64
+ENCODER_STALE_S    = 0.5           # newest sample older than this -> read error
+ENCODER_COAST_S    = 0.1           # hold the last estimate this long across read errors
+
+# With the sampler disabled, read E1 and E2 concurrently (one worker per bus)
+# so per-tick sensing costs max(AZ, EL) instead of AZ + EL.
+ENCODER_PARALLEL_READS = True
+
+# Per-axis alpha-beta estimator (position.AngleEstimator).
+# When enabled, each control tick uses ONE sample per encoder (no median of
+# SAMPLES_PER_READ) and the controller gets filtered angle + velocity.
+POSITION_ESTIMATOR = True
+EST_ALPHA        = 0.5
+EST_BETA         = 0.1
+EST_GATE_DEG     = MAX_JUMP_DEG    # innovation above this is treated as a glitch
+EST_NOISE_DEG    = 0.1             # ~1 LSB (0.088 deg) of AS5600 quantization
+EST_REINIT_AFTER = 3               # consecutive rejects before re-seeding
+
 # These are used by movement.py for AZ and as general fallbacks.
 FAST_SPEED  = 170
 SLOW_SPEED  = 125
@@ -43,9 +97,51 @@ SLOW_WINDOW_DEG  = 10.0
 CREEP_WINDOW_DEG = 2.5
 DEADBAND_DEG     = 1
 
+# ----------------------------
+# Control law per axis (axis.make_law)
+# ----------------------------
+#   AZ: "profile" (trapezoid below), "tiers" (FAST/SLOW/CREEP above), "pid"
+#   EL: "breakaway" (state machine further down), "tiers", "pid"
+AZ_CONTROL_LAW = "tiers"           # "profile"/AZ_FF_* are sim-tuned so far
+EL_CONTROL_LAW = "breakaway"
+
+# PID + feedforward (axis.PIDLaw). DEADZONE_PWM is added to any nonzero
+# output; FF_POS/FF_NEG are extra PWM when driving toward +/- encoder degrees.
+AZ_PID_KP           = 30.0         # PWM per degree of error
+AZ_PID_KI           = 5.0          # PWM per degree-second
+AZ_PID_KD           = 2.0          # PWM per deg/s (on measured velocity)
+AZ_PID_I_LIMIT      = 20.0         # degree-seconds
+AZ_PID_DEADZONE_PWM = 60
+AZ_PID_FF_POS_PWM   = 0
+AZ_PID_FF_NEG_PWM   = 0
+
+EL_PID_KP           = 30.0
+EL_PID_KI           = 10.0
+EL_PID_KD           = 2.0
+EL_PID_I_LIMIT      = 20.0
+EL_PID_DEADZONE_PWM = 60
+EL_PID_FF_POS_PWM   = 60           # UP carries the dish against gravity
+EL_PID_FF_NEG_PWM   = 40
+
+# ----------------------------
+# AZ motion profile (movement.AzProfile, AZ_CONTROL_LAW = "profile")
+# ----------------------------
+# Acceleration-limited trapezoid re-planned every tick, tracked closed-loop
+# on estimated velocity (needs POSITION_ESTIMATOR, else falls back to tiers).
+# Limits and AZ_FF_* were tuned against sim.py; check them on hardware
+# before selecting "profile".
+AZ_PROFILE_VMAX_DPS   = 30.0
+AZ_PROFILE_ACCEL_DPS2 = 80.0
+AZ_PROFILE_DECEL_DPS2 = 40.0
+AZ_PROFILE_MIN_PWM    = 100        # below this AZ doesn't reliably turn
+AZ_FF_PWM_OFFSET      = 60         # PWM where AZ just keeps moving
+AZ_FF_PWM_PER_DPS     = 5.5        # extra PWM per deg/s
+AZ_VEL_KP             = 4.0        # PWM per deg/s of velocity error
+
 # ----------------------------
 # Elevation UP travel schedule (used when not in approach/creep)
 # ----------------------------
+# Only with EL_FF_MODEL = False (see the load model below).
 # Based on *current* elevation while moving UP
 EL_UP_SPEED_0_25   = 250
 EL_UP_SPEED_25_45  = 200
@@ -54,6 +150,30 @@ EL_UP_SPEED_45_MAX = 125
 EL_UP_BREAK_1_DEG = 25.0
 EL_UP_BREAK_2_DEG = 45.0
 
+# ----------------------------
+# Elevation load model (axis.ElLoadModel), replaces the bands above
+# ----------------------------
+# pwm = OFFSET + COS * cos(el) + PER_DPS * speed, per direction. Travel,
+# approach and creep become slew rates, so EL moves at the same speed over
+# the whole range. Refit with `python3 bench.py --fit-el-ff rotator_el_load.csv`
+# (samples of steady driving are appended to EL_FF_LOG_FILE on shutdown).
+# The values below were fitted against sim.py, so the model stays off until
+# it has been refit from hardware logs.
+EL_FF_MODEL = False
+EL_TRAVEL_DPS   = 20.0
+EL_APPROACH_DPS = 8.0
+EL_CREEP_DPS    = 4.0
+
+EL_FF_UP_OFFSET_PWM    = 61.2
+EL_FF_UP_COS_PWM       = 43.9
+EL_FF_UP_PWM_PER_DPS   = 4.43
+EL_FF_DOWN_OFFSET_PWM  = 101.4
+EL_FF_DOWN_COS_PWM     = -45.8
+EL_FF_DOWN_PWM_PER_DPS = 5.63
+
+EL_FF_LOG_SETTLE_S     = 0.3       # PWM steady this long before a sample is logged
+EL_FF_LOG_MAX_SAMPLES  = 5000
+
 # ----------------------------
 # Elevation DOWN travel speed (used when not in approach/creep)
 # ----------------------------
@@ -68,6 +188,13 @@ EL_DOWN_TRAVEL_SPEED = 200
 EL_MOVE_THRESH_DEG = 0.25
 EL_MOVE_WINDOW_S   = 0.30
 
+# With POSITION_ESTIMATOR on, "moving" is decided from estimated velocity
+# instead of the window above.
+EL_MOVE_VEL_DPS = 1.0
+
+# Arrival is only reported once both axes are in the deadband AND slower than this.
+ARRIVE_MAX_VEL_DPS = 2.0
+
 # If we are commanding motion but we do not detect movement long enough,
 # we consider it stalled and re-enter breakaway search.
 EL_STALL_TIME_S = 0.45
@@ -94,8 +221,139 @@ EL_CREEP_WINDOW_DEG    = 2.5
 EL_APPROACH_SPEED      = 100
 EL_CREEP_SPEED         = 60
 
-# Optional: settle time when changing EL direction
+# Learned breakaway PWM per direction + EL bin (movement.BreakawayTable),
+# persisted to EL_BREAKAWAY_FILE next to CAL_FILE. Breakaway searches start
+# MARGIN below the learned value; the EL_*_BREAKAWAY_START_SPEED values
+# above are only used for bins with nothing learned yet.
+EL_BREAKAWAY_LEARN           = True
+EL_BREAKAWAY_BIN_DEG         = 10.0
+EL_BREAKAWAY_LEARN_MARGIN_PWM = 15
+EL_BREAKAWAY_LEARN_DECAY     = 0.2     # fraction of the gap closed when it breaks lower
+EL_BREAKAWAY_SAVE_INTERVAL_S = 60.0    # at most this often (on arrival), plus on shutdown
+
+# Settle time when EL reverses while moving (non-blocking SETTLE state in
+# axis.AxisController; skipped if the estimator already sees it stopped)
 EL_DIR_CHANGE_SETTLE_S = 0.25
+EL_STALL_DETECT        = True
+
+# ----------------------------
+# Moving-target tracking (tracking.TargetRate + axis.AxisController)
+# ----------------------------
+# Successive set_target() calls less than TRACK_MAX_GAP_S apart and within
+# TRACK_MAX_STEP_DEG of each other form a track; its least-squares rate is
+# used to extrapolate the target TRACK_LEAD_S ahead once the updates arrive
+# at a steady rhythm (each interval within TRACK_RHYTHM_TOL of the median).
+# Past one update interval without a new target the rate fades out, reaching
+# zero TRACK_EXTRAP_INTERVALS intervals after the last update (LOS, or a few
+# evenly spaced GOTOs). An axis whose target moves at least
+# <AXIS>_TRACK_DRIVE_MIN_DPS (roughly the slowest speed it holds without
+# stick-slip) follows it in velocity mode, with the rate as feedforward;
+# slower targets are stepped TRACK_STEP_LEAD_DEG past the target so the
+# pointing error is centred on the deadband instead of always lagging.
+TRACK_RATE_ENABLED  = True
+TRACK_HISTORY       = 4
+TRACK_MIN_POINTS    = 3
+TRACK_MAX_GAP_S     = 15.0
+TRACK_MAX_STEP_DEG  = 10.0
+TRACK_EXTRAP_INTERVALS = 1.5
+TRACK_RHYTHM_TOL    = 0.5
+TRACK_LEAD_S        = 0.2
+TRACK_MIN_RATE_DPS  = 0.02
+TRACK_STEP_LEAD_DEG = 1.0
+AZ_TRACK_DRIVE_MIN_DPS = 2.0
+EL_TRACK_DRIVE_MIN_DPS = 2.0
+TRACK_POS_KP        = 1.0          # deg/s of correction per degree of error
+TRACK_MAX_CORR_DPS  = 5.0
+AZ_TRACK_VEL_KP     = 4.0          # PWM per deg/s of speed error
+EL_TRACK_VEL_KP     = 4.0
+# Velocity tracking feedforward for laws without a speed model ("tiers", and
+# "breakaway" with EL_FF_MODEL off): creep PWM + TRACK_FF_PWM_PER_DPS * rate.
+# Its error is learned per direction as a PWM trim (<AXIS>_TRACK_VEL_KI, PWM
+# per degree of accumulated speed error), capped at <AXIS>_TRACK_TRIM_MAX_PWM.
+TRACK_FF_PWM_PER_DPS = 4.0
+AZ_TRACK_VEL_KI     = 20.0
+EL_TRACK_VEL_KI     = 20.0
+AZ_TRACK_TRIM_MAX_PWM = 80.0
+EL_TRACK_TRIM_MAX_PWM = 80.0
+
+# Program track (\set_track / load_program_track): time-tagged (t, az, el)
+# points followed by linear interpolation, TRACK_LEAD_S ahead.
+PROGRAM_TRACK_MAX_POINTS = 20000
+
+# ----------------------------
+# Offline pass tracking (orbit.py: SGP4 from a local TLE file, needs numpy)
+# ----------------------------
+STATION_LAT_DEG = 0.0              # geodetic, north positive
+STATION_LON_DEG = 0.0              # east positive
+STATION_ALT_M   = 0.0
+TLE_FILE = "satellites.tle"
+
+# A pass is above max(EL_MIN_DEG, PASS_MIN_EL_DEG); passes peaking below
+# PASS_MIN_MAX_EL_DEG are skipped. Horizon crossings are searched on a
+# PASS_SEARCH_STEP_S grid, pass tables sampled every PASS_STEP_S.
+PASS_MIN_EL_DEG      = 0.0
+PASS_MIN_MAX_EL_DEG  = 10.0
+PASS_SEARCH_STEP_S   = 20.0
+PASS_STEP_S          = 1.0
+PASS_PREPOSITION_S   = 60.0        # upload the pass (and park at AOS) this long before AOS
+
+# ----------------------------
+# Cable wrap (controller AZ planner)
+# ----------------------------
+# Continuous AZ relative to home (AZ=0 at startup or after set_az_home_here)
+# that the cable allows. Targets are placed on the nearest wrap inside these
+# limits; a program track (a pass from orbit.py, or \set_track) is planned
+# as a whole so it never unwinds halfway (AZ_WRAP_LOOKAHEAD). A target moving
+# under set_target() updates has no known future, so it stays on its wrap
+# until it reaches a limit. AZ_WRAP_LIMITS = False restores the unbounded
+# shortest-path behaviour.
+AZ_WRAP_LIMITS    = True
+AZ_WRAP_MIN_DEG   = -360.0
+AZ_WRAP_MAX_DEG   = 360.0
+AZ_WRAP_LOOKAHEAD = True
+
+# ----------------------------
+# Position streaming (feed.py, \stream_pos)
+# ----------------------------
+# Subscribers get the control loop's per-tick position snapshot at their own
+# rate (capped at STREAM_MAX_HZ) and/or when AZ or EL moves past their
+# threshold, instead of polling p.
+STREAM_MAX_HZ          = 50.0
+STREAM_MAX_SUBSCRIBERS = 64
+
+# ----------------------------
+# Predictive stopping (axis.AxisController STOPPING state)
+# ----------------------------
+# While moving toward the target, cut power once the predicted coast
+# distance (COAST_S * |velocity|) reaches the remaining error, then hold
+# STOP_MODE until the axis has stopped. "brake" shorts the motor (needs
+# MOTOR_WRITE_CACHE; falls back to "release" on the plain library).
+# COAST_S is the starting value, re-learned per direction from every stop.
+# Off by default: the COAST_S starting values come from sim.py.
+AZ_PREDICTIVE_STOP = False
+AZ_STOP_MODE       = "brake"
+AZ_COAST_S         = 0.03
+EL_PREDICTIVE_STOP = False
+EL_STOP_MODE       = "brake"
+EL_COAST_S         = 0.02
+COAST_LEARN_RATE   = 0.3
+
+# ----------------------------
+# Azimuth stall detection + breakaway (axis.AxisController)
+# ----------------------------
+# Driven but slower than AZ_MOVE_VEL_DPS (or less than AZ_MOVE_THRESH_DEG per
+# AZ_MOVE_WINDOW_S without the estimator) for AZ_STALL_TIME_S -> breakaway
+# search starting at the stalled PWM, stepping like EL.
+AZ_STALL_DETECT             = True
+AZ_MOVE_VEL_DPS             = 1.0
+AZ_MOVE_THRESH_DEG          = 0.25
+AZ_MOVE_WINDOW_S            = 0.30
+AZ_STALL_TIME_S             = 0.45
+AZ_BREAKAWAY_START_SPEED    = 100
+AZ_BREAKAWAY_STEP_SPEED     = 25
+AZ_BREAKAWAY_MAX_SPEED      = 255
+AZ_BREAKAWAY_INTERVAL_S     = 0.20
+AZ_DIR_CHANGE_SETTLE_S      = 0.15
 
 # ----------------------------
 # (Removed) old "max power zones" + governor settings
@@ -110,6 +368,9 @@ EL_DIR_CHANGE_SETTLE_S = 0.25
 # Calibration storage
 # ----------------------------
 CAL_FILE = "rotator_cal.json"
+EL_BREAKAWAY_FILE = "rotator_breakaway.json"
+EL_FF_LOG_FILE = "rotator_el_load.csv"    # None -> don't log
+EL_FF_LOG_MAX_ROWS = 50000                # oldest rows dropped beyond this
 
 
 def load_cal():
@@ -135,3 +396,59 @@ def load_cal():
 def save_cal(cal):
     with open(CAL_FILE, "w") as f:
         json.dump(cal, f, indent=2, sort_keys=True)
+
+
+def load_breakaway(path=None):
+    """
+    Learned EL breakaway table (movement.BreakawayTable.to_dict()), or {}.
+    """
+    path = path or EL_BREAKAWAY_FILE
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def save_breakaway(data, path=None):
+    path = path or EL_BREAKAWAY_FILE
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def load_el_load_log(path=None):
+    """
+    Logged EL drive samples (direction, el_deg, pwm, speed_dps) from EL_FF_LOG_FILE.
+    """
+    path = path or EL_FF_LOG_FILE
+    samples = []
+    if path and os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                parts = line.strip().split(",")
+                if len(parts) != 4 or not parts[0].lstrip("+-").isdigit():
+                    continue  # header / junk
+                samples.append((int(parts[0]), float(parts[1]), int(parts[2]), float(parts[3])))
+    return samples
+
+
+def append_el_load_log(samples, path=None, max_rows=None):
+    """
+    Appends to the EL load log, keeping only the newest max_rows samples
+    (EL_FF_LOG_MAX_ROWS by default).
+    """
+    path = path or EL_FF_LOG_FILE
+    max_rows = EL_FF_LOG_MAX_ROWS if max_rows is None else int(max_rows)
+    rows = load_el_load_log(path) + list(samples)
+    if max_rows > 0:
+        rows = rows[-max_rows:]
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write("direction,el_deg,pwm,speed_dps\n")
+        for d, el, pwm, spd in rows:
+            f.write(f"{d},{el},{pwm},{spd}\n")
+    os.replace(tmp, path)
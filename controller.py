@@ -2,18 +2,28 @@
 import time
 import threading
 import atexit
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 
+import axis
 import config
+import feed
 import position
 import movement
-
-from Adafruit_MotorHAT import Adafruit_MotorHAT
+import timing
+import tracking
 
 
 def clamp(x, lo, hi):
     return max(lo, min(hi, float(x)))
 
 
+def _timed(fn):
+    t0 = time.perf_counter()
+    v = fn()
+    return v, time.perf_counter() - t0
+
+
 class RotatorController:
     """
     Owns hardware and runs a background control loop.
@@ -21,23 +31,91 @@ class RotatorController:
       - set_target(az_deg, el_deg)
       - get_position() -> (az_deg, el_deg)
       - stop()
+
+    `backend` defaults to the real MotorHAT + AS5600s. sim.SimBackend swaps in
+    a simulated plant and (optionally) a virtual clock.
     """
 
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, backend=None):
         self.debug = debug
+        self.backend = backend
+        self.clock = backend.clock if backend is not None else time
 
         # Calibration
         self.cal = config.load_cal()
 
-        # Motors
-        self.mh = movement.init_motorhat()
-        self.motor_az = self.mh.getMotor(1)
-        self.motor_el = self.mh.getMotor(2)
+        # Loop instrumentation (see get_loop_stats)
+        self.stats = timing.LoopStats(1.0 / float(config.CONTROL_HZ), clock=self.clock)
+
+        # Motors (timed so motor write cost shows up in the stats). With
+        # MOTOR_WRITE_CACHE they go through movement.MotorOutputs, which only
+        # sends PCA9685 channels that changed, batched once per tick; the
+        # calls then only touch the cache, so the batch flush is what gets timed.
+        self.mh = backend.init_motorhat() if backend is not None else movement.init_motorhat()
+        self.motor_outputs = movement.init_motor_outputs(self.mh, self.stats.motor_write)
+        if self.motor_outputs is not None:
+            self.motor_az = self.motor_outputs.motor(1)
+            self.motor_el = self.motor_outputs.motor(2)
+        else:
+            self.motor_az = timing.TimedMotor(self.mh.getMotor(1), self.stats.motor_write)
+            self.motor_el = timing.TimedMotor(self.mh.getMotor(2), self.stats.motor_write)
 
         # Encoders
-        self.enc_az = position.AS5600(config.ENCODER1_BUS, name="E1")
-        self.enc_el = position.AS5600(config.ENCODER2_BUS, name="E2")
-        self.az_tracker = position.UnwrappedAngle(self.enc_az)
+        if backend is not None:
+            self.enc_az = backend.make_encoder(config.ENCODER1_BUS, name="E1")
+            self.enc_el = backend.make_encoder(config.ENCODER2_BUS, name="E2")
+        else:
+            self.enc_az = position.AS5600(config.ENCODER1_BUS, name="E1")
+            self.enc_el = position.AS5600(config.ENCODER2_BUS, name="E2")
+        for enc in (self.enc_az, self.enc_el):
+            enc.configure_from_config()
+
+        # Reads go through a background sampler per encoder when enabled,
+        # otherwise straight to the bus inside the control loop.
+        # A virtual (sim) clock can only be driven from one thread, so no
+        # samplers or read workers in that case.
+        threaded_io = not getattr(self.clock, "virtual", False)
+        self._samplers = []
+        self.src_az = self.enc_az
+        self.src_el = self.enc_el
+        if threaded_io and bool(getattr(config, "ENCODER_SAMPLER_ENABLED", False)):
+            ring = int(getattr(config, "ENCODER_RING_SIZE", 64))
+            stale = float(getattr(config, "ENCODER_STALE_S", 0.5))
+            self.src_az = position.EncoderSampler(
+                self.enc_az, float(getattr(config, "ENCODER1_SAMPLE_HZ", 200.0)), ring, stale)
+            self.src_el = position.EncoderSampler(
+                self.enc_el, float(getattr(config, "ENCODER2_SAMPLE_HZ", 100.0)), ring, stale)
+            self._samplers = [self.src_az, self.src_el]
+            for smp in self._samplers:
+                smp.start()
+            for smp in self._samplers:
+                smp.wait_ready()
+
+        # Per-axis trackers. With POSITION_ESTIMATOR they carry an alpha-beta
+        # estimator (single sample per tick, velocity available); without it
+        # they fall back to the median-of-N filtered reads.
+        self.az_tracker = position.UnwrappedAngle(self.src_az, estimator=position.make_estimator())
+        self.el_tracker = position.UnwrappedAngle(self.src_el, estimator=position.make_estimator())
+
+        # Direct (non-sampler) reads: E1 and E2 sit on different buses, so
+        # overlap them with one worker per bus instead of reading back to back.
+        self._read_pool = None
+        if (threaded_io and not self._samplers
+                and bool(getattr(config, "ENCODER_PARALLEL_READS", True))
+                and config.ENCODER1_BUS != config.ENCODER2_BUS):
+            self._read_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="enc-read")
+
+        # Sensing time per tick. serial_s is what AZ + EL would have cost back
+        # to back; wall_s is what the tick actually waited.
+        self._sense = {
+            "ticks": 0,
+            "parallel": self._read_pool is not None,
+            "last_az_s": 0.0,
+            "last_el_s": 0.0,
+            "last_wall_s": 0.0,
+            "serial_s": 0.0,
+            "wall_s": 0.0,
+        }
 
         # State
         self._lock = threading.Lock()
@@ -48,6 +126,11 @@ class RotatorController:
         self._cur_az_phys = 0.0
         self._cur_el_phys = 0.0
         self._cur_el_raw = 0.0  # raw AS5600 degrees (0..360)
+        self._cur_az_vel = None  # deg/s from the estimator (None if disabled)
+        self._cur_el_vel = None
+
+        # One position snapshot per tick, fanned out to subscribers (feed.py)
+        self.feed = feed.PositionFeed.from_config(log=self._log)
 
         # Arrival reporting (print once per target)
         self._arrived_reported = False
@@ -56,68 +139,65 @@ class RotatorController:
         self._thread = None
         self._running = False
 
-        # ----------------------------
-        # EL control: breakaway search + approach slow + stall re-kick
-        # ----------------------------
-        self._el_dir_change_settle_s = float(getattr(config, "EL_DIR_CHANGE_SETTLE_S", 0.25))
-
-        # Movement detection (raw degrees)
-        self._el_move_thresh_deg = float(getattr(config, "EL_MOVE_THRESH_DEG", 0.25))
-        self._el_move_window_s = float(getattr(config, "EL_MOVE_WINDOW_S", 0.30))
-
-        # Stall detection (no meaningful movement while commanding)
-        self._el_stall_time_s = float(getattr(config, "EL_STALL_TIME_S", 0.45))
-
-        # Breakaway search (UP)
-        self._el_up_bk_start = int(getattr(config, "EL_UP_BREAKAWAY_START_SPEED", 150))
-        self._el_up_bk_step = int(getattr(config, "EL_UP_BREAKAWAY_STEP_SPEED", 25))
-        self._el_up_bk_max = int(getattr(config, "EL_UP_BREAKAWAY_MAX_SPEED", 255))
-        self._el_up_bk_interval_s = float(getattr(config, "EL_UP_BREAKAWAY_INTERVAL_S", 0.30))
-
-        # Breakaway search (DOWN)
-        self._el_down_bk_start = int(getattr(config, "EL_DOWN_BREAKAWAY_START_SPEED", 150))
-        self._el_down_bk_step = int(getattr(config, "EL_DOWN_BREAKAWAY_STEP_SPEED", 25))
-        self._el_down_bk_max = int(getattr(config, "EL_DOWN_BREAKAWAY_MAX_SPEED", 255))
-        self._el_down_bk_interval_s = float(getattr(config, "EL_DOWN_BREAKAWAY_INTERVAL_S", 0.30))
-
-        # Approach/creep windows
-        self._el_approach_window_deg = float(getattr(config, "EL_APPROACH_WINDOW_DEG", 8.0))
-        self._el_creep_window_deg = float(getattr(config, "EL_CREEP_WINDOW_DEG", 2.5))
-
-        # Fixed approach/creep speeds
-        self._el_approach_speed = int(getattr(config, "EL_APPROACH_SPEED", 120))
-        self._el_creep_speed = int(getattr(config, "EL_CREEP_SPEED", 80))
-
-        # UP travel uses your existing schedule (already in config)
-        self._el_up_break_1 = float(getattr(config, "EL_UP_BREAK_1_DEG", 25.0))
-        self._el_up_break_2 = float(getattr(config, "EL_UP_BREAK_2_DEG", 45.0))
-        self._el_up_speed_0_25 = int(getattr(config, "EL_UP_SPEED_0_25", 250))
-        self._el_up_speed_25_45 = int(getattr(config, "EL_UP_SPEED_25_45", 200))
-        self._el_up_speed_45_max = int(getattr(config, "EL_UP_SPEED_45_MAX", 125))
-
-        # DOWN travel base (used after breakaway, before approach windows)
-        # (You can set this in config later; default keeps it strong but not max.)
-        self._el_down_travel_speed = int(getattr(config, "EL_DOWN_TRAVEL_SPEED", 200))
-
-        # Internal EL runtime
-        self._el_state = "IDLE"   # IDLE, UP_BREAKAWAY, DOWN_BREAKAWAY, RUN
-        self._el_last_dir = 0     # -1, 0, +1
-        self._el_cmd_speed = 0
-        self._el_next_step_ts = 0.0
-
-        # Movement/stall bookkeeping
-        self._el_last_move_raw = None
-        self._el_last_move_ts = None
-        self._el_stall_start_ts = None
+        # Event counters (monotonic since startup; bench.py diffs them per move)
+        # (axis.AxisController adds <axis>_breakaway / _rekick / _settle per axis)
+        self.events = {
+            "el_breakaway": 0,   # breakaway searches started
+            "el_rekick": 0,      # stalls while driving that forced a new breakaway
+            "arrived": 0,
+        }
+
+        # Arrival needs the antenna to have actually stopped, not just be passing through
+        self._arrive_max_vel_dps = float(getattr(config, "ARRIVE_MAX_VEL_DPS", 2.0))
+
+        # Learned EL breakaway PWM (persisted next to the calibration file;
+        # a backend may set breakaway_file = None to keep it in memory)
+        self.el_breakaway = None
+        self._breakaway_file = getattr(backend, "breakaway_file", config.EL_BREAKAWAY_FILE)
+        self._breakaway_saved_ts = self.clock.monotonic()
+        self._el_load_log_file = getattr(backend, "el_load_log_file", config.EL_FF_LOG_FILE)
+        if bool(getattr(config, "EL_BREAKAWAY_LEARN", False)):
+            self.el_breakaway = movement.BreakawayTable.from_config()
+            if self._breakaway_file:
+                self.el_breakaway.load_dict(config.load_breakaway(self._breakaway_file))
+
+        # Per-axis controllers around the configured control laws (axis.py).
+        # Each runs its own non-blocking state machine, so a settle or
+        # breakaway on one axis never holds up the other.
+        # BRAKE needs movement.CachedMotor; the library motor ignores it.
+        brake_ok = self.motor_outputs is not None
+        self.az_axis = axis.AxisController.from_config(
+            "AZ", self.motor_az, config.M1_FORWARD_SIGN, clock=self.clock,
+            events=self.events, log=self._log, brake_ok=brake_ok)
+        self.el_axis = axis.AxisController.from_config(
+            "EL", self.motor_el, config.M2_FORWARD_SIGN, clock=self.clock,
+            breakaway_table=self.el_breakaway, events=self.events, log=self._log, brake_ok=brake_ok)
+        self._move_started_ts = None
+        self.last_arrival = None   # see get_arrival_stats()
+
+        # Target rate from successive set_target() calls (None -> static targets)
+        self.target_rate = tracking.TargetRate.from_config() if bool(getattr(config, "TRACK_RATE_ENABLED", False)) else None
+        # Uploaded time-tagged trajectory (load_program_track); overrides both
+        self.program = None
+        self._program_az_shift = None    # deg added to its AZ to keep it on one cable wrap
+        self._track_lead_s = float(getattr(config, "TRACK_LEAD_S", 0.0))
+
+        # Cable wrap: unwrapped AZ limits relative to home (None -> shortest path, unbounded)
+        self._az_wrap = None
+        if bool(getattr(config, "AZ_WRAP_LIMITS", False)):
+            self._az_wrap = (float(config.AZ_WRAP_MIN_DEG), float(config.AZ_WRAP_MAX_DEG))
+        self._az_wrap_lookahead = bool(getattr(config, "AZ_WRAP_LOOKAHEAD", True))
+        self._az_goal = None             # last unwrapped AZ goal, and whether it was moving
+        self._az_goal_moving = False
 
         atexit.register(self.shutdown)
 
         # Prime readings + auto-zero AZ session-only
         try:
-            _ = position.stable_read_unwrapped(self.az_tracker, seconds=0.25)
-            _ = position.stable_read_wrapped(self.enc_el, seconds=0.25)
+            _ = position.stable_read_unwrapped(self.az_tracker, seconds=0.25, clock=self.clock)
+            _ = position.stable_read_wrapped(self.src_el, seconds=0.25, clock=self.clock)
 
-            cur_az_unwrapped = position.stable_read_unwrapped(self.az_tracker, seconds=0.25)
+            cur_az_unwrapped = position.stable_read_unwrapped(self.az_tracker, seconds=0.25, clock=self.clock)
             self.cal["az_offset_deg"] = cur_az_unwrapped % 360.0
             print(f"[AZ] Auto-zero on startup: az_offset_deg={self.cal['az_offset_deg']:.6f}", flush=True)
 
@@ -133,6 +213,7 @@ class RotatorController:
         if self._thread and self._thread.is_alive():
             return
         self._running = True
+        self.stats.reset()
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
 
@@ -142,6 +223,12 @@ class RotatorController:
             self.stop()
         except Exception:
             pass
+        for smp in self._samplers:
+            smp.stop()
+        self._save_breakaway(force=True)
+        self._save_el_load_log()
+        if self._read_pool is not None:
+            self._read_pool.shutdown(wait=False)
 
     def stop(self):
         with self._lock:
@@ -150,10 +237,12 @@ class RotatorController:
             self._target_el = None
             self._arrived_reported = False
             self._last_arrival_target = None
+            self.program = None
+            if self.target_rate is not None:
+                self.target_rate.clear()
 
-        self._el_reset()
-        movement.stop_motor(self.motor_az)
-        movement.stop_motor(self.motor_el)
+        self.el_axis.stop()
+        self.az_axis.stop()
 
     def set_target(self, az_deg, el_deg):
         az = float(az_deg) % 360.0
@@ -164,18 +253,163 @@ class RotatorController:
             self._stop_requested = False
             self._arrived_reported = False
             self._last_arrival_target = (az, el)
+            self._move_started_ts = self.clock.monotonic()
+            self.program = None
+            if self.target_rate is not None:
+                self.target_rate.push(self._move_started_ts, az, el)
+        self.az_axis.begin_move()
+        self.el_axis.begin_move()
+
+    def load_program_track(self, points):
+        """
+        Follow a time-tagged trajectory of (unix_time, az, el) points,
+        interpolating between them; replaces any current target. Before the
+        first point the rotator holds there. Raises ValueError on a bad track.
+        """
+        prog = tracking.ProgramTrack.from_config(points)
+        az, el, _, _ = prog.at(prog.start)
+        shift = None
+        if self._az_wrap is not None and self._az_wrap_lookahead:
+            off = self.cal["az_offset_deg"]
+            start = position.plan_track_wrap(self.az_tracker.unwrapped, prog.az, off, *self._az_wrap)
+            if start is None:
+                print(f"[TRACK] program track spans {max(prog.az) - min(prog.az):.0f}° of AZ: "
+                      f"does not fit the cable wrap, will unwind", flush=True)
+            else:
+                shift = start - off - az
+        with self._lock:
+            self.program = prog
+            self._program_az_shift = shift
+            self._target_az = az % 360.0
+            self._target_el = clamp(el, config.EL_MIN_DEG, config.EL_MAX_DEG)
+            self._stop_requested = False
+            self._arrived_reported = False
+            self._last_arrival_target = (self._target_az, self._target_el)
+            self._move_started_ts = self.clock.monotonic()
+            if self.target_rate is not None:
+                self.target_rate.clear()
+        self.az_axis.begin_move()
+        self.el_axis.begin_move()
+        print(f"[TRACK] program track loaded: {len(prog)} points, "
+              f"{prog.end - prog.start:.0f}s starting in {prog.start - self.clock.time():.0f}s", flush=True)
+        return len(prog)
+
+    def clear_program_track(self):
+        """
+        Drop the program track; the rotator holds its last target.
+        """
+        with self._lock:
+            self.program = None
+
+    def get_program_track(self):
+        """
+        {points, start, end, remaining_s} of the loaded program track, or None.
+        """
+        with self._lock:
+            prog = self.program
+        if prog is None:
+            return None
+        return {
+            "points": len(prog),
+            "start": prog.start,
+            "end": prog.end,
+            "remaining_s": max(0.0, prog.end - self.clock.time()),
+        }
 
     def get_position(self):
         with self._lock:
             return (float(self._cur_az_phys), float(self._cur_el_phys))
 
+    def subscribe_position(self, callback, rate_hz=0.0, threshold_deg=0.0):
+        """
+        callback(feed.PositionSnapshot) from the control thread at rate_hz
+        and/or whenever AZ or EL moves threshold_deg. Returns the
+        subscription for unsubscribe_position(); ValueError if refused.
+        """
+        return self.feed.subscribe(callback, rate_hz, threshold_deg)
+
+    def unsubscribe_position(self, sub):
+        self.feed.unsubscribe(sub)
+
+    def get_snapshot(self):
+        """
+        Latest feed.PositionSnapshot (no lock), or None before the first tick.
+        """
+        return self.feed.latest
+
+    def get_velocity(self):
+        """
+        Estimated (az_dps, el_dps), or (None, None) with POSITION_ESTIMATOR off.
+        """
+        with self._lock:
+            return (self._cur_az_vel, self._cur_el_vel)
+
+    def get_target_rate(self):
+        """
+        Estimated (az_dps, el_dps) of the commanded target, or None when it is static.
+        """
+        with self._lock:
+            pred = self.target_rate.predict(self.clock.monotonic()) if self.target_rate is not None else None
+            if pred is None:
+                return None
+            return pred[2], pred[3]
+
+    def get_encoder_health(self):
+        """
+        Magnet health and bus accounting per encoder.
+        """
+        out = {}
+        for enc in (self.enc_az, self.enc_el):
+            h = dict(enc.health)
+            h["onchip_filter"] = enc.onchip_filter
+            h["samples_per_read"] = enc.samples_per_read
+            h["bus"] = enc.bus_stats()
+            out[enc.name] = h
+        return out
+
+    def get_loop_stats(self):
+        """
+        Control loop timing: histograms (tick, encoder_read, motor_write,
+        lateness), overruns, achieved rate and exception counts by type.
+        """
+        st = self.stats.snapshot()
+        if self.motor_outputs is not None:
+            st["motor_outputs"] = self.motor_outputs.snapshot()
+        st["arrival"] = self.get_arrival_stats()
+        return st
+
+    def get_arrival_stats(self):
+        """
+        Last completed move: duration, and per axis the correction cycles
+        (reversals), predictive stops, breakaways, last coast distance and
+        the learned coast times. None until the first arrival.
+        """
+        with self._lock:
+            return None if self.last_arrival is None else dict(self.last_arrival)
+
+    def reset_loop_stats(self):
+        self.stats.reset()
+
+    def get_sense_timing(self):
+        """
+        Encoder sensing time per control tick (seconds). `saved_s` is the
+        total time won by overlapping the AZ and EL reads.
+        """
+        with self._lock:
+            st = dict(self._sense)
+        n = st["ticks"]
+        st["avg_serial_s"] = (st["serial_s"] / n) if n else 0.0
+        st["avg_wall_s"] = (st["wall_s"] / n) if n else 0.0
+        st["saved_s"] = st["serial_s"] - st["wall_s"]
+        return st
+
     def set_az_home_here(self):
-        cur_unwrapped = position.stable_read_unwrapped(self.az_tracker, seconds=0.25)
+        cur_unwrapped = position.stable_read_unwrapped(self.az_tracker, seconds=0.25, clock=self.clock)
         self.cal["az_offset_deg"] = cur_unwrapped % 360.0
         config.save_cal(self.cal)
 
     def set_el_zero_here(self):
-        cur_raw = position.stable_read_wrapped(self.enc_el, seconds=0.25)
+        cur_raw = position.stable_read_wrapped(self.src_el, seconds=0.25, clock=self.clock)
         self.cal["el_offset_deg"] = cur_raw % 360.0
         config.save_cal(self.cal)
 
@@ -187,317 +421,293 @@ class RotatorController:
         if self.debug:
             print(msg, flush=True)
 
-    def _motor_el_set(self, signed_dir: int, speed_0_255: int):
-        if signed_dir == 0 or speed_0_255 <= 0:
-            try:
-                self.motor_el.setSpeed(0)
-            except Exception:
-                pass
-            self.motor_el.run(Adafruit_MotorHAT.RELEASE)
+    def _save_breakaway(self, force=False):
+        tbl = self.el_breakaway
+        if tbl is None or not tbl.dirty or not self._breakaway_file:
             return
-
-        if (signed_dir * int(config.M2_FORWARD_SIGN)) > 0:
-            self.motor_el.run(Adafruit_MotorHAT.FORWARD)
-        else:
-            self.motor_el.run(Adafruit_MotorHAT.BACKWARD)
-
-        self.motor_el.setSpeed(int(clamp(speed_0_255, 0, 255)))
-
-    def _wrap_delta_deg(self, cur_raw: float, prev_raw: float) -> float:
-        return (cur_raw - prev_raw + 180.0) % 360.0 - 180.0
-
-    def _el_reset(self):
-        self._el_state = "IDLE"
-        self._el_last_dir = 0
-        self._el_cmd_speed = 0
-        self._el_next_step_ts = 0.0
-
-        self._el_last_move_raw = None
-        self._el_last_move_ts = None
-        self._el_stall_start_ts = None
-
-    def _el_mark_move(self, cur_raw: float):
-        self._el_last_move_raw = cur_raw
-        self._el_last_move_ts = time.time()
-        self._el_stall_start_ts = None
-
-    def _el_moved_recently(self, cur_raw: float) -> bool:
-        now = time.time()
-        if self._el_last_move_raw is None or self._el_last_move_ts is None:
-            self._el_last_move_raw = cur_raw
-            self._el_last_move_ts = now
-            return False
-
-        if (now - self._el_last_move_ts) < 0.01:
-            return False
-
-        if (now - self._el_last_move_ts) >= self._el_move_window_s:
-            d = self._wrap_delta_deg(cur_raw, self._el_last_move_raw)
-            if abs(d) >= self._el_move_thresh_deg:
-                self._el_mark_move(cur_raw)
-                return True
-            else:
-                # refresh window anchor (prevents old anchor from causing weird deltas)
-                self._el_last_move_raw = cur_raw
-                self._el_last_move_ts = now
-                return False
-
-        return False
-
-    def _el_stalled(self) -> bool:
-        now = time.time()
-        if self._el_stall_start_ts is None:
-            self._el_stall_start_ts = now
-            return False
-        return (now - self._el_stall_start_ts) >= self._el_stall_time_s
-
-    def _el_up_schedule_speed(self, cur_el_phys: float) -> int:
-        if cur_el_phys < self._el_up_break_1:
-            return self._el_up_speed_0_25
-        if cur_el_phys < self._el_up_break_2:
-            return self._el_up_speed_25_45
-        return self._el_up_speed_45_max
-
-    def _el_enter_breakaway(self, desired_dir: int, cur_raw: float):
-        now = time.time()
-        if desired_dir > 0:
-            self._el_state = "UP_BREAKAWAY"
-            self._el_cmd_speed = int(clamp(self._el_up_bk_start, 0, 255))
-            self._el_next_step_ts = now + self._el_up_bk_interval_s
+        now = self.clock.monotonic()
+        if not force and (now - self._breakaway_saved_ts) < float(getattr(config, "EL_BREAKAWAY_SAVE_INTERVAL_S", 60.0)):
+            return
+        self._breakaway_saved_ts = now
+        try:
+            config.save_breakaway(tbl.to_dict(), self._breakaway_file)
+            tbl.dirty = False
+        except Exception as e:
+            self._log(f"[EL] could not save breakaway table: {e}")
+
+    def _save_el_load_log(self):
+        """
+        Append logged EL drive samples for `bench.py --fit-el-ff <csv>`.
+        """
+        samples = getattr(self.el_axis.law, "samples", None)
+        if not samples or not self._el_load_log_file:
+            return
+        try:
+            config.append_el_load_log(list(samples), self._el_load_log_file)
+            samples.clear()
+        except Exception as e:
+            self._log(f"[EL] could not write load log: {e}")
+
+    def _read_encoders(self):
+        t0 = time.perf_counter()
+        if self._read_pool is not None:
+            f_az = self._read_pool.submit(_timed, self.az_tracker.read)
+            f_el = self._read_pool.submit(_timed, self.el_tracker.read)
+            az_unwrapped, az_s = f_az.result()
+            el_unwrapped, el_s = f_el.result()
         else:
-            self._el_state = "DOWN_BREAKAWAY"
-            self._el_cmd_speed = int(clamp(self._el_down_bk_start, 0, 255))
-            self._el_next_step_ts = now + self._el_down_bk_interval_s
+            az_unwrapped, az_s = _timed(self.az_tracker.read)
+            el_unwrapped, el_s = _timed(self.el_tracker.read)
+        wall_s = time.perf_counter() - t0
+        self.stats.encoder_read.record(wall_s)
 
-        self._el_last_move_raw = cur_raw
-        self._el_last_move_ts = now
-        self._el_stall_start_ts = None
-
-        if self.debug:
-            self._log(f"[EL] enter {self._el_state} start_speed={self._el_cmd_speed}")
-
-    def _el_tick(self, el_err_deg: float, cur_el_phys: float, cur_raw: float) -> bool:
-        # deadband
-        if abs(el_err_deg) <= config.DEADBAND_DEG:
-            self._motor_el_set(0, 0)
-            self._el_reset()
-            return True
-
-        desired_dir = +1 if el_err_deg > 0 else -1
-
-        # direction-change settle
-        if desired_dir != 0 and self._el_last_dir != 0 and desired_dir != self._el_last_dir:
-            if self.debug:
-                self._log(f"[EL] dir change {self._el_last_dir} -> {desired_dir}: STOP+SETTLE {self._el_dir_change_settle_s:.2f}s")
-            self._motor_el_set(0, 0)
-            movement.stop_motor(self.motor_el)
-            self._el_reset()
-            time.sleep(self._el_dir_change_settle_s)
-
-        # Start breakaway if idle or direction changed / state mismatched
-        if self._el_state == "IDLE":
-            self._el_enter_breakaway(desired_dir, cur_raw)
-
-        if (desired_dir > 0 and self._el_state == "DOWN_BREAKAWAY") or (desired_dir < 0 and self._el_state == "UP_BREAKAWAY"):
-            self._el_enter_breakaway(desired_dir, cur_raw)
-
-        now = time.time()
-
-        # Determine requested speed for approach/creep when RUN
-        def approach_speed() -> int:
-            aerr = abs(el_err_deg)
-            if aerr <= self._el_creep_window_deg:
-                return int(clamp(self._el_creep_speed, 0, 255))
-            if aerr <= self._el_approach_window_deg:
-                return int(clamp(self._el_approach_speed, 0, 255))
-            return -1  # not in approach/creep
-
-        # BREAKAWAY modes: step until movement is detected
-        if self._el_state in ("UP_BREAKAWAY", "DOWN_BREAKAWAY"):
-            # command current breakaway speed
-            self._motor_el_set(desired_dir, self._el_cmd_speed)
-
-            moved = self._el_moved_recently(cur_raw)
-            if moved:
-                # movement detected -> RUN
-                self._el_state = "RUN"
-                self._el_stall_start_ts = None
-                if self.debug:
-                    self._log(f"[EL] movement detected -> RUN (bk_speed={self._el_cmd_speed})")
-                return True
-
-            # no movement yet: stall timer
-            if self._el_stall_start_ts is None:
-                self._el_stall_start_ts = now
-
-            # step-up timing
-            interval = self._el_up_bk_interval_s if desired_dir > 0 else self._el_down_bk_interval_s
-            step = self._el_up_bk_step if desired_dir > 0 else self._el_down_bk_step
-            vmax = self._el_up_bk_max if desired_dir > 0 else self._el_down_bk_max
-
-            if now >= self._el_next_step_ts:
-                old = self._el_cmd_speed
-                self._el_cmd_speed = int(clamp(old + step, 0, vmax))
-                self._el_next_step_ts = now + interval
-                if self.debug:
-                    self._log(f"[EL] breakaway step {old}->{self._el_cmd_speed} (max={vmax})")
-
-            return True
-
-        # RUN mode: choose speed based on approach/creep, but if we stall, re-enter breakaway
-        if self._el_state == "RUN":
-            sp = approach_speed()
-
-            if sp < 0:
-                # not in approach window: travel speed
-                if desired_dir > 0:
-                    sp = int(clamp(self._el_up_schedule_speed(cur_el_phys), 0, 255))
-                else:
-                    sp = int(clamp(self._el_down_travel_speed, 0, 255))
-
-            self._motor_el_set(desired_dir, sp)
-
-            # update movement check; if we see movement, clear stall timer
-            if self._el_moved_recently(cur_raw):
-                return True
-
-            # no movement: start/advance stall timer, then re-kick into breakaway
-            if self._el_stall_start_ts is None:
-                self._el_stall_start_ts = now
-                return True
-
-            if self._el_stalled():
-                # re-enter breakaway, but seed start speed from the speed we were using
-                if desired_dir > 0:
-                    self._el_up_bk_start = int(min(255, max(self._el_up_bk_start, sp)))
-                else:
-                    self._el_down_bk_start = int(min(255, max(self._el_down_bk_start, sp)))
-
-                if self.debug:
-                    self._log(f"[EL] stall in RUN at sp={sp} -> re-breakaway (dir={desired_dir})")
-
-                self._el_enter_breakaway(desired_dir, cur_raw)
-                return True
-
-            return True
+        with self._lock:
+            st = self._sense
+            st["ticks"] += 1
+            st["last_az_s"] = az_s
+            st["last_el_s"] = el_s
+            st["last_wall_s"] = wall_s
+            st["serial_s"] += az_s + el_s
+            st["wall_s"] += wall_s
 
-        return False
+        return az_unwrapped, el_unwrapped % 360.0
 
     def _update_current_position(self):
-        # AZ
-        az_unwrapped = self.az_tracker.read()
-        az_phys = position.az_unwrapped_to_physical(az_unwrapped, self.cal["az_offset_deg"])
+        az_unwrapped, el_raw = self._read_encoders()
 
-        # EL
-        el_raw = self.enc_el.read_degrees_filtered()
+        az_phys = position.az_unwrapped_to_physical(az_unwrapped, self.cal["az_offset_deg"])
         el_phys = position.el_raw_to_physical(el_raw, self.cal["el_offset_deg"])
 
+        az_phys %= 360.0
+        az_vel = self.az_tracker.velocity()
+        el_vel = self.el_tracker.velocity()
         with self._lock:
-            self._cur_az_phys = az_phys % 360.0
+            self._cur_az_phys = az_phys
             self._cur_el_phys = el_phys
             self._cur_el_raw = float(el_raw)
+            self._cur_az_vel = az_vel
+            self._cur_el_vel = el_vel
 
-    def _loop(self):
-        period = 1.0 / float(config.CONTROL_HZ)
+        self.feed.publish(self.clock.monotonic(), self.clock.time(), az_phys, el_phys, az_vel, el_vel)
 
-        while self._running:
-            t0 = time.time()
-            try:
-                self._update_current_position()
-
-                with self._lock:
-                    target_az = self._target_az
-                    target_el = self._target_el
-                    stop_req = self._stop_requested
-                    arrived_reported = self._arrived_reported
-
-                if stop_req or (target_az is None and target_el is None):
-                    self._el_reset()
-                    movement.stop_motor(self.motor_az)
-                    movement.stop_motor(self.motor_el)
-                else:
-                    cur_az_unwrapped = self.az_tracker.unwrapped
-                    cur_az_phys, cur_el_phys = self.get_position()
-                    cur_el_raw = float(self._cur_el_raw)
-
-                    tgt_el = clamp(target_el, config.EL_MIN_DEG, config.EL_MAX_DEG)
-                    el_err = tgt_el - cur_el_phys
-
-                    tgt_unwrapped = position.nearest_unwrapped_target(
-                        current_unwrapped=cur_az_unwrapped,
-                        target_az_phys_deg=target_az,
-                        az_offset_deg=self.cal["az_offset_deg"],
-                    )
-                    az_err = tgt_unwrapped - cur_az_unwrapped
-
-                    az_done = abs(az_err) <= config.DEADBAND_DEG
-                    el_done = abs(el_err) <= config.DEADBAND_DEG
-
-                    if az_done and el_done:
-                        self._el_reset()
-                        movement.stop_motor(self.motor_az)
-                        movement.stop_motor(self.motor_el)
-
-                        if not arrived_reported:
-                            with self._lock:
-                                if (self._target_az is not None) and (self._target_el is not None) and (not self._arrived_reported):
-                                    az_print = self._cur_az_phys
-                                    el_print = self._cur_el_phys
-                                    tgt = self._last_arrival_target
-                                    self._arrived_reported = True
-
-                                    if tgt is not None:
-                                        print(
-                                            f"[ARRIVED] AZ={az_print:7.2f}°  EL={el_print:6.2f}°   (target AZ={tgt[0]:.2f} EL={tgt[1]:.2f})",
-                                            flush=True
-                                        )
-                                    else:
-                                        print(f"[ARRIVED] AZ={az_print:7.2f}°  EL={el_print:6.2f}°", flush=True)
-                    else:
-                        if arrived_reported:
-                            with self._lock:
-                                self._arrived_reported = False
-
-                        # EL safety clamp
-                        if (cur_el_phys <= config.EL_MIN_DEG + config.DEADBAND_DEG) and (el_err < 0):
-                            self._el_reset()
-                            movement.stop_motor(self.motor_el)
-                            self._el_last_dir = 0
-                        elif (cur_el_phys >= config.EL_MAX_DEG - config.DEADBAND_DEG) and (el_err > 0):
-                            self._el_reset()
-                            movement.stop_motor(self.motor_el)
-                            self._el_last_dir = 0
-                        else:
-                            handled = self._el_tick(el_err, cur_el_phys, cur_el_raw)
-                            if not handled:
-                                # fallback to original behavior
-                                self._el_reset()
-                                movement.drive_toward_error(self.motor_el, config.M2_FORWARD_SIGN, el_err)
-
-                            # record last dir for settle logic
-                            if el_err > config.DEADBAND_DEG:
-                                self._el_last_dir = +1
-                            elif el_err < -config.DEADBAND_DEG:
-                                self._el_last_dir = -1
-                            else:
-                                self._el_last_dir = 0
+    def _actuate(self):
+        with self._lock:
+            target_az = self._target_az
+            target_el = self._target_el
+            stop_req = self._stop_requested
+            arrived_reported = self._arrived_reported
+            now = self.clock.monotonic()
+            prog = self.program
+            az_shift = None
+            if prog is not None:
+                wall = self.clock.time()
+                pred = prog.at(wall + self._track_lead_s)
+                az_shift = self._program_az_shift
+                if wall > prog.end:
+                    # Finished: hold the last point as a plain target
+                    self.program = None
+                    self._target_az, self._target_el = pred[0] % 360.0, clamp(pred[1], config.EL_MIN_DEG, config.EL_MAX_DEG)
+                    target_az, target_el = self._target_az, self._target_el
+                    pred = None
+                    az_shift = None
+            else:
+                pred = self.target_rate.predict(now) if self.target_rate is not None else None
 
-                        # AZ unchanged
-                        movement.drive_toward_error(self.motor_az, config.M1_FORWARD_SIGN, az_err)
+        # Moving target: follow the extrapolated (or programmed) position at its rate
+        az_rate = el_rate = 0.0
+        if pred is not None and not stop_req and target_az is not None:
+            target_az, target_el, az_rate, el_rate = pred
 
+        if stop_req or (target_az is None and target_el is None):
+            self.el_axis.stop()
+            self.az_axis.stop()
+        else:
+            cur_az_unwrapped = self.az_tracker.unwrapped
+            cur_az_phys, cur_el_phys = self.get_position()
+
+            tgt_el = clamp(target_el, config.EL_MIN_DEG, config.EL_MAX_DEG)
+            el_err = tgt_el - cur_el_phys
+            if tgt_el != target_el:
+                el_rate = 0.0
+
+            tgt_unwrapped = self._az_goal_unwrapped(cur_az_unwrapped, target_az, az_rate, az_shift)
+            az_err = tgt_unwrapped - cur_az_unwrapped
+
+            az_done = abs(az_err) <= config.DEADBAND_DEG
+            el_done = abs(el_err) <= config.DEADBAND_DEG
+
+            az_vel, el_vel = self.get_velocity()
+
+            if az_done and el_done:
+                # Inside the deadband the axes release, or finish a predictive
+                # stop (or keep tracking a moving target)
+                az_idle = self.az_axis.update(az_err, az_vel, now, cur_az_unwrapped, az_rate)
+                el_idle = self.el_axis.update(el_err, el_vel, now, cur_el_phys, el_rate)
+
+                settled = az_idle and el_idle and all(
+                    v is None or abs(v) <= self._arrive_max_vel_dps for v in (az_vel, el_vel))
+
+                if settled and not arrived_reported:
+                    with self._lock:
+                        if (self._target_az is not None) and (self._target_el is not None) and (not self._arrived_reported):
+                            az_print = self._cur_az_phys
+                            el_print = self._cur_el_phys
+                            tgt = self._last_arrival_target
+                            self._arrived_reported = True
+                            self.events["arrived"] += 1
+                            t0 = self._move_started_ts
+                            self.last_arrival = {
+                                "target": tgt,
+                                "move_s": None if t0 is None else self.clock.monotonic() - t0,
+                                "az": self.az_axis.move_stats(),
+                                "el": self.el_axis.move_stats(),
+                            }
+
+                            if tgt is not None:
+                                print(
+                                    f"[ARRIVED] AZ={az_print:7.2f}°  EL={el_print:6.2f}°   (target AZ={tgt[0]:.2f} EL={tgt[1]:.2f})",
+                                    flush=True
+                                )
+                            else:
+                                print(f"[ARRIVED] AZ={az_print:7.2f}°  EL={el_print:6.2f}°", flush=True)
+                    self._save_breakaway()
+            else:
+                if arrived_reported:
+                    with self._lock:
+                        self._arrived_reported = False
+
+                # EL safety clamp
+                if (cur_el_phys <= config.EL_MIN_DEG + config.DEADBAND_DEG) and (el_err < 0):
+                    self.el_axis.stop()
+                elif (cur_el_phys >= config.EL_MAX_DEG - config.DEADBAND_DEG) and (el_err > 0):
+                    self.el_axis.stop()
+                else:
+                    self.el_axis.update(el_err, el_vel, now, cur_el_phys, el_rate)
+
+                self.az_axis.update(az_err, az_vel, now, cur_az_unwrapped, az_rate)
+
+    def _az_goal_unwrapped(self, cur_unwrapped, target_az, az_rate, az_shift=None):
+        """
+        Unwrapped AZ to drive to. Without cable limits: shortest path. With
+        them: a program track keeps its planned wrap (az_shift), a moving
+        target stays on its wrap until it reaches a limit, and anything else
+        takes the nearest wrap inside the limits.
+        """
+        off = self.cal["az_offset_deg"]
+        if self._az_wrap is None:
+            return position.nearest_unwrapped_target(
+                current_unwrapped=cur_unwrapped,
+                target_az_phys_deg=target_az,
+                az_offset_deg=off,
+            )
+        lo, hi = self._az_wrap
+        moving = az_rate != 0.0
+        if az_shift is not None:
+            goal = min(max(off + target_az + az_shift, off + lo), off + hi)
+        elif moving and self._az_goal_moving and self._az_goal is not None:
+            goal = position.limited_unwrapped_target(self._az_goal, target_az, off, lo, hi)
+        else:
+            goal = position.limited_unwrapped_target(cur_unwrapped, target_az, off, lo, hi)
+        self._az_goal = goal
+        self._az_goal_moving = moving
+        return goal
+
+    def _tick(self, actuate=True):
+        """
+        One control step: sense, then (unless actuate=False) decide and
+        actuate. Never raises; any error releases both motors and is
+        counted in the loop stats.
+        """
+        t_start = time.perf_counter()
+        try:
+            self._update_current_position()
+            if actuate:
+                batch = self.motor_outputs.batch() if self.motor_outputs is not None else contextlib.nullcontext()
+                with batch:
+                    self._actuate()
+        except Exception as e:
+            self.stats.record_exception(e)
+            if self.debug:
+                self._log(f"[LOOP] {type(e).__name__}: {e}")
+            try:
+                self.el_axis.stop()
+                self.az_axis.stop()
             except Exception:
-                try:
-                    self._el_reset()
-                    movement.stop_motor(self.motor_az)
-                    movement.stop_motor(self.motor_el)
-                except Exception:
-                    pass
-
-            dt = time.time() - t0
-            sleep_for = period - dt
-            if sleep_for > 0:
-                time.sleep(sleep_for)
+                pass
 
+        self.stats.ticks += 1
+        self.stats.tick.record(time.perf_counter() - t_start)
+
+    def _loop(self):
+        """
+        Fixed-rate scheduler on the monotonic clock with absolute deadlines
+        (a slow tick doesn't shift every later tick). What happens after an
+        overrun is CONTROL_OVERRUN_POLICY:
+          "skip"     - drop the missed slots, resume on the next future deadline
+          "catch_up" - run missed ticks back to back (at most CONTROL_MAX_CATCHUP)
+          "degrade"  - also skip, and after CONTROL_DEGRADE_AFTER overruns in a row
+                       halve the rate (not below CONTROL_MIN_HZ); recover after a
+                       run of on-time ticks
+        With CONTROL_ACTUATE_EVERY = N > 1 the loop senses every tick but only
+        decides/drives the motors every Nth tick.
+        """
+        base_hz = float(config.CONTROL_HZ)
+        min_hz = float(getattr(config, "CONTROL_MIN_HZ", 5.0))
+        policy = str(getattr(config, "CONTROL_OVERRUN_POLICY", "skip"))
+        max_catchup = int(getattr(config, "CONTROL_MAX_CATCHUP", 3))
+        degrade_after = int(getattr(config, "CONTROL_DEGRADE_AFTER", 5))
+        recover_after = int(getattr(config, "CONTROL_RECOVER_AFTER", 100))
+        actuate_every = max(1, int(getattr(config, "CONTROL_ACTUATE_EVERY", 1)))
+
+        hz = base_hz
+        period = 1.0 / hz
+        deadline = self.clock.monotonic()
+        n = 0
+        late_run = 0
+        ok_run = 0
+
+        while self._running:
+            now = self.clock.monotonic()
+            self.stats.lateness.record(now - deadline)
+
+            self._tick(actuate=(n % actuate_every) == 0)
+            n += 1
+
+            deadline += period
+            now = self.clock.monotonic()
+
+            if now > deadline:
+                self.stats.overruns += 1
+                late_run += 1
+                ok_run = 0
+                missed = int((now - deadline) / period)
+
+                if policy == "catch_up" and missed < max_catchup:
+                    continue  # next tick immediately, same deadline grid
+
+                # skip (and degrade): realign to the next future slot
+                deadline += (missed + 1) * period
+                self.stats.skipped += missed + 1
+
+                if policy == "degrade" and late_run >= degrade_after and hz > min_hz:
+                    hz = max(min_hz, hz / 2.0)
+                    period = 1.0 / hz
+                    late_run = 0
+                    self.stats.rate_hz = hz
+                    self._log(f"[LOOP] overrunning: degrade to {hz:.1f} Hz")
+            else:
+                late_run = 0
+                ok_run += 1
+                if policy == "degrade" and hz < base_hz and ok_run >= recover_after:
+                    hz = min(base_hz, hz * 2.0)
+                    period = 1.0 / hz
+                    ok_run = 0
+                    self.stats.rate_hz = hz
+                    self._log(f"[LOOP] recovered to {hz:.1f} Hz")
+
+            sleep_for = deadline - self.clock.monotonic()
+            if sleep_for > 0:
+                self.clock.sleep(sleep_for)
 
 if __name__ == "__main__":
     import argparse
@@ -509,9 +719,15 @@ if __name__ == "__main__":
     p.add_argument("--az_home_here", action="store_true")
     p.add_argument("--el_zero_here", action="store_true")
     p.add_argument("--debug", action="store_true")
+    p.add_argument("--sim", action="store_true", help="simulated rotator in real time (sim.py)")
     args = p.parse_args()
 
-    rc = RotatorController(debug=args.debug)
+    backend = None
+    if args.sim:
+        import sim
+        backend = sim.SimBackend(realtime=True)
+
+    rc = RotatorController(debug=args.debug, backend=backend)
     rc.start()
 
     if args.az_home_here:
@@ -0,0 +1,122 @@
+# feed.py
+# Position fan-out: the control thread publishes one immutable snapshot per
+# tick, and each subscriber gets it at its own rate and/or when the antenna
+# has moved more than its threshold. Observers (loggers, dashboards, a
+# second tracking tool) no longer poll get_position() and take the
+# controller lock.
+
+import threading
+from collections import namedtuple
+
+import config
+import position
+
+
+# t_unix for clients, t_mono for rate limiting; vel is None without the estimator
+PositionSnapshot = namedtuple("PositionSnapshot", "seq t_mono t_unix az el az_vel el_vel")
+
+
+class Subscription:
+    """
+    One subscriber. callback(snapshot) runs on the control thread, so it
+    must only hand the snapshot off (store it, signal another thread).
+    rate_hz <= 0 disables periodic updates, threshold_deg <= 0 disables
+    on-change updates; the first snapshot is always delivered.
+    """
+    __slots__ = ("callback", "period_s", "threshold_deg", "next_t",
+                 "last_az", "last_el", "sent", "errors")
+
+    def __init__(self, callback, rate_hz=0.0, threshold_deg=0.0):
+        self.callback = callback
+        self.period_s = (1.0 / float(rate_hz)) if rate_hz and rate_hz > 0 else None
+        self.threshold_deg = float(threshold_deg) if threshold_deg and threshold_deg > 0 else None
+        self.next_t = None
+        self.last_az = None
+        self.last_el = None
+        self.sent = 0
+        self.errors = 0
+
+    def due(self, snap):
+        if self.last_az is None:
+            return True
+        if self.period_s is not None and snap.t_mono >= self.next_t:
+            return True
+        if self.threshold_deg is not None:
+            thr = self.threshold_deg
+            return (abs(position.wrap_delta_deg(snap.az, self.last_az)) >= thr
+                    or abs(snap.el - self.last_el) >= thr)
+        return False
+
+    def deliver(self, snap):
+        if self.period_s is not None:
+            # keep the grid, but never owe a burst after a stall
+            nt = (self.next_t + self.period_s) if self.next_t is not None else snap.t_mono + self.period_s
+            self.next_t = nt if nt > snap.t_mono else snap.t_mono + self.period_s
+        self.last_az = snap.az
+        self.last_el = snap.el
+        self.sent += 1
+        self.callback(snap)
+
+
+class PositionFeed:
+    """
+    Subscriber list kept as an immutable tuple (copy on subscribe and
+    unsubscribe), so publish() iterates it without a lock.
+    """
+    def __init__(self, max_subscribers=64, max_rate_hz=50.0, log=None):
+        self.max_subscribers = int(max_subscribers)
+        self.max_rate_hz = float(max_rate_hz)
+        self._log = log or (lambda msg: None)
+        self._subs = ()
+        self._lock = threading.Lock()
+        self.latest = None
+        self._seq = 0
+
+    @classmethod
+    def from_config(cls, log=None):
+        return cls(
+            max_subscribers=getattr(config, "STREAM_MAX_SUBSCRIBERS", 64),
+            max_rate_hz=getattr(config, "STREAM_MAX_HZ", 50.0),
+            log=log,
+        )
+
+    def __len__(self):
+        return len(self._subs)
+
+    def subscribe(self, callback, rate_hz=0.0, threshold_deg=0.0):
+        """
+        Returns the Subscription; ValueError when full or when it would
+        never deliver (no rate and no threshold).
+        """
+        rate_hz = min(float(rate_hz or 0.0), self.max_rate_hz)
+        sub = Subscription(callback, rate_hz, threshold_deg)
+        if sub.period_s is None and sub.threshold_deg is None:
+            raise ValueError("subscription needs a rate or a threshold")
+        with self._lock:
+            if len(self._subs) >= self.max_subscribers:
+                raise ValueError(f"more than {self.max_subscribers} subscribers")
+            self._subs = self._subs + (sub,)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs = tuple(s for s in self._subs if s is not sub)
+
+    def publish(self, t_mono, t_unix, az, el, az_vel=None, el_vel=None):
+        """
+        Control thread: build this tick's snapshot and hand it to every
+        subscriber that is due. A subscriber whose callback raises is dropped.
+        """
+        self._seq += 1
+        snap = PositionSnapshot(self._seq, t_mono, t_unix, az, el, az_vel, el_vel)
+        self.latest = snap
+        for sub in self._subs:
+            if not sub.due(snap):
+                continue
+            try:
+                sub.deliver(snap)
+            except Exception as e:
+                sub.errors += 1
+                self._log(f"[FEED] dropping subscriber: {type(e).__name__}: {e}")
+                self.unsubscribe(sub)
+        return snap
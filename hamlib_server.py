@@ -1,9 +1,11 @@
 # hamlib_server.py
+import selectors
 import socket
-import threading
 import time
+from collections import deque
 
 import config
+import timing
 from controller import RotatorController
 
 HOST = "0.0.0.0"
@@ -11,13 +13,23 @@ PORT = 4533  # rotctld default
 
 PRINT_RAW_BYTES = False  # set True if you need to debug traffic
 
+RECV_BYTES = 4096
+CLIENT_MAX_OUTBUF = 64 * 1024  # drop a client that lets this much unsent output pile up
+CLIENT_TCP_NODELAY = True      # one write per read: send it now, not after an ACK
+PARTIAL_IDLE_S = 0.10          # unterminated trailing argument taken as complete after this idle time
+
+# Sessions: one controlling client, everyone else read-only.
+SESSION_AUTO_CLAIM = True      # first client to send a motion command takes control
+TARGET_MIN_INTERVAL_S = None   # min spacing of set_target() calls; None -> one per actuated control tick
+RPRT_REJECTED = 9              # Hamlib RIG_ERJCTED: motion command from a non-controlling client
+
 
 def format_pos_two_lines(az, el) -> bytes:
     return f"{az:.6f}\n{el:.6f}\n".encode("ascii")
 
 
-def reply_rprt(conn, code: int):
-    conn.send(f"RPRT {code}\n".encode("ascii"))
+def reply_rprt(out, code: int):
+    out += f"RPRT {code}\n".encode("ascii")
 
 
 def dump_state_text() -> bytes:
@@ -31,104 +43,239 @@ def dump_state_text() -> bytes:
     return ("\n".join(lines) + "\n").encode("ascii")
 
 
-def normalize_cmd(s: str) -> str:
-    s = s.strip()
-    while s and s[0] in "+;|,":
-        s = s[1:].lstrip()
-    return s
-
-
-def looks_like_complete_command_bytes(buf: bytes) -> bool:
-    b = buf.strip()
-    if not b:
+# ----------------------------
+# Command table / streaming tokenizer
+# ----------------------------
+# name -> (command, arity). Arity None: variable, ends at the line terminator.
+COMMANDS = {}
+for _cmd, _arity, _names in (
+    ("get_pos", 0, ("p", r"\get_pos", "get_pos")),
+    ("set_pos", 2, ("P", r"\set_pos", "set_pos")),
+    ("stop", 0, ("S", "s", r"\stop", "stop")),
+    ("get_info", 0, ("_", r"\get_info", "get_info")),
+    ("dump_state", 0, (r"\dump_state", "dump_state")),
+    ("quit", 0, ("q",)),
+    # Extended (non-rotctld)
+    ("get_stats", 0, (r"\get_stats",)),
+    ("reset_stats", 0, (r"\reset_stats",)),
+    ("set_track", None, (r"\set_track",)),
+    ("get_track", 0, (r"\get_track",)),
+    ("clear_track", 0, (r"\clear_track",)),
+    ("stream_pos", None, (r"\stream_pos",)),
+    ("get_session", 0, (r"\get_session",)),
+    ("take_control", 0, (r"\take_control",)),
+    ("release_control", 0, (r"\release_control",)),
+):
+    for _name in _names:
+        COMMANDS[_name.encode("ascii")] = (_cmd, _arity)
+
+# Names no longer name starts with: complete as soon as their last byte arrives
+# ("p", "P", "\get_pos", ...), so "pP 10 20" needs no separators.
+_UNIQUE_NAMES = frozenset(
+    n for n in COMMANDS if not any(m != n and m.startswith(n) for m in COMMANDS)
+)
+
+MAX_TOKEN_BYTES = 64
+WHOLE_SEND_READS = 3      # reads in a row ending on a complete line -> client sends whole commands
+MAX_LINE_ARGS = 3 * int(getattr(config, "PROGRAM_TRACK_MAX_POINTS", 20000))   # longest \set_track
+_TERMINATORS = b"\r\n"
+_SPACES = b" \t"
+_PREFIXES = b"+;|,"       # rotctld extended-response prefixes, ignored
+
+
+class RotctlParser:
+    """
+    Incremental rotctld tokenizer. feed() consumes each byte once and returns
+    (command, args) for every command it completes; command is None for an
+    unknown name or a line that ended before all arguments arrived (reply
+    RPRT 1).
+
+    A command is complete at a line terminator, or as soon as its last
+    argument is followed by whitespace. Digits can always continue, so a
+    trailing argument with nothing after it is not complete yet. It is
+    taken as complete at the end of a read (end_of_read=True) for a client
+    that has never sent a line terminator, or whose last WHOLE_SEND_READS
+    reads each ended on a complete line: such clients write each command
+    with one send(). Anyone else's trailing argument waits for its newline,
+    or for flush() once the client has gone quiet (pending() is True).
+    """
+    def __init__(self):
+        self.tok = bytearray()
+        self.cmd = None         # (command, arity) once the name is known
+        self.args = []
+        self.skip_line = False
+        self.seen_terminator = False
+        self.whole_reads = 0    # consecutive reads that ended on a complete line
+
+    def _reset(self):
+        self.cmd = None
+        self.args = []
+
+    def _end_token(self, out):
+        tok = self.tok
+        if not tok:
+            return
+        self.tok = bytearray()
+        if self.cmd is None:
+            cmd = COMMANDS.get(bytes(tok))
+            if cmd is None:
+                out.append((None, ()))
+                self.skip_line = True
+                return
+            self.cmd = cmd
+        else:
+            if len(self.args) >= MAX_LINE_ARGS:
+                self._reset()
+                out.append((None, ()))
+                self.skip_line = True
+                return
+            self.args.append(tok.decode("ascii", errors="replace"))
+        arity = self.cmd[1]
+        if arity is not None and len(self.args) >= arity:
+            out.append((self.cmd[0], self.args))
+            self._reset()
+
+    def _end_line(self, out):
+        self._end_token(out)
+        if self.cmd is not None:
+            if self.cmd[1] is None:
+                out.append((self.cmd[0], self.args))
+            else:
+                out.append((None, ()))
+            self._reset()
+        self.skip_line = False
+
+    def feed(self, data, end_of_read=True):
+        out = []
+        for b in data:
+            if b in _TERMINATORS:
+                self.seen_terminator = True
+                self._end_line(out)
+            elif self.skip_line:
+                continue
+            elif b in _SPACES:
+                self._end_token(out)
+            elif not self.tok and self.cmd is None and b in _PREFIXES:
+                continue
+            else:
+                self.tok.append(b)
+                if len(self.tok) > MAX_TOKEN_BYTES:
+                    self.tok = bytearray()
+                    self._reset()
+                    out.append((None, ()))
+                    self.skip_line = True
+                elif self.cmd is None and bytes(self.tok) in _UNIQUE_NAMES:
+                    self._end_token(out)
+        if end_of_read and data:
+            if data[-1] in _TERMINATORS:
+                self.whole_reads += 1
+            elif self.pending():
+                if not self.seen_terminator or self.whole_reads >= WHOLE_SEND_READS:
+                    self._end_token(out)
+                else:
+                    self.whole_reads = 0
+        return out
+
+    def pending(self):
+        """
+        True if the buffered token would complete a command on its own:
+        a bare zero-argument name ("s") or the last argument ("P 20 5").
+        """
+        if not self.tok or self.skip_line:
+            return False
+        if self.cmd is None:
+            cmd = COMMANDS.get(bytes(self.tok))
+            return cmd is not None and cmd[1] == 0
+        return self.cmd[1] is not None and len(self.args) + 1 == self.cmd[1]
+
+    def flush(self):
+        """
+        Complete a pending() command without waiting for its terminator.
+        """
+        out = []
+        if self.pending():
+            self._end_token(out)
+        return out
+
+
+def handle_command(cmd, args, out, rc: RotatorController):
+    # Appends the reply to out (bytearray). Return False to close connection
+    if cmd == "quit":
         return False
 
-    if b in (b"p", b"S", b"s", b"_", b"q"):
+    if cmd == "get_info":
+        out += b"Info: PythonRotator AZ/EL\n"
+        reply_rprt(out, 0)
         return True
 
-    try:
-        s = b.decode("ascii", errors="ignore").strip()
-    except Exception:
-        return False
-
-    s = normalize_cmd(s)
-    parts = s.split()
-    if not parts:
-        return False
-
-    if parts[0] in ("P", r"\set_pos", "set_pos"):
-        return len(parts) >= 3
-
-    if parts[0] in (
-        "S", "s", r"\stop", "stop",
-        "_", r"\get_info", "get_info",
-        r"\dump_state", "dump_state",
-        "p", r"\get_pos", "get_pos",
-        "q",
-    ):
+    if cmd == "dump_state":
+        out += dump_state_text()
+        reply_rprt(out, 0)
         return True
 
-    return False
-
-
-def handle_command(cmd: str, conn, rc: RotatorController):
-    # Return False to close connection
-    if cmd == "q":
-        return False
-
-    if cmd in ("_", r"\get_info", "get_info"):
-        conn.send(b"Info: PythonRotator AZ/EL\n")
-        reply_rprt(conn, 0)
+    # Extended (non-rotctld) commands: control loop timing
+    if cmd == "get_stats":
+        lines = timing.format_stats_lines(rc.get_loop_stats())
+        out += ("\n".join(lines) + "\n").encode("ascii")
+        reply_rprt(out, 0)
         return True
 
-    if cmd in (r"\dump_state", "dump_state"):
-        conn.send(dump_state_text())
-        reply_rprt(conn, 0)
+    if cmd == "reset_stats":
+        rc.reset_loop_stats()
+        reply_rprt(out, 0)
         return True
 
-    if cmd in ("S", "s", r"\stop", "stop"):
-        rc.stop()
-        reply_rprt(conn, 0)
+    # Extended: program track, \set_track t1 az1 el1 t2 az2 el2 ... (unix seconds).
+    # Non-finite values or more than PROGRAM_TRACK_MAX_POINTS points -> RPRT 1.
+    if cmd == "set_track":
+        if len(args) < 3 or len(args) % 3:
+            reply_rprt(out, 1)
+            return True
+        try:
+            vals = [float(x) for x in args]
+            rc.load_program_track(zip(vals[0::3], vals[1::3], vals[2::3]))
+            reply_rprt(out, 0)
+        except ValueError:
+            reply_rprt(out, 1)
         return True
 
-    if cmd in ("p", r"\get_pos", "get_pos"):
-        az, el = rc.get_position()
-        conn.send(format_pos_two_lines(az, el))
+    if cmd == "clear_track":
+        rc.clear_program_track()
+        reply_rprt(out, 0)
         return True
 
-    if cmd.startswith("P ") or cmd.startswith(r"\set_pos ") or cmd.startswith("set_pos "):
-        parts = cmd.split()
-        if len(parts) >= 3:
-            try:
-                az_t = float(parts[1])
-                el_t = float(parts[2])
-                rc.set_target(az_t, el_t)
-                reply_rprt(conn, 0)
-            except Exception:
-                reply_rprt(conn, 1)
+    if cmd == "get_track":
+        tr = rc.get_program_track()
+        if tr is None:
+            out += b"Points: 0\n"
         else:
-            reply_rprt(conn, 1)
+            out += (f"Points: {tr['points']}\nStart: {tr['start']:.3f}\n"
+                    f"End: {tr['end']:.3f}\nRemaining: {tr['remaining_s']:.1f}\n").encode("ascii")
+        reply_rprt(out, 0)
         return True
 
-    reply_rprt(conn, 1)
-    return True
-
+    if cmd == "stop":
+        rc.stop()
+        reply_rprt(out, 0)
+        return True
 
-def process_one_line(raw_line: bytes, addr, conn, rc):
-    raw_line = raw_line.strip()
-    if not raw_line:
+    if cmd == "get_pos":
+        az, el = rc.get_position()
+        out += format_pos_two_lines(az, el)
         return True
 
-    try:
-        line = raw_line.decode("ascii", errors="ignore")
-    except Exception:
-        reply_rprt(conn, 1)
+    if cmd == "set_pos":
+        try:
+            az_t = float(args[0])
+            el_t = float(args[1])
+            rc.set_target(az_t, el_t)
+            reply_rprt(out, 0)
+        except Exception:
+            reply_rprt(out, 1)
         return True
 
-    cmd = normalize_cmd(line)
-    # Uncomment if you want to see parsed commands:
-    # print(f"[CMD] {addr}: {cmd}", flush=True)
-    return handle_command(cmd, conn, rc)
+    reply_rprt(out, 1)
+    return True
 
 
 def send_home_both(rc: RotatorController, reason: str, addr=None):
@@ -142,81 +289,482 @@ def send_home_both(rc: RotatorController, reason: str, addr=None):
     rc.set_target(0.0, 0.0)
 
 
-def handle_client(conn, addr, rc: RotatorController):
-    print(f"Client connected: {addr}", flush=True)
+def format_stream_line(snap) -> bytes:
+    return f"Pos: {snap.t_unix:.3f} {snap.az:.6f} {snap.el:.6f}\n".encode("ascii")
 
-    # If we see an explicit quit command, we’ll set this and home on the way out.
-    quit_requested = False
 
-    try:
-        conn.settimeout(0.2)
-        buf = b""
-        last_rx = time.time()
+class Wakeup:
+    """
+    Self-pipe that lets the control thread wake the select() loop. Many
+    signals between two drains cost one byte. drain() empties the pipe
+    before clearing `pending`: a signal() that returns early in between has
+    already published its data, and the caller handles that after drain().
+    """
+    def __init__(self):
+        self.r, self.w = socket.socketpair()
+        self.r.setblocking(False)
+        self.w.setblocking(False)
+        self.pending = False
 
-        while True:
-            try:
-                data = conn.recv(1024)
-                if not data:
-                    # client closed socket
-                    break
+    def signal(self):
+        if self.pending:
+            return
+        self.pending = True
+        try:
+            self.w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
 
-                last_rx = time.time()
-                if PRINT_RAW_BYTES:
-                    print(f"[RAW] {addr}: {data!r}", flush=True)
+    def drain(self):
+        try:
+            while self.r.recv(512):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        self.pending = False
+
+    def close(self):
+        self.r.close()
+        self.w.close()
+
+
+class ClientConn:
+    """
+    One connected client: its socket, streaming command parser, output the
+    socket has not taken yet and, while \\stream_pos is on, its position
+    subscription and the newest snapshot not yet sent (latest wins).
+    """
+    __slots__ = ("sock", "addr", "parser", "quit_requested", "wake", "sub", "stream_snap",
+                 "outbuf", "events", "partial_due")
+
+    def __init__(self, sock, addr, wake=None):
+        self.sock = sock
+        self.addr = addr
+        self.parser = RotctlParser()
+        self.quit_requested = False
+        self.wake = wake
+        self.sub = None
+        # Filled by the control thread, emptied here; deque append/pop are
+        # atomic, so a snapshot can't be lost between reading and clearing it.
+        self.stream_snap = deque(maxlen=1)
+        self.outbuf = bytearray()
+        self.events = selectors.EVENT_READ
+        self.partial_due = None   # monotonic time to flush() a pending parser token
+
+    def queue(self, data):
+        """
+        Send data without blocking; whatever the socket doesn't take now
+        waits in outbuf for EVENT_WRITE. False if the client has fallen
+        CLIENT_MAX_OUTBUF behind and should be dropped. Raises OSError.
+        """
+        n = 0
+        if not self.outbuf:
+            try:
+                n = self.sock.send(data)
+            except (BlockingIOError, InterruptedError):
+                pass
+            if n == len(data):
+                return True
+        if len(self.outbuf) + len(data) - n > CLIENT_MAX_OUTBUF:
+            return False
+        self.outbuf += data[n:]
+        return True
 
-                buf += data
+    def write_ready(self):
+        """
+        Socket writable: send as much buffered output as it takes. Raises OSError.
+        """
+        try:
+            n = self.sock.send(self.outbuf)
+        except (BlockingIOError, InterruptedError):
+            return
+        del self.outbuf[:n]
+
+    def stop_stream(self, rc):
+        if self.sub is not None:
+            rc.unsubscribe_position(self.sub)
+            self.sub = None
+        self.stream_snap.clear()
+
+
+def start_stream(cc, args, out, rc):
+    """
+    \\stream_pos rate_hz [threshold_deg]: push "Pos: t az el" lines at
+    rate_hz and/or on moves of threshold_deg. \\stream_pos 0 stops.
+    """
+    if cc.wake is None or len(args) not in (1, 2):
+        reply_rprt(out, 1)
+        return
+    try:
+        rate = float(args[0])
+        thr = float(args[1]) if len(args) > 1 else 0.0
+    except ValueError:
+        reply_rprt(out, 1)
+        return
+    cc.stop_stream(rc)
+    if rate <= 0 and thr <= 0:
+        reply_rprt(out, 0)
+        return
+
+    def on_snapshot(snap, cc=cc, wake=cc.wake):
+        # control thread: hand off only
+        cc.stream_snap.append(snap)
+        wake.signal()
 
-            except socket.timeout:
-                pass
+    try:
+        cc.sub = rc.subscribe_position(on_snapshot, rate, thr)
+        reply_rprt(out, 0)
+    except ValueError:
+        reply_rprt(out, 1)
+
+
+def flush_streams(clients):
+    """
+    Send each streaming client its newest snapshot. A client that still has
+    output queued keeps the snapshot for later (newer ones replace it).
+    Returns the clients whose socket failed or fell too far behind.
+    """
+    dead = []
+    for cc in clients:
+        if not cc.stream_snap or cc.outbuf:
+            continue
+        try:
+            snap = cc.stream_snap.pop()
+        except IndexError:
+            continue
+        try:
+            if not cc.queue(format_stream_line(snap)):
+                dead.append(cc)
+        except OSError:
+            dead.append(cc)
+    return dead
+
+
+# ----------------------------
+# Sessions
+# ----------------------------
+# Commands that move the rotator or change shared state.
+CONTROL_COMMANDS = frozenset(("set_pos", "stop", "set_track", "clear_track", "reset_stats"))
+
+
+class Session:
+    """
+    Arbitration between clients: at most one controller, the rest observe.
+    The controller's targets are coalesced latest-wins and handed to the
+    controller no faster than min_interval_s; a stop or track command
+    discards a pending target. stats counts applied, merged (superseded
+    before being applied), dropped (discarded by stop/track/disconnect)
+    and rejected (motion command from an observer) commands.
+    """
+    def __init__(self, rc, min_interval_s=None, auto_claim=True):
+        if min_interval_s is None:
+            min_interval_s = max(1, int(getattr(config, "CONTROL_ACTUATE_EVERY", 1))) / float(config.CONTROL_HZ)
+        self.rc = rc
+        self.min_interval_s = float(min_interval_s)
+        self.auto_claim = bool(auto_claim)
+        self.controller = None
+        self.pending = None         # (az, el) not yet applied
+        self.next_apply = 0.0
+        self.stats = {"applied": 0, "merged": 0, "dropped": 0, "rejected": 0}
+
+    def claim(self, cc):
+        if self.controller is None:
+            self.controller = cc
+            print(f"[SESSION] control -> {cc.addr}", flush=True)
+        return self.controller is cc
+
+    def release(self, cc):
+        """
+        True if cc was the controller.
+        """
+        if self.controller is not cc:
+            return False
+        self.discard_pending()
+        self.controller = None
+        print(f"[SESSION] control released by {cc.addr}", flush=True)
+        return True
 
-            # Newline terminated
-            while b"\n" in buf:
-                line, buf = buf.split(b"\n", 1)
-                keep = process_one_line(line, addr, conn, rc)
-                if not keep:
-                    quit_requested = True
-                    return
-
-            # CR terminated
-            while b"\r" in buf:
-                line, buf = buf.split(b"\r", 1)
-                keep = process_one_line(line, addr, conn, rc)
-                if not keep:
-                    quit_requested = True
-                    return
-
-            # Single-byte immediate commands
-            if buf.strip() in (b"p", b"_", b"q", b"S", b"s"):
-                keep = process_one_line(buf, addr, conn, rc)
-                buf = b""
-                if not keep:
-                    quit_requested = True
-                    return
-
-            # Idle flush for no-newline clients (like your gpredict behavior)
-            if buf.strip():
-                idle = time.time() - last_rx
-                if idle >= 0.10 and looks_like_complete_command_bytes(buf):
-                    keep = process_one_line(buf, addr, conn, rc)
-                    buf = b""
-                    if not keep:
-                        quit_requested = True
-                        return
+    def allow(self, cc):
+        if self.controller is cc:
+            return True
+        if self.auto_claim:
+            return self.claim(cc)
+        return False
 
-    finally:
+    def submit_target(self, az, el, now):
+        if self.pending is not None:
+            self.stats["merged"] += 1
+        self.pending = (az, el)
+        self.apply_due(now)
+
+    def discard_pending(self):
+        if self.pending is not None:
+            self.stats["dropped"] += 1
+            self.pending = None
+
+    def apply_due(self, now):
+        if self.pending is None or now < self.next_apply:
+            return
+        az, el = self.pending
+        self.pending = None
+        self.next_apply = now + self.min_interval_s
+        self.stats["applied"] += 1
+        self.rc.set_target(az, el)
+
+    def timeout(self, now):
+        """
+        select() timeout until the pending target is due, or None.
+        """
+        if self.pending is None:
+            return None
+        return max(0.0, self.next_apply - now)
+
+    def describe(self, cc, n_clients):
+        st = self.stats
+        lines = [
+            f"Role: {'controller' if self.controller is cc else 'observer'}",
+            f"Controller: {self.controller.addr if self.controller is not None else 'none'}",
+            f"Clients: {n_clients}",
+            f"Applied: {st['applied']}",
+            f"Merged: {st['merged']}",
+            f"Dropped: {st['dropped']}",
+            f"Rejected: {st['rejected']}",
+        ]
+        return ("\n".join(lines) + "\n").encode("ascii")
+
+
+def session_command(cmd, args, cc, out, session, n_clients):
+    """
+    Arbitration in front of handle_command(). Returns True when cmd was
+    fully handled here.
+    """
+    if cmd == "get_session":
+        out += session.describe(cc, n_clients)
+        reply_rprt(out, 0)
+        return True
+    if cmd == "take_control":
+        reply_rprt(out, 0 if session.claim(cc) else RPRT_REJECTED)
+        return True
+    if cmd == "release_control":
+        reply_rprt(out, 0 if session.release(cc) else RPRT_REJECTED)
+        return True
+    if cmd not in CONTROL_COMMANDS:
+        return False
+    if not session.allow(cc):
+        session.stats["rejected"] += 1
+        reply_rprt(out, RPRT_REJECTED)
+        return True
+    if cmd == "set_pos":
         try:
-            conn.close()
-        except Exception:
-            pass
+            az_t = float(args[0])
+            el_t = float(args[1])
+        except (ValueError, IndexError):
+            reply_rprt(out, 1)
+            return True
+        session.submit_target(az_t, el_t, time.monotonic())
+        reply_rprt(out, 0)
+        return True
+    # stop / track commands act now and supersede a pending target
+    session.discard_pending()
+    return False
 
-        # ALWAYS home on disconnect, per your request
-        send_home_both(rc, reason=("quit" if quit_requested else "disconnect"), addr=addr)
 
-        print(f"Client disconnected: {addr}", flush=True)
+def process_data(cc, data, rc, session=None, n_clients=1):
+    """
+    Dispatch every command completed by data and queue all their replies
+    as one write. Without a session every client controls directly.
+    Returns False to close; raises OSError if the socket failed.
+    """
+    cmds = cc.parser.feed(data)
+    cc.partial_due = (time.monotonic() + PARTIAL_IDLE_S) if cc.parser.pending() else None
+    return dispatch(cc, cmds, rc, session, n_clients)
+
+
+def flush_partial(cc, rc, session=None, n_clients=1):
+    """
+    The client went quiet with an unterminated command: run it as it is.
+    """
+    cc.partial_due = None
+    return dispatch(cc, cc.parser.flush(), rc, session, n_clients)
+
+
+def dispatch(cc, cmds, rc, session=None, n_clients=1):
+    """
+    Run parsed (command, args) pairs for cc; see process_data().
+    """
+    out = bytearray()
+    keep = True
+    for cmd, args in cmds:
+        # Uncomment if you want to see parsed commands:
+        # print(f"[CMD] {cc.addr}: {cmd} {args}", flush=True)
+        if cmd == "stream_pos":
+            start_stream(cc, args, out, rc)
+            continue
+        if session is not None and session_command(cmd, args, cc, out, session, n_clients):
+            continue
+        if not handle_command(cmd, args, out, rc):
+            cc.quit_requested = True
+            keep = False
+            break
+    if out and not cc.queue(out):
+        keep = False
+    return keep
+
+
+def watch(sel, cc):
+    """
+    Wait for EVENT_WRITE only while cc has output queued.
+    """
+    events = selectors.EVENT_READ | (selectors.EVENT_WRITE if cc.outbuf else 0)
+    if events != cc.events:
+        sel.modify(cc.sock, events, cc)
+        cc.events = events
+
+
+def close_client(sel, cc, rc, session=None):
+    cc.stop_stream(rc)
+    try:
+        sel.unregister(cc.sock)
+    except Exception:
+        pass
+    try:
+        cc.sock.close()
+    except Exception:
+        pass
+
+    # Home on disconnect of the controlling client (any client without sessions)
+    if session is None or session.release(cc):
+        send_home_both(rc, reason=("quit" if cc.quit_requested else "disconnect"), addr=cc.addr)
+
+    print(f"Client disconnected: {cc.addr}", flush=True)
+
+
+def serve(srv, rc: RotatorController, should_run=lambda: True):
+    """
+    Single-threaded event loop over the listening socket and all clients.
+    Blocks in select() until a socket is readable (or writable with output
+    queued), the control thread signals new stream snapshots, a coalesced
+    target is due or a client's unterminated command has waited
+    PARTIAL_IDLE_S; commands are dispatched as the parser completes
+    them. Client sockets are non-blocking, so a client that stops reading
+    only grows its own output buffer.
+    """
+    sel = selectors.DefaultSelector()
+    srv.setblocking(False)
+    sel.register(srv, selectors.EVENT_READ, None)
+    wake = Wakeup()
+    sel.register(wake.r, selectors.EVENT_READ, wake)
+    clients = {}
+    partial = set()     # clients with a partial_due
+    session = Session(rc, TARGET_MIN_INTERVAL_S, SESSION_AUTO_CLAIM)
+
+    def drop(cc):
+        del clients[cc.sock]
+        partial.discard(cc)
+        close_client(sel, cc, rc, session)
+
+    def select_timeout(now):
+        timeout = session.timeout(now)
+        if partial:
+            due = max(0.0, min(cc.partial_due for cc in partial) - now)
+            timeout = due if timeout is None else min(timeout, due)
+        return timeout
+
+    try:
+        while should_run():
+            for key, mask in sel.select(select_timeout(time.monotonic())):
+                if key.data is wake:
+                    wake.drain()
+                    streaming = [c for c in clients.values() if c.sub is not None]
+                    dead = flush_streams(streaming)
+                    for cc in dead:
+                        drop(cc)
+                    for cc in streaming:
+                        if cc not in dead:
+                            watch(sel, cc)
+                    continue
+
+                if key.data is None:
+                    try:
+                        sock, addr = srv.accept()
+                    except BlockingIOError:
+                        continue
+                    sock.setblocking(False)
+                    # Replies are already coalesced per read; don't let Nagle
+                    # hold the batch for the client's delayed ACK.
+                    if CLIENT_TCP_NODELAY:
+                        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    cc = ClientConn(sock, addr, wake)
+                    clients[sock] = cc
+                    sel.register(sock, selectors.EVENT_READ, cc)
+                    print(f"Client connected: {addr}", flush=True)
+                    continue
+
+                cc = key.data
+                if clients.get(cc.sock) is not cc:
+                    continue    # closed earlier in this batch
+                keep = True
+                if mask & selectors.EVENT_WRITE:
+                    try:
+                        cc.write_ready()
+                        if not cc.outbuf and cc.stream_snap:
+                            keep = not flush_streams([cc])
+                    except OSError:
+                        keep = False
+                if keep and mask & selectors.EVENT_READ:
+                    try:
+                        data = cc.sock.recv(RECV_BYTES)
+                    except (BlockingIOError, InterruptedError):
+                        data = None
+                    except OSError:
+                        data = b""
+                    if data is not None:
+                        keep = bool(data)
+                    if data:
+                        if PRINT_RAW_BYTES:
+                            print(f"[RAW] {cc.addr}: {data!r}", flush=True)
+                        try:
+                            keep = process_data(cc, data, rc, session, len(clients))
+                        except OSError:
+                            keep = False
+                        if cc.partial_due is None:
+                            partial.discard(cc)
+                        else:
+                            partial.add(cc)
+                if keep:
+                    watch(sel, cc)
+                else:
+                    drop(cc)
+
+            if partial:
+                now = time.monotonic()
+                for cc in [c for c in partial if c.partial_due <= now]:
+                    partial.discard(cc)
+                    try:
+                        keep = flush_partial(cc, rc, session, len(clients))
+                    except OSError:
+                        keep = False
+                    if keep:
+                        watch(sel, cc)
+                    else:
+                        drop(cc)
+
+            session.apply_due(time.monotonic())
+    finally:
+        for cc in list(clients.values()):
+            close_client(sel, cc, rc, session)
+        sel.close()
+        wake.close()
+
 
+def main(simulate=False):
+    backend = None
+    if simulate:
+        import sim
+        backend = sim.SimBackend(realtime=True)
+        print("[SIM] Using simulated rotator (no hardware)", flush=True)
 
-def main():
-    rc = RotatorController(debug=False)
+    rc = RotatorController(debug=False, backend=backend)
     rc.start()
 
     # Optional: keep your boot behavior (home EL only, hold AZ where it is)
@@ -226,6 +774,8 @@ def main():
 
     print(f"Hamlib rotctld-compatible server listening on {HOST}:{PORT}", flush=True)
     print("Supports: p/\\get_pos, P/\\set_pos, S/\\stop, _/\\get_info, \\dump_state, q", flush=True)
+    print("Extended: \\get_stats, \\reset_stats, \\set_track, \\get_track, \\clear_track, \\stream_pos,", flush=True)
+    print("          \\get_session, \\take_control, \\release_control", flush=True)
     print(f"Using calibration file: {config.CAL_FILE}", flush=True)
 
     srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -234,10 +784,7 @@ def main():
     srv.listen(5)
 
     try:
-        while True:
-            conn, addr = srv.accept()
-            t = threading.Thread(target=handle_client, args=(conn, addr, rc), daemon=True)
-            t.start()
+        serve(srv, rc)
     finally:
         try:
             srv.close()
@@ -247,4 +794,10 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    p = argparse.ArgumentParser(description="Hamlib rotctld-compatible rotator server.")
+    p.add_argument("--sim", action="store_true", help="run against the simulated rotator (sim.py)")
+    args = p.parse_args()
+
+    main(simulate=args.sim)
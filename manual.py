@@ -61,6 +61,8 @@ def main():
 
     enc_az = position.AS5600(config.ENCODER1_BUS, name="E1")
     enc_el = position.AS5600(config.ENCODER2_BUS, name="E2")
+    enc_az.configure_from_config()
+    enc_el.configure_from_config()
     az_tracker = position.UnwrappedAngle(enc_az)
 
     # Prime stable reads (and reduce initial jitter)
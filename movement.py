@@ -1,6 +1,16 @@
 # movement.py
-from Adafruit_MotorHAT import Adafruit_MotorHAT
-import Adafruit_GPIO.I2C as I2C
+try:
+    from Adafruit_MotorHAT import Adafruit_MotorHAT
+    import Adafruit_GPIO.I2C as I2C
+except ImportError:
+    # No MotorHAT library (dev box): constants come from the simulator,
+    # and only sim.SimBackend can provide motors.
+    from sim import Adafruit_MotorHAT
+    I2C = None
+
+import time
+import threading
+from contextlib import contextmanager
 
 import config
 
@@ -22,6 +32,201 @@ def init_motorhat():
     return mh
 
 
+# ----------------------------
+# PCA9685 write-through cache
+# ----------------------------
+# The MotorHAT library turns every setSpeed() into 4 single-byte register
+# writes and every run() into 8, whether or not anything changed. MotorOutputs
+# keeps a shadow of each LED channel's (ON, OFF) value and only sends channels
+# that actually change; with auto-increment on, all dirty channels that are
+# contiguous go out in ONE block write (M1 + M2 use channels 8..13, so a tick
+# that changes both motors is a single transaction).
+
+PCA9685_MODE1 = 0x00
+PCA9685_MODE1_RESTART = 0x80
+PCA9685_MODE1_AI = 0x20
+PCA9685_LED0_ON_L = 0x06
+PCA9685_FULL = 4096  # ON or OFF count with bit 12 set = fully on / fully off
+
+# MotorHAT DC motor number -> (PWM, IN1, IN2) PCA9685 channels (Adafruit_MotorHAT wiring)
+MOTOR_PINS = {
+    1: (8, 10, 9),
+    2: (13, 11, 12),
+    3: (2, 4, 3),
+    4: (7, 5, 6),
+}
+
+
+class MotorOutputs:
+    """
+    Write-through cache in front of the MotorHAT's PCA9685.
+    Use motor(num) in place of mh.getMotor(num). Inside `with outputs.batch():`
+    writes are collected and flushed once at the end. If write_hist (a
+    timing.Histogram) is set, each flush that reaches the bus is timed into it.
+    """
+    def __init__(self, mh, block_writes=True, write_hist=None):
+        self.i2c = mh._pwm.i2c
+        self.write_hist = write_hist
+        self._lock = threading.RLock()
+        self._shadow = [None] * 16   # (on, off) last written per channel
+        self._pending = {}           # channel -> (on, off)
+        self._batch_depth = 0
+        self._motors = {}
+
+        self.stats = {
+            "calls": 0,                 # setSpeed/run calls
+            "calls_avoided": 0,         # calls that changed nothing
+            "channel_writes": 0,
+            "i2c_transactions": 0,
+            "block_writes": 0,
+        }
+
+        self.block_writes = False
+        if block_writes:
+            try:
+                mode1 = self.i2c.readU8(PCA9685_MODE1)
+                self.i2c.write8(PCA9685_MODE1, (mode1 & ~PCA9685_MODE1_RESTART) | PCA9685_MODE1_AI)
+                self.stats["i2c_transactions"] += 2
+                self.block_writes = True
+            except Exception:
+                pass
+
+    def motor(self, num):
+        if num not in self._motors:
+            self._motors[num] = CachedMotor(self, num)
+        return self._motors[num]
+
+    @contextmanager
+    def batch(self):
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
+
+    def _set_channel(self, ch, on, off):
+        """
+        Returns True if the channel will be written.
+        """
+        with self._lock:
+            val = (on, off)
+            if self._pending.get(ch, self._shadow[ch]) == val:
+                return False
+            self._pending[ch] = val
+            if self._batch_depth == 0:
+                self.flush()
+            return True
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending = self._pending
+            self._pending = {}
+            chans = sorted(pending)
+            t0 = time.perf_counter()
+            try:
+                if self.block_writes:
+                    run = [chans[0]]
+                    for ch in chans[1:]:
+                        if ch == run[-1] + 1:
+                            run.append(ch)
+                        else:
+                            self._write_run(run, pending)
+                            run = [ch]
+                    self._write_run(run, pending)
+                else:
+                    for ch in chans:
+                        on, off = pending[ch]
+                        base = PCA9685_LED0_ON_L + 4 * ch
+                        for i, b in enumerate((on & 0xFF, on >> 8, off & 0xFF, off >> 8)):
+                            self.i2c.write8(base + i, b)
+                        self.stats["i2c_transactions"] += 4
+                        self._shadow[ch] = (on, off)
+            except Exception:
+                # unknown hardware state: force a rewrite next time
+                for ch in chans:
+                    self._shadow[ch] = None
+                raise
+            finally:
+                if self.write_hist is not None:
+                    self.write_hist.record(time.perf_counter() - t0)
+            self.stats["channel_writes"] += len(chans)
+
+    def _write_run(self, run, pending):
+        data = []
+        for ch in run:
+            on, off = pending[ch]
+            data += [on & 0xFF, on >> 8, off & 0xFF, off >> 8]
+        self.i2c.writeList(PCA9685_LED0_ON_L + 4 * run[0], data)
+        self.stats["i2c_transactions"] += 1
+        self.stats["block_writes"] += 1
+        for ch in run:
+            self._shadow[ch] = pending[ch]
+
+    def snapshot(self):
+        with self._lock:
+            st = dict(self.stats)
+        st["block_mode"] = self.block_writes
+        return st
+
+
+class CachedMotor:
+    """
+    Adafruit_DCMotor-compatible (setSpeed/run) front end over MotorOutputs.
+    Unlike the library, run(BRAKE) is honoured (both H-bridge inputs high).
+    """
+    def __init__(self, outputs: MotorOutputs, num):
+        self.outputs = outputs
+        self.pwm_pin, self.in1_pin, self.in2_pin = MOTOR_PINS[num]
+
+    def _pin(self, ch, high):
+        if high:
+            return self.outputs._set_channel(ch, PCA9685_FULL, 0)
+        return self.outputs._set_channel(ch, 0, PCA9685_FULL)
+
+    def _count(self, changed):
+        st = self.outputs.stats
+        st["calls"] += 1
+        if not changed:
+            st["calls_avoided"] += 1
+
+    def setSpeed(self, speed):
+        speed = max(0, min(255, int(speed)))
+        self._count(self.outputs._set_channel(self.pwm_pin, 0, speed * 16))
+
+    def run(self, command):
+        if command == Adafruit_MotorHAT.FORWARD:
+            in1, in2 = True, False
+        elif command == Adafruit_MotorHAT.BACKWARD:
+            in1, in2 = False, True
+        elif command == Adafruit_MotorHAT.BRAKE:
+            in1, in2 = True, True
+        else:
+            in1, in2 = False, False
+        with self.outputs.batch():
+            a = self._pin(self.in1_pin, in1)
+            b = self._pin(self.in2_pin, in2)
+        self._count(a or b)
+
+
+def init_motor_outputs(mh, write_hist=None):
+    """
+    MotorOutputs for this MotorHAT, or None if it doesn't expose the PCA9685
+    (then callers keep using mh.getMotor directly).
+    """
+    if not bool(getattr(config, "MOTOR_WRITE_CACHE", False)):
+        return None
+    pwm = getattr(mh, "_pwm", None)
+    if pwm is None or not hasattr(pwm, "i2c"):
+        return None
+    return MotorOutputs(mh, block_writes=bool(getattr(config, "MOTOR_BLOCK_WRITES", True)),
+                        write_hist=write_hist)
+
+
 def motor_set_speed(motor, speed):
     motor.setSpeed(max(0, min(255, int(speed))))
 
@@ -64,3 +269,172 @@ def drive_toward_error(motor, forward_sign, err_deg):
 
 def stop_motor(motor):
     motor.run(Adafruit_MotorHAT.RELEASE)
+
+
+# ----------------------------
+# AZ motion profile (replaces the FAST/SLOW/CREEP tiers when enabled)
+# ----------------------------
+
+class AzProfile:
+    """
+    Online trapezoidal velocity profile + closed-loop velocity tracking.
+
+    Every tick it re-plans from the remaining error: the commanded velocity
+    ramps toward min(vmax, sqrt(2 * decel * remaining)) with accel/decel
+    limits, so the axis arrives at ~zero speed instead of overshooting the
+    deadband. PWM = feedforward(v_cmd) + kp * (v_cmd - v_measured).
+    All quantities are in encoder degrees (same space as the unwrapped error).
+    """
+    def __init__(self, vmax_dps, accel_dps2, decel_dps2, ff_offset, ff_per_dps,
+                 kp, min_pwm, deadband_deg):
+        self.vmax = float(vmax_dps)
+        self.accel = float(accel_dps2)
+        self.decel = float(decel_dps2)
+        self.ff_offset = float(ff_offset)
+        self.ff_per_dps = float(ff_per_dps)
+        self.kp = float(kp)
+        self.min_pwm = int(min_pwm)
+        self.deadband = float(deadband_deg)
+        self.reset()
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            vmax_dps=getattr(config, "AZ_PROFILE_VMAX_DPS", 30.0),
+            accel_dps2=getattr(config, "AZ_PROFILE_ACCEL_DPS2", 80.0),
+            decel_dps2=getattr(config, "AZ_PROFILE_DECEL_DPS2", 40.0),
+            ff_offset=getattr(config, "AZ_FF_PWM_OFFSET", 60),
+            ff_per_dps=getattr(config, "AZ_FF_PWM_PER_DPS", 5.5),
+            kp=getattr(config, "AZ_VEL_KP", 4.0),
+            min_pwm=getattr(config, "AZ_PROFILE_MIN_PWM", config.CREEP_SPEED),
+            deadband_deg=config.DEADBAND_DEG,
+        )
+
+    def reset(self):
+        self.v_cmd = 0.0
+        self.last_ts = None
+        self.last_pwm = 0
+
+    def tick(self, motor, forward_sign, err_deg, vel_dps, now):
+        """
+        Non-blocking like drive_toward_error. Returns True if within deadband.
+        """
+        if abs(err_deg) <= self.deadband:
+            motor.run(Adafruit_MotorHAT.RELEASE)
+            self.reset()
+            return True
+
+        self.last_pwm = 0
+        dt = 0.02 if self.last_ts is None else min(0.2, max(0.0, now - self.last_ts))
+        self.last_ts = now
+
+        d = 1.0 if err_deg > 0 else -1.0
+        remaining = max(0.0, abs(err_deg) - self.deadband / 2.0)
+        v_goal = d * min(self.vmax, (2.0 * self.decel * remaining) ** 0.5)
+
+        speeding_up = abs(v_goal) > abs(self.v_cmd) and (v_goal * self.v_cmd) >= 0
+        lim = (self.accel if speeding_up else self.decel) * dt
+        self.v_cmd += max(-lim, min(lim, v_goal - self.v_cmd))
+
+        u = self.kp * (self.v_cmd - vel_dps)
+        if self.v_cmd != 0.0:
+            u += (1.0 if self.v_cmd > 0 else -1.0) * (self.ff_offset + self.ff_per_dps * abs(self.v_cmd))
+
+        if u * d <= 0:
+            # profile wants less than zero drive toward the target: coast
+            motor.run(Adafruit_MotorHAT.RELEASE)
+            return False
+
+        self.last_pwm = int(max(self.min_pwm, min(255, abs(u))))
+        motor_set_speed(motor, self.last_pwm)
+        motor.run(motor_dir_for_error(forward_sign, d))
+        return False
+
+
+# ----------------------------
+# Learned breakaway PWM (EL)
+# ----------------------------
+
+class BreakawayTable:
+    """
+    Learned breakaway PWM per direction ("up"/"down") and elevation bin.
+
+    Breakaway searches start `margin` PWM below the learned value, so a move
+    normally breaks free on the first step. A break above the learned value
+    replaces it immediately; a break below it pulls the value down by `decay`
+    of the difference, so friction that improves is followed slowly.
+    """
+    DIRS = ("up", "down")
+
+    def __init__(self, bin_deg=10.0, el_max_deg=90.0, margin_pwm=15, decay=0.2):
+        self.bin_deg = float(bin_deg)
+        self.nbins = int(el_max_deg // self.bin_deg) + 1
+        self.margin = int(margin_pwm)
+        self.decay = float(decay)
+        self.bins = {d: [None] * self.nbins for d in self.DIRS}
+        self.dirty = False
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            bin_deg=getattr(config, "EL_BREAKAWAY_BIN_DEG", 10.0),
+            el_max_deg=config.EL_MAX_DEG,
+            margin_pwm=getattr(config, "EL_BREAKAWAY_LEARN_MARGIN_PWM", 15),
+            decay=getattr(config, "EL_BREAKAWAY_LEARN_DECAY", 0.2),
+        )
+
+    def _key(self, direction, el_deg):
+        i = int(max(0.0, float(el_deg)) // self.bin_deg)
+        return ("up" if direction > 0 else "down"), min(self.nbins - 1, i)
+
+    def learned(self, direction, el_deg):
+        """
+        Learned PWM for this bin, else the nearest learned neighbour, else None.
+        """
+        d, i = self._key(direction, el_deg)
+        row = self.bins[d]
+        for j in (i, i - 1, i + 1):
+            if 0 <= j < self.nbins and row[j] is not None:
+                return row[j]
+        return None
+
+    def start_pwm(self, direction, el_deg, default):
+        v = self.learned(direction, el_deg)
+        if v is None:
+            return int(default)
+        return int(max(0, min(255, round(v - self.margin))))
+
+    def record_break(self, direction, el_deg, pwm):
+        """
+        The axis broke free at `pwm`.
+        """
+        d, i = self._key(direction, el_deg)
+        cur = self.bins[d][i]
+        pwm = float(pwm)
+        if cur is None or pwm >= cur:
+            new = pwm
+        else:
+            new = cur + self.decay * (pwm - cur)
+        self.bins[d][i] = round(new, 1)
+        self.dirty = True
+
+    def record_stall(self, direction, el_deg, pwm):
+        """
+        The axis stalled while driven at `pwm`; next breakaway must start above it.
+        """
+        d, i = self._key(direction, el_deg)
+        cur = self.bins[d][i]
+        if cur is None or pwm + self.margin > cur:
+            self.bins[d][i] = float(min(255, pwm + self.margin))
+            self.dirty = True
+
+    def to_dict(self):
+        return {"bin_deg": self.bin_deg, "up": list(self.bins["up"]), "down": list(self.bins["down"])}
+
+    def load_dict(self, data):
+        if not data or float(data.get("bin_deg", -1)) != self.bin_deg:
+            return  # different binning: start over
+        for d in self.DIRS:
+            row = list(data.get(d, []))[:self.nbins]
+            self.bins[d][:len(row)] = [None if v is None else float(v) for v in row]
+        self.dirty = False
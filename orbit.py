@@ -0,0 +1,583 @@
+# orbit.py
+# Offline satellite tracking: SGP4 from a local TLE file, look angles for the
+# station in config.py, and a pass table uploaded to the controller as a
+# program track, so a pass can be tracked without gpredict (or any network)
+# connected.
+#
+#   python3 orbit.py --sat "ISS (ZARYA)"             # list the next passes
+#   python3 orbit.py --sat "ISS (ZARYA)" --track     # wait for the next pass and track it
+#   python3 orbit.py --sat "ISS (ZARYA)" --track --sim
+#
+# Propagation is near-earth SGP4 (WGS-72, as used to generate TLEs), vectorized
+# with NumPy over the time axis, so a whole pass is one batch of array ops.
+# Deep-space objects (period >= 225 min, SDP4) are not supported.
+
+import datetime
+import math
+import time
+
+import numpy as np
+
+import config
+
+
+# ----------------------------
+# Constants
+# ----------------------------
+
+# WGS-72 (SGP4)
+MU_KM3_S2 = 398600.8
+RE_KM = 6378.135
+XKE = 60.0 / math.sqrt(RE_KM ** 3 / MU_KM3_S2)
+J2 = 0.001082616
+J3 = -0.00000253881
+J4 = -0.00000165597
+J3OJ2 = J3 / J2
+
+# WGS-84 (station)
+WGS84_A_KM = 6378.137
+WGS84_F = 1.0 / 298.257223563
+
+TWO_PI = 2.0 * math.pi
+MIN_PER_DAY = 1440.0
+
+
+def unix_to_jd(t):
+    return t / 86400.0 + 2440587.5
+
+
+def gmst_rad(t):
+    """
+    Greenwich mean sidereal time (IAU-82, as in SGP4's gstime) at unix time(s) t.
+    """
+    tut1 = (unix_to_jd(t) - 2451545.0) / 36525.0
+    sec = (-6.2e-6 * tut1 ** 3 + 0.093104 * tut1 ** 2
+           + (876600.0 * 3600.0 + 8640184.812866) * tut1 + 67310.54841)
+    return np.mod(np.radians(sec / 240.0), TWO_PI)
+
+
+# ----------------------------
+# TLE
+# ----------------------------
+
+def _tle_float(field):
+    """
+    TLE exponent notation: " 12345-4" -> 0.12345e-4.
+    """
+    s = field.strip().replace(" ", "")
+    if not s or s in ("00000-0", "00000+0", "+00000-0", "-00000-0"):
+        return 0.0
+    sign = -1.0 if s[0] == "-" else 1.0
+    s = s.lstrip("+-")
+    mant, exp = s[:-2], s[-2:]
+    return sign * float("0." + mant) * 10.0 ** int(exp)
+
+
+class Tle:
+    """
+    Mean elements from one two-line element set (angles in radians,
+    mean motion in rad/min, epoch as unix time).
+    """
+    def __init__(self, line1, line2, name=""):
+        line1 = line1.rstrip()
+        line2 = line2.rstrip()
+        if not (line1.startswith("1 ") and line2.startswith("2 ")):
+            raise ValueError("not a TLE line pair")
+        self.name = name.strip() or line1[2:7].strip()
+        self.line1 = line1
+        self.line2 = line2
+        self.satnum = int(line1[2:7])
+
+        yy = int(line1[18:20])
+        year = 2000 + yy if yy < 57 else 1900 + yy
+        day = float(line1[20:32])
+        jan1 = datetime.datetime(year, 1, 1, tzinfo=datetime.timezone.utc).timestamp()
+        self.epoch = jan1 + (day - 1.0) * 86400.0
+
+        self.bstar = _tle_float(line1[53:61])
+        self.inclo = math.radians(float(line2[8:16]))
+        self.nodeo = math.radians(float(line2[17:25]))
+        self.ecco = float("0." + line2[26:33].strip())
+        self.argpo = math.radians(float(line2[34:42]))
+        self.mo = math.radians(float(line2[43:51]))
+        self.no_kozai = float(line2[52:63]) * TWO_PI / MIN_PER_DAY
+
+    def __repr__(self):
+        return f"Tle({self.name!r}, satnum={self.satnum})"
+
+
+def load_tles(path):
+    """
+    {name: Tle} from a 3-line (name + 2 lines) or bare 2-line TLE file.
+    """
+    with open(path, "r") as f:
+        lines = [ln.rstrip() for ln in f if ln.strip()]
+    tles = {}
+    i = 0
+    while i < len(lines):
+        if lines[i].startswith("1 ") and i + 1 < len(lines) and lines[i + 1].startswith("2 "):
+            name, l1, l2 = "", lines[i], lines[i + 1]
+            i += 2
+        elif i + 2 < len(lines) and lines[i + 1].startswith("1 ") and lines[i + 2].startswith("2 "):
+            name, l1, l2 = lines[i], lines[i + 1], lines[i + 2]
+            i += 3
+        else:
+            i += 1
+            continue
+        tle = Tle(l1, l2, name)
+        tles[tle.name] = tle
+    return tles
+
+
+def find_tle(tles, sat):
+    """
+    Look a satellite up by exact name, catalog number, or name prefix.
+    """
+    if sat in tles:
+        return tles[sat]
+    for tle in tles.values():
+        if str(tle.satnum) == str(sat).strip():
+            return tle
+    key = str(sat).strip().upper()
+    for name, tle in tles.items():
+        if name.upper().startswith(key):
+            return tle
+    raise KeyError(f"satellite {sat!r} not in TLE file")
+
+
+# ----------------------------
+# SGP4 (near-earth)
+# ----------------------------
+
+class Sgp4:
+    """
+    SGP4 initialised from a Tle; positions() takes an array of unix times.
+    Follows the reference implementation (Vallado et al., "Revisiting
+    Spacetrack Report #3", AFSPC mode) without the deep-space branch.
+    """
+    def __init__(self, tle):
+        self.tle = tle
+        self.epoch = tle.epoch
+        ecco, inclo, argpo, mo = tle.ecco, tle.inclo, tle.argpo, tle.mo
+        bstar = tle.bstar
+        x2o3 = 2.0 / 3.0
+
+        # initl: recover the original mean motion and semi-major axis
+        eccsq = ecco * ecco
+        omeosq = 1.0 - eccsq
+        rteosq = math.sqrt(omeosq)
+        cosio = math.cos(inclo)
+        cosio2 = cosio * cosio
+        ak = (XKE / tle.no_kozai) ** x2o3
+        d1 = 0.75 * J2 * (3.0 * cosio2 - 1.0) / (rteosq * omeosq)
+        delta = d1 / (ak * ak)
+        adel = ak * (1.0 - delta * delta - delta * (1.0 / 3.0 + 134.0 * delta * delta / 81.0))
+        delta = d1 / (adel * adel)
+        no = tle.no_kozai / (1.0 + delta)
+        if TWO_PI / no >= 225.0:
+            raise ValueError(f"{tle.name}: deep-space orbit (period >= 225 min) needs SDP4")
+
+        ao = (XKE / no) ** x2o3
+        sinio = math.sin(inclo)
+        po = ao * omeosq
+        con42 = 1.0 - 5.0 * cosio2
+        con41 = -con42 - cosio2 - cosio2
+        posq = po * po
+        rp = ao * (1.0 - ecco)
+
+        # sgp4init
+        ss = 78.0 / RE_KM + 1.0
+        qzms2t = ((120.0 - 78.0) / RE_KM) ** 4
+        isimp = rp < (220.0 / RE_KM + 1.0)
+        sfour = ss
+        qzms24 = qzms2t
+        perige = (rp - 1.0) * RE_KM
+        if perige < 156.0:
+            sfour = perige - 78.0
+            if perige < 98.0:
+                sfour = 20.0
+            qzms24 = ((120.0 - sfour) / RE_KM) ** 4
+            sfour = sfour / RE_KM + 1.0
+        pinvsq = 1.0 / posq
+        tsi = 1.0 / (ao - sfour)
+        eta = ao * ecco * tsi
+        etasq = eta * eta
+        eeta = ecco * eta
+        psisq = abs(1.0 - etasq)
+        coef = qzms24 * tsi ** 4
+        coef1 = coef / psisq ** 3.5
+        cc2 = coef1 * no * (ao * (1.0 + 1.5 * etasq + eeta * (4.0 + etasq))
+                            + 0.375 * J2 * tsi / psisq * con41 * (8.0 + 3.0 * etasq * (8.0 + etasq)))
+        cc1 = bstar * cc2
+        cc3 = 0.0
+        if ecco > 1.0e-4:
+            cc3 = -2.0 * coef * tsi * J3OJ2 * no * sinio / ecco
+        x1mth2 = 1.0 - cosio2
+        cc4 = 2.0 * no * coef1 * ao * omeosq * (
+            eta * (2.0 + 0.5 * etasq) + ecco * (0.5 + 2.0 * etasq)
+            - J2 * tsi / (ao * psisq) * (
+                -3.0 * con41 * (1.0 - 2.0 * eeta + etasq * (1.5 - 0.5 * eeta))
+                + 0.75 * x1mth2 * (2.0 * etasq - eeta * (1.0 + etasq)) * math.cos(2.0 * argpo)))
+        cc5 = 2.0 * coef1 * ao * omeosq * (1.0 + 2.75 * (etasq + eeta) + eeta * etasq)
+        cosio4 = cosio2 * cosio2
+        temp1 = 1.5 * J2 * pinvsq * no
+        temp2 = 0.5 * temp1 * J2 * pinvsq
+        temp3 = -0.46875 * J4 * pinvsq * pinvsq * no
+        self.mdot = (no + 0.5 * temp1 * rteosq * con41
+                     + 0.0625 * temp2 * rteosq * (13.0 - 78.0 * cosio2 + 137.0 * cosio4))
+        self.argpdot = (-0.5 * temp1 * con42 + 0.0625 * temp2 * (7.0 - 114.0 * cosio2 + 395.0 * cosio4)
+                        + temp3 * (3.0 - 36.0 * cosio2 + 49.0 * cosio4))
+        xhdot1 = -temp1 * cosio
+        self.nodedot = xhdot1 + (0.5 * temp2 * (4.0 - 19.0 * cosio2) + 2.0 * temp3 * (3.0 - 7.0 * cosio2)) * cosio
+        self.omgcof = bstar * cc3 * math.cos(argpo)
+        self.xmcof = -x2o3 * coef * bstar / eeta if ecco > 1.0e-4 else 0.0
+        self.nodecf = 3.5 * omeosq * xhdot1 * cc1
+        self.t2cof = 1.5 * cc1
+        den = 1.0 + cosio if abs(cosio + 1.0) > 1.5e-12 else 1.5e-12
+        self.xlcof = -0.25 * J3OJ2 * sinio * (3.0 + 5.0 * cosio) / den
+        self.aycof = -0.5 * J3OJ2 * sinio
+        self.delmo = (1.0 + eta * math.cos(mo)) ** 3
+        self.sinmao = math.sin(mo)
+        self.x7thm1 = 7.0 * cosio2 - 1.0
+
+        self.isimp = isimp
+        if not isimp:
+            cc1sq = cc1 * cc1
+            self.d2 = 4.0 * ao * tsi * cc1sq
+            temp = self.d2 * tsi * cc1 / 3.0
+            self.d3 = (17.0 * ao + sfour) * temp
+            self.d4 = 0.5 * temp * ao * tsi * (221.0 * ao + 31.0 * sfour) * cc1
+            self.t3cof = self.d2 + 2.0 * cc1sq
+            self.t4cof = 0.25 * (3.0 * self.d3 + cc1 * (12.0 * self.d2 + 10.0 * cc1sq))
+            self.t5cof = 0.2 * (3.0 * self.d4 + 12.0 * cc1 * self.d3 + 6.0 * self.d2 * self.d2
+                                + 15.0 * cc1sq * (2.0 * self.d2 + cc1sq))
+
+        self.no = no
+        self.ecco = ecco
+        self.inclo = inclo
+        self.argpo = argpo
+        self.nodeo = tle.nodeo
+        self.mo = mo
+        self.bstar = bstar
+        self.eta = eta
+        self.cc1 = cc1
+        self.cc4 = cc4
+        self.cc5 = cc5
+        self.con41 = con41
+        self.x1mth2 = x1mth2
+
+    def positions(self, t):
+        """
+        TEME position in km, shape (n, 3), at unix times t (array-like).
+        Raises ValueError if the orbit has decayed within the span.
+        """
+        tsince = (np.atleast_1d(np.asarray(t, dtype=float)) - self.epoch) / 60.0
+
+        # secular gravity and atmospheric drag
+        xmdf = self.mo + self.mdot * tsince
+        argpdf = self.argpo + self.argpdot * tsince
+        nodedf = self.nodeo + self.nodedot * tsince
+        argpm = argpdf
+        mm = xmdf
+        t2 = tsince * tsince
+        nodem = nodedf + self.nodecf * t2
+        tempa = 1.0 - self.cc1 * tsince
+        tempe = self.bstar * self.cc4 * tsince
+        templ = self.t2cof * t2
+        if not self.isimp:
+            delomg = self.omgcof * tsince
+            delm = self.xmcof * ((1.0 + self.eta * np.cos(xmdf)) ** 3 - self.delmo)
+            temp = delomg + delm
+            mm = xmdf + temp
+            argpm = argpdf - temp
+            t3 = t2 * tsince
+            t4 = t3 * tsince
+            tempa = tempa - self.d2 * t2 - self.d3 * t3 - self.d4 * t4
+            tempe = tempe + self.bstar * self.cc5 * (np.sin(mm) - self.sinmao)
+            templ = templ + self.t3cof * t3 + t4 * (self.t4cof + tsince * self.t5cof)
+
+        am = (XKE / self.no) ** (2.0 / 3.0) * tempa * tempa
+        nm = XKE / am ** 1.5
+        em = self.ecco - tempe
+        if np.any(em >= 1.0) or np.any(em < -0.001):
+            raise ValueError(f"{self.tle.name}: eccentricity out of range (decayed?)")
+        em = np.maximum(em, 1.0e-6)
+        mm = mm + self.no * templ
+        xlm = mm + argpm + nodem
+        nodem = np.mod(nodem, TWO_PI)
+        argpm = np.mod(argpm, TWO_PI)
+        xlm = np.mod(xlm, TWO_PI)
+        mm = np.mod(xlm - argpm - nodem, TWO_PI)
+
+        # long-period periodics
+        sinip = math.sin(self.inclo)
+        cosip = math.cos(self.inclo)
+        axnl = em * np.cos(argpm)
+        temp = 1.0 / (am * (1.0 - em * em))
+        aynl = em * np.sin(argpm) + temp * self.aycof
+        xl = mm + argpm + nodem + temp * self.xlcof * axnl
+
+        # Kepler's equation (fixed iteration count: converged well before 10)
+        u = np.mod(xl - nodem, TWO_PI)
+        eo1 = u.copy()
+        for _ in range(10):
+            sineo1 = np.sin(eo1)
+            coseo1 = np.cos(eo1)
+            step = (u - aynl * coseo1 + axnl * sineo1 - eo1) / (1.0 - coseo1 * axnl - sineo1 * aynl)
+            eo1 = eo1 + np.clip(step, -0.95, 0.95)
+        sineo1 = np.sin(eo1)
+        coseo1 = np.cos(eo1)
+
+        # short-period preliminary quantities
+        ecose = axnl * coseo1 + aynl * sineo1
+        esine = axnl * sineo1 - aynl * coseo1
+        el2 = axnl * axnl + aynl * aynl
+        pl = am * (1.0 - el2)
+        if np.any(pl < 0.0):
+            raise ValueError(f"{self.tle.name}: semi-latus rectum < 0 (decayed?)")
+        rl = am * (1.0 - ecose)
+        betal = np.sqrt(1.0 - el2)
+        temp = esine / (1.0 + betal)
+        sinu = am / rl * (sineo1 - aynl - axnl * temp)
+        cosu = am / rl * (coseo1 - axnl + aynl * temp)
+        su = np.arctan2(sinu, cosu)
+        sin2u = (cosu + cosu) * sinu
+        cos2u = 1.0 - 2.0 * sinu * sinu
+        temp = 1.0 / pl
+        temp1 = 0.5 * J2 * temp
+        temp2 = temp1 * temp
+
+        # short-period periodics
+        mrt = rl * (1.0 - 1.5 * temp2 * betal * self.con41) + 0.5 * temp1 * self.x1mth2 * cos2u
+        su = su - 0.25 * temp2 * self.x7thm1 * sin2u
+        xnode = nodem + 1.5 * temp2 * cosip * sin2u
+        xinc = self.inclo + 1.5 * temp2 * cosip * sinip * cos2u
+
+        sinsu, cossu = np.sin(su), np.cos(su)
+        snod, cnod = np.sin(xnode), np.cos(xnode)
+        sini, cosi = np.sin(xinc), np.cos(xinc)
+        xmx = -snod * cosi
+        xmy = cnod * cosi
+        ux = xmx * sinsu + cnod * cossu
+        uy = xmy * sinsu + snod * cossu
+        uz = sini * sinsu
+        return np.stack((ux, uy, uz), axis=-1) * (mrt * RE_KM)[:, None]
+
+
+# ----------------------------
+# Station and look angles
+# ----------------------------
+
+class Station:
+    def __init__(self, lat_deg, lon_deg, alt_m=0.0):
+        self.lat = math.radians(float(lat_deg))
+        self.lon = math.radians(float(lon_deg))
+        self.alt_km = float(alt_m) / 1000.0
+        e2 = WGS84_F * (2.0 - WGS84_F)
+        sl, cl = math.sin(self.lat), math.cos(self.lat)
+        n = WGS84_A_KM / math.sqrt(1.0 - e2 * sl * sl)
+        self.ecef = np.array([
+            (n + self.alt_km) * cl * math.cos(self.lon),
+            (n + self.alt_km) * cl * math.sin(self.lon),
+            (n * (1.0 - e2) + self.alt_km) * sl,
+        ])
+        so, co = math.sin(self.lon), math.cos(self.lon)
+        # rows: east, north, up
+        self.enu = np.array([
+            [-so, co, 0.0],
+            [-sl * co, -sl * so, cl],
+            [cl * co, cl * so, sl],
+        ])
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            getattr(config, "STATION_LAT_DEG", 0.0),
+            getattr(config, "STATION_LON_DEG", 0.0),
+            getattr(config, "STATION_ALT_M", 0.0),
+        )
+
+    def look(self, teme_km, t):
+        """
+        (az_deg 0..360, el_deg, range_km) arrays for TEME positions at unix times t.
+        """
+        g = gmst_rad(np.atleast_1d(np.asarray(t, dtype=float)))
+        cg, sg = np.cos(g), np.sin(g)
+        x, y, z = teme_km[:, 0], teme_km[:, 1], teme_km[:, 2]
+        ecef = np.stack((cg * x + sg * y, -sg * x + cg * y, z), axis=-1)
+        e, n, u = (self.enu @ (ecef - self.ecef).T)
+        az = np.mod(np.degrees(np.arctan2(e, n)), 360.0)
+        el = np.degrees(np.arctan2(u, np.hypot(e, n)))
+        return az, el, np.sqrt(e * e + n * n + u * u)
+
+
+def look_angles(sat, station, t):
+    """
+    (az, el) arrays of an Sgp4 satellite from a Station at unix times t.
+    """
+    t = np.atleast_1d(np.asarray(t, dtype=float))
+    az, el, _ = station.look(sat.positions(t), t)
+    return az, el
+
+
+# ----------------------------
+# Passes
+# ----------------------------
+
+class PassTable:
+    """
+    One pass sampled at a fixed step: parallel t (unix), az, el arrays,
+    computed in one batch. AZ is unwrapped along the pass.
+    """
+    def __init__(self, name, t, az, el):
+        self.name = name
+        self.t = t
+        self.az = np.degrees(np.unwrap(np.radians(az)))
+        self.el = el
+        i = int(np.argmax(el))
+        self.aos = float(t[0])
+        self.los = float(t[-1])
+        self.tca = float(t[i])
+        self.max_el = float(el[i])
+
+    def __len__(self):
+        return len(self.t)
+
+    def at(self, now):
+        """
+        Interpolated (az 0..360, el) at unix time now, clamped to the pass.
+        """
+        az = float(np.interp(now, self.t, self.az))
+        el = float(np.interp(now, self.t, self.el))
+        return az % 360.0, el
+
+    def describe(self):
+        def hms(ts):
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts))
+
+        return (f"{self.name}: AOS {hms(self.aos)}Z az={self.az[0] % 360.0:.0f}  "
+                f"TCA {hms(self.tca)}Z el={self.max_el:.1f}  "
+                f"LOS {hms(self.los)}Z az={self.az[-1] % 360.0:.0f}  ({self.los - self.aos:.0f}s)")
+
+
+def find_passes(sat, station, t0, hours=24.0, min_el_deg=None, min_max_el_deg=None,
+                search_step_s=None, step_s=None):
+    """
+    Passes of sat over station starting in [t0, t0 + hours): one vectorized
+    coarse scan for horizon crossings, then one PassTable per pass above
+    min_max_el_deg at step_s resolution.
+    """
+    if min_el_deg is None:
+        min_el_deg = max(float(config.EL_MIN_DEG), float(getattr(config, "PASS_MIN_EL_DEG", 0.0)))
+    if min_max_el_deg is None:
+        min_max_el_deg = float(getattr(config, "PASS_MIN_MAX_EL_DEG", 10.0))
+    if search_step_s is None:
+        search_step_s = float(getattr(config, "PASS_SEARCH_STEP_S", 20.0))
+    if step_s is None:
+        step_s = float(getattr(config, "PASS_STEP_S", 1.0))
+
+    ts = np.arange(t0, t0 + hours * 3600.0 + search_step_s, search_step_s)
+    _, el = look_angles(sat, station, ts)
+    up = el >= min_el_deg
+    edges = np.flatnonzero(np.diff(up.astype(np.int8)))
+
+    passes = []
+    start = 0 if up[0] else None
+    for i in edges:
+        if not up[i]:
+            start = i                    # rises between ts[i] and ts[i + 1]
+        elif start is not None:
+            passes.append((ts[start], ts[i + 1]))
+            start = None
+    if start is not None:
+        passes.append((ts[start], ts[-1]))
+
+    out = []
+    for a, b in passes:
+        t = np.arange(a, b + step_s, step_s)
+        az, el = look_angles(sat, station, t)
+        keep = el >= min_el_deg
+        if not keep.any() or float(el.max()) < min_max_el_deg:
+            continue
+        i0 = int(np.argmax(keep))
+        i1 = len(keep) - int(np.argmax(keep[::-1]))
+        out.append(PassTable(sat.tle.name, t[i0:i1], az[i0:i1], el[i0:i1]))
+    return out
+
+
+# ----------------------------
+# Feeding the controller
+# ----------------------------
+
+class PassFeeder:
+    """
+    Uploads a PassTable to the controller as one program track
+    (RotatorController.load_program_track) preposition_s before AOS; the
+    controller holds the AOS point until then and interpolates during the
+    pass. update(now) is non-blocking; run() loops on the controller's clock.
+    """
+    def __init__(self, rc, table, preposition_s=60.0):
+        self.rc = rc
+        self.table = table
+        self.preposition_s = float(preposition_s)
+        self.loaded = False
+        self.done = False
+
+    @classmethod
+    def from_config(cls, rc, table):
+        return cls(rc, table, preposition_s=getattr(config, "PASS_PREPOSITION_S", 60.0))
+
+    def update(self, now):
+        t = self.table
+        if self.done:
+            return False
+        if now >= t.los:
+            self.done = True
+            print(f"[PASS] LOS {t.name}", flush=True)
+            return False
+        if not self.loaded and now >= t.aos - self.preposition_s:
+            az, _ = t.at(t.aos)
+            print(f"[PASS] pre-positioning for {t.name}: AZ={az:.1f}°", flush=True)
+            self.rc.load_program_track(zip(t.t, t.az, t.el))
+            self.loaded = True
+        return True
+
+    def run(self):
+        clock = self.rc.clock
+        while self.update(clock.time()):
+            clock.sleep(0.5)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser(description="Offline pass prediction and tracking from a local TLE file.")
+    p.add_argument("--tle", default=getattr(config, "TLE_FILE", "satellites.tle"))
+    p.add_argument("--sat", required=True, help="satellite name (or prefix) or catalog number")
+    p.add_argument("--hours", type=float, default=24.0)
+    p.add_argument("--track", action="store_true", help="track the next pass with the rotator")
+    p.add_argument("--sim", action="store_true", help="track on the simulated rotator (sim.py)")
+    args = p.parse_args()
+
+    sat = Sgp4(find_tle(load_tles(args.tle), args.sat))
+    station = Station.from_config()
+    wall0 = time.perf_counter()
+    passes = find_passes(sat, station, time.time(), hours=args.hours)
+    print(f"[PASS] {len(passes)} passes in {args.hours:.0f}h "
+          f"({time.perf_counter() - wall0:.2f}s)", flush=True)
+    for ps in passes:
+        print("  " + ps.describe(), flush=True)
+
+    if args.track and passes:
+        from controller import RotatorController
+
+        backend = None
+        if args.sim:
+            import sim
+            backend = sim.SimBackend(realtime=True)
+        rc = RotatorController(debug=False, backend=backend)
+        rc.start()
+        try:
+            PassFeeder.from_config(rc, passes[0]).run()
+        finally:
+            rc.shutdown()
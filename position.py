@@ -1,7 +1,13 @@
 # position.py
 import time
 import statistics
-import Adafruit_GPIO.I2C as I2C
+import threading
+from array import array
+
+try:
+    import Adafruit_GPIO.I2C as I2C
+except ImportError:
+    I2C = None  # no I2C stack (dev box): only the simulated device from sim.py works
 
 import config
 
@@ -14,26 +20,241 @@ def wrap_delta_deg(a, b):
 
 
 class AS5600:
+    # Register map (only what we use).
+    #   0x07/0x08 CONF (volatile unless burned; we never burn)
+    #   0x0B STATUS
+    #   0x0C/0x0D RAW ANGLE (unscaled)
+    #   0x0E/0x0F ANGLE (scaled output; equals raw angle with ZPOS/MPOS unprogrammed)
+    # Historically this code reads 0x0E/0x0F and calls it RAW_ANGLE; calibration
+    # offsets in rotator_cal.json are taken against that register, so keep it.
+    #   0x1A AGC
+    #   0x1B/0x1C MAGNITUDE
+    CONF_HI = 0x07
+    CONF_LO = 0x08
+    STATUS = 0x0B
     RAW_ANGLE_MSB = 0x0E
     RAW_ANGLE_LSB = 0x0F
+    AGC = 0x1A
+    MAGNITUDE_MSB = 0x1B
+
+    # STATUS bits
+    STATUS_MH = 0x08  # magnet too strong
+    STATUS_ML = 0x10  # magnet too weak
+    STATUS_MD = 0x20  # magnet detected
 
-    def __init__(self, busnum, name="ENC"):
-        self.i2c = I2C.get_i2c_device(config.AS5600_ADDR, busnum=busnum)
+    def __init__(self, busnum, name="ENC", i2c=None, clock=time):
+        # i2c/clock are injectable so sim.py can supply a simulated device and
+        # a faster-than-real-time clock. Bus timing below always uses real time.
+        if i2c is None:
+            i2c = I2C.get_i2c_device(config.AS5600_ADDR, busnum=busnum)
+        self.i2c = i2c
+        self.clock = clock
+        self.busnum = busnum
         self.name = name
         self.last_deg = None
+        self.last_status = None
 
-    def _read_raw_once(self):
+        self.burst = bool(getattr(config, "AS5600_BURST_READ", True))
+
+        # Software oversampling; drops to AS5600_ONCHIP_SAMPLES_PER_READ once
+        # the on-chip slow filter has been configured.
+        self.samples_per_read = int(config.SAMPLES_PER_READ)
+        self.onchip_filter = False
+
+        # Magnet health, refreshed every AS5600_HEALTH_INTERVAL_S from the read path
+        self.health = {
+            "magnet_detected": None,
+            "too_weak": None,
+            "too_strong": None,
+            "agc": None,
+            "magnitude": None,
+            "ts": None,
+            "weak_events": 0,
+            "strong_events": 0,
+            "lost_events": 0,
+        }
+        self._health_interval_s = float(getattr(config, "AS5600_HEALTH_INTERVAL_S", 1.0))
+        self._next_health_ts = 0.0
+
+        # Bus accounting (per instance)
+        self.i2c_transactions = 0
+        self.read_count = 0
+        self.last_read_s = 0.0
+        self.total_read_s = 0.0
+        self.max_read_s = 0.0
+
+    def _account(self, t0, transactions):
+        self.i2c_transactions += transactions
+        dt = time.perf_counter() - t0
+        self.read_count += 1
+        self.last_read_s = dt
+        self.total_read_s += dt
+        if dt > self.max_read_s:
+            self.max_read_s = dt
+
+    def _read_raw_bytewise(self):
+        # Two separate transactions; MSB and LSB can come from different conversions.
+        t0 = time.perf_counter()
         high = self.i2c.readU8(self.RAW_ANGLE_MSB)
         low  = self.i2c.readU8(self.RAW_ANGLE_LSB)
+        self._account(t0, 2)
+        return ((high << 8) | low) & 0x0FFF
+
+    def _read_raw_burst(self, include_status=False):
+        # One auto-increment block read, both angle bytes latched together.
+        t0 = time.perf_counter()
+        if include_status:
+            b = self.i2c.readList(self.STATUS, 5)   # STATUS, RAW ANGLE(2), ANGLE(2)
+            self._update_health(b[0])
+            high, low = b[3], b[4]
+        else:
+            b = self.i2c.readList(self.RAW_ANGLE_MSB, 2)
+            high, low = b[0], b[1]
+        self._account(t0, 1)
         return ((high << 8) | low) & 0x0FFF
 
+    def _read_raw_once(self):
+        if self._health_interval_s > 0 and self.clock.monotonic() >= self._next_health_ts:
+            self._next_health_ts = self.clock.monotonic() + self._health_interval_s
+            try:
+                self.poll_health()
+            except Exception:
+                pass
+        if self.burst:
+            return self._read_raw_burst()
+        return self._read_raw_bytewise()
+
+    # ---------------------------
+    # On-chip filter / hysteresis (CONF) and magnet health
+    # ---------------------------
+
+    def read_conf(self):
+        b = self.i2c.readList(self.CONF_HI, 2)
+        self.i2c_transactions += 1
+        return b[0], b[1]
+
+    def configure(self, slow_filter=None, fast_threshold=None, hysteresis=None):
+        """
+        Read-modify-write CONF. Any field left as None is kept.
+          slow_filter:    0..3  (0=16x, 1=8x, 2=4x, 3=2x)
+          fast_threshold: 0..7  (0=slow filter only, 1=6 LSB ... 7=10 LSB)
+          hysteresis:     0..3  (0=off, 1..3 LSB) - applies to the ANGLE register we read
+        Not burned to OTP; re-applied on every start.
+        """
+        hi, lo = self.read_conf()
+        if slow_filter is not None:
+            hi = (hi & ~0x03) | (int(slow_filter) & 0x03)
+        if fast_threshold is not None:
+            hi = (hi & ~0x1C) | ((int(fast_threshold) & 0x07) << 2)
+        if hysteresis is not None:
+            lo = (lo & ~0x0C) | ((int(hysteresis) & 0x03) << 2)
+        self.i2c.writeList(self.CONF_HI, [hi & 0xFF, lo & 0xFF])
+        self.i2c_transactions += 1
+        return hi, lo
+
+    def configure_from_config(self):
+        """
+        Apply AS5600_SLOW_FILTER / AS5600_FAST_FILTER_THRESHOLD / AS5600_HYSTERESIS
+        and, if that worked, drop software oversampling.
+        """
+        if not bool(getattr(config, "AS5600_CONFIGURE_CONF", False)):
+            return False
+        try:
+            self.configure(
+                slow_filter=getattr(config, "AS5600_SLOW_FILTER", None),
+                fast_threshold=getattr(config, "AS5600_FAST_FILTER_THRESHOLD", None),
+                hysteresis=getattr(config, "AS5600_HYSTERESIS", None),
+            )
+        except Exception as e:
+            print(f"[{self.name}] CONF write failed, keeping software oversampling: {e}", flush=True)
+            return False
+        self.onchip_filter = True
+        self.samples_per_read = max(1, int(getattr(config, "AS5600_ONCHIP_SAMPLES_PER_READ", 1)))
+        return True
+
+    def poll_health(self):
+        """
+        Reads STATUS, AGC and MAGNITUDE and updates self.health.
+        Magnet condition changes are printed once per transition.
+        """
+        status = self.i2c.readU8(self.STATUS)
+        b = self.i2c.readList(self.AGC, 3)  # AGC, MAGNITUDE hi, MAGNITUDE lo
+        self.i2c_transactions += 2
+        self._update_health(status, agc=b[0], magnitude=((b[1] << 8) | b[2]) & 0x0FFF)
+        return self.health
+
+    def _update_health(self, status, agc=None, magnitude=None):
+        h = self.health
+        md = bool(status & self.STATUS_MD)
+        ml = bool(status & self.STATUS_ML)
+        mh = bool(status & self.STATUS_MH)
+
+        if ml and not h["too_weak"]:
+            h["weak_events"] += 1
+            print(f"[{self.name}] magnet too weak (AGC at max)", flush=True)
+        if mh and not h["too_strong"]:
+            h["strong_events"] += 1
+            print(f"[{self.name}] magnet too strong (AGC at min)", flush=True)
+        if (not md) and h["magnet_detected"] is not False:
+            h["lost_events"] += 1
+            print(f"[{self.name}] magnet not detected", flush=True)
+
+        self.last_status = status
+        h["magnet_detected"] = md
+        h["too_weak"] = ml
+        h["too_strong"] = mh
+        if agc is not None:
+            h["agc"] = agc
+        if magnitude is not None:
+            h["magnitude"] = magnitude
+        h["ts"] = self.clock.time()
+
     def read_degrees_once(self):
         raw = self._read_raw_once()
         return (raw * 360.0) / 4096.0
 
+    def read_sample(self):
+        """
+        One retried single-sample read. Returns (monotonic_ts, degrees).
+        """
+        for attempt in range(config.I2C_RETRIES):
+            try:
+                deg = self.read_degrees_once()
+                return self.clock.monotonic(), deg
+            except Exception:
+                if attempt == config.I2C_RETRIES - 1:
+                    raise
+                self.clock.sleep(0.005)
+
+    def read_status_and_degrees(self):
+        """
+        Single block read of STATUS + angle. Returns (status_byte, degrees).
+        """
+        raw = self._read_raw_burst(include_status=True)
+        return self.last_status, (raw * 360.0) / 4096.0
+
+    def bus_stats(self):
+        """
+        Per-encoder bus accounting since startup (seconds are wall time on the bus).
+        """
+        n = self.read_count
+        return {
+            "name": self.name,
+            "bus": self.busnum,
+            "burst": self.burst,
+            "reads": n,
+            "i2c_transactions": self.i2c_transactions,
+            "last_read_s": self.last_read_s,
+            "avg_read_s": (self.total_read_s / n) if n else 0.0,
+            "max_read_s": self.max_read_s,
+        }
+
     def read_degrees_filtered(self):
+        # Oversamples are taken back-to-back. With burst reads each sample is
+        # a single coherent conversion, so there is no MSB/LSB tearing to wait out.
+        gap_s = 0.0 if self.burst else 0.002
         samples = []
-        for _ in range(config.SAMPLES_PER_READ):
+        for _ in range(self.samples_per_read):
             for attempt in range(config.I2C_RETRIES):
                 try:
                     samples.append(self.read_degrees_once())
@@ -43,8 +264,9 @@ class AS5600:
                         if self.last_deg is not None:
                             return self.last_deg
                         raise
-                    time.sleep(0.005)
-            time.sleep(0.002)
+                    self.clock.sleep(0.005)
+            if gap_s > 0:
+                self.clock.sleep(gap_s)
 
         med = statistics.median(samples)
 
@@ -57,18 +279,298 @@ class AS5600:
         return med
 
 
+class SampleRing:
+    """
+    Fixed-size ring of (timestamp, degrees) pairs backed by two array('d').
+    Single writer, any number of readers, no lock: the writer fills the slot
+    first and only then bumps `count`, so readers never see a half-written
+    newest sample.
+    """
+    def __init__(self, size):
+        self.size = int(size)
+        self.ts = array("d", [0.0]) * self.size
+        self.val = array("d", [0.0]) * self.size
+        self.count = 0  # total samples ever written
+
+    def push(self, ts, value):
+        i = self.count % self.size
+        self.ts[i] = ts
+        self.val[i] = value
+        self.count += 1
+
+    def latest(self):
+        n = self.count
+        if n == 0:
+            return None
+        i = (n - 1) % self.size
+        return self.ts[i], self.val[i]
+
+    def last_values(self, k):
+        n = self.count
+        k = min(int(k), n, self.size)
+        return [self.val[(n - 1 - j) % self.size] for j in range(k)]
+
+
+class EncoderStale(RuntimeError):
+    """
+    An EncoderSampler has no sample newer than its stale_s.
+    """
+
+
+class EncoderSampler:
+    """
+    Background thread that samples one AS5600 at its own rate into a SampleRing.
+
+    Duck-types the read side of AS5600 (read_degrees_filtered / read_degrees_once)
+    so UnwrappedAngle and the stable_read_* helpers work unchanged, but reads
+    come from memory in O(1) instead of touching the bus.
+    """
+    def __init__(self, encoder: AS5600, hz, ring_size=64, stale_s=0.5):
+        self.enc = encoder
+        self.name = encoder.name
+        self.clock = encoder.clock
+        self.period = 1.0 / float(hz)
+        self.ring = SampleRing(ring_size)
+        self.stale_s = float(stale_s)
+        self.last_deg = None
+
+        self.errors = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"sampler-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        next_ts = self.clock.monotonic()
+        while self._running:
+            try:
+                deg = self.enc.read_degrees_once()
+                self.ring.push(self.clock.monotonic(), deg)
+            except Exception:
+                self.errors += 1
+
+            next_ts += self.period
+            sleep_for = next_ts - self.clock.monotonic()
+            if sleep_for > 0:
+                self.clock.sleep(sleep_for)
+            else:
+                # fell behind (slow bus): don't try to catch up with a burst
+                next_ts = self.clock.monotonic()
+
+    def wait_ready(self, timeout_s=None):
+        """
+        Block until the first sample lands (startup only, never from a tick).
+        """
+        deadline = self.clock.monotonic() + (self.stale_s if timeout_s is None else float(timeout_s))
+        while self.ring.latest() is None:
+            if self.clock.monotonic() >= deadline:
+                raise RuntimeError(f"{self.name}: encoder sampler produced no samples")
+            self.clock.sleep(self.period)
+
+    def _latest_fresh(self):
+        # Never waits: a stale newest sample means the sampler thread or the
+        # bus is stuck, and the control tick must find out now.
+        s = self.ring.latest()
+        if s is None:
+            raise EncoderStale(f"{self.name}: encoder sampler has no samples")
+        age = self.clock.monotonic() - s[0]
+        if age > self.stale_s:
+            raise EncoderStale(f"{self.name}: encoder sampler stale ({age:.3f}s)")
+        return s
+
+    def age_s(self):
+        s = self.ring.latest()
+        return None if s is None else self.clock.monotonic() - s[0]
+
+    def read_degrees_once(self):
+        return self._latest_fresh()[1]
+
+    def read_sample(self):
+        return self._latest_fresh()
+
+    def read_degrees_filtered(self):
+        self._latest_fresh()
+        vals = self.ring.last_values(self.enc.samples_per_read)
+
+        # Median of the newest samples; unwrap around the newest one so a
+        # 0/360 crossing inside the window doesn't skew the median.
+        ref = vals[0]
+        med = (ref + statistics.median(wrap_delta_deg(v, ref) for v in vals)) % 360.0
+
+        if self.last_deg is not None:
+            jump = abs(wrap_delta_deg(med, self.last_deg))
+            if jump > config.MAX_JUMP_DEG:
+                med = self.last_deg
+
+        self.last_deg = med
+        return med
+
+
+class AngleEstimator:
+    """
+    Alpha-beta tracker for one axis. Fed single wrapped samples, keeps a
+    continuous (unwrapped) angle, angular velocity in deg/s and a 0..1
+    confidence. Samples whose innovation exceeds gate_deg are rejected;
+    after `reinit_after` rejections in a row the filter re-seeds on the
+    measurement instead of locking out forever.
+    """
+    def __init__(self, alpha=0.5, beta=0.1, gate_deg=25.0, noise_deg=0.1, reinit_after=3):
+        self.alpha = float(alpha)
+        self.beta = float(beta)
+        self.gate_deg = float(gate_deg)
+        self.noise_deg = float(noise_deg)
+        self.reinit_after = int(reinit_after)
+        self.reset()
+
+    def reset(self):
+        self.initialized = False
+        self.angle = 0.0
+        self.velocity = 0.0
+        self.confidence = 0.0
+        self.last_ts = None
+        self.rejects = 0
+        self._resid_ms = 0.0
+
+    def _seed(self, ts, deg):
+        self.initialized = True
+        self.angle = float(deg)
+        self.velocity = 0.0
+        self.confidence = 0.5
+        self.last_ts = ts
+        self.rejects = 0
+        self._resid_ms = 0.0
+
+    def update(self, ts, measured_wrapped_deg):
+        if not self.initialized:
+            self._seed(ts, measured_wrapped_deg)
+            return self.angle
+
+        dt = ts - self.last_ts
+        if dt <= 0:
+            # same sample again (loop faster than sampler) -> nothing new
+            return self.angle
+
+        pred = self.angle + self.velocity * dt
+        r = wrap_delta_deg(measured_wrapped_deg, pred % 360.0)
+
+        if abs(r) > self.gate_deg:
+            self.rejects += 1
+            self.confidence *= 0.5
+            if self.rejects >= self.reinit_after:
+                self._seed(ts, pred + r)
+            else:
+                self.angle = pred
+                self.last_ts = ts
+            return self.angle
+
+        self.rejects = 0
+        self.angle = pred + self.alpha * r
+        self.velocity += (self.beta / dt) * r
+        self.last_ts = ts
+
+        self._resid_ms = 0.9 * self._resid_ms + 0.1 * r * r
+        rms = self._resid_ms ** 0.5
+        self.confidence = min(1.0, self.noise_deg / max(self.noise_deg, rms))
+        return self.angle
+
+    @property
+    def wrapped(self):
+        return self.angle % 360.0
+
+
+def make_estimator():
+    """
+    AngleEstimator from config, or None when POSITION_ESTIMATOR is off.
+    """
+    if not bool(getattr(config, "POSITION_ESTIMATOR", False)):
+        return None
+    return AngleEstimator(
+        alpha=float(getattr(config, "EST_ALPHA", 0.5)),
+        beta=float(getattr(config, "EST_BETA", 0.1)),
+        gate_deg=float(getattr(config, "EST_GATE_DEG", config.MAX_JUMP_DEG)),
+        noise_deg=float(getattr(config, "EST_NOISE_DEG", 0.1)),
+        reinit_after=int(getattr(config, "EST_REINIT_AFTER", 3)),
+    )
+
+
 class UnwrappedAngle:
     """
     Tracks continuous degrees by accumulating wrap-safe deltas
-    from the filtered wrapped reading.
+    from the filtered wrapped reading. `encoder` may be an AS5600 or
+    an EncoderSampler.
+
+    With an AngleEstimator attached, each read() takes ONE sample and the
+    estimator supplies the angle (no median-of-N), plus velocity(). A failed
+    read holds the last estimate for at most max_coast_s, reporting zero
+    velocity and lowered confidence meanwhile; after that, or at once for
+    EncoderStale, the error propagates so the control loop stops the motors.
     """
-    def __init__(self, encoder: AS5600):
+    def __init__(self, encoder, estimator=None, max_coast_s=None):
         self.enc = encoder
+        self.est = estimator
+        self.clock = getattr(encoder, "clock", time)
+        if max_coast_s is None:
+            max_coast_s = getattr(config, "ENCODER_COAST_S", 0.1)
+        self.max_coast_s = float(max_coast_s)
         self.initialized = False
         self.last_wrapped = None
         self.unwrapped = 0.0
+        self._coast_since = None
+
+    def velocity(self):
+        """
+        Estimated deg/s, or None without an estimator.
+        """
+        if self.est is None or not self.est.initialized:
+            return None
+        return self.est.velocity
+
+    def confidence(self):
+        if self.est is None:
+            return None
+        return self.est.confidence
+
+    def _hold(self):
+        # the angle is no longer measured: don't let anyone act on a velocity
+        self.est.velocity = 0.0
+        self.est.confidence *= 0.5
+
+    def _read_estimated(self):
+        try:
+            ts, w = self.enc.read_sample()
+        except EncoderStale:
+            if self.est.initialized:
+                self._hold()
+            raise
+        except Exception:
+            if not self.est.initialized:
+                raise
+            now = self.clock.monotonic()
+            if self._coast_since is None:
+                self._coast_since = now
+            self._hold()
+            if now - self._coast_since > self.max_coast_s:
+                raise
+            # brief bus error: coast on the last estimate
+            return self.unwrapped
+        self._coast_since = None
+        self.unwrapped = self.est.update(ts, w)
+        self.last_wrapped = self.est.wrapped
+        self.initialized = True
+        return self.unwrapped
 
     def read(self):
+        if self.est is not None:
+            return self._read_estimated()
+
         w = self.enc.read_degrees_filtered()
         if not self.initialized:
             self.initialized = True
@@ -82,21 +584,21 @@ class UnwrappedAngle:
         return self.unwrapped
 
 
-def stable_read_wrapped(enc: AS5600, seconds=0.25):
+def stable_read_wrapped(enc, seconds=0.25, clock=time):
     vals = []
-    end = time.time() + seconds
-    while time.time() < end:
+    end = clock.time() + seconds
+    while clock.time() < end:
         vals.append(enc.read_degrees_filtered())
-        time.sleep(0.02)
+        clock.sleep(0.02)
     return statistics.median(vals) if vals else enc.read_degrees_filtered()
 
 
-def stable_read_unwrapped(tracker: UnwrappedAngle, seconds=0.25):
+def stable_read_unwrapped(tracker: UnwrappedAngle, seconds=0.25, clock=time):
     vals = []
-    end = time.time() + seconds
-    while time.time() < end:
+    end = clock.time() + seconds
+    while clock.time() < end:
         vals.append(tracker.read())
-        time.sleep(0.02)
+        clock.sleep(0.02)
     return statistics.median(vals) if vals else tracker.read()
 
 
@@ -133,3 +635,52 @@ def nearest_unwrapped_target(current_unwrapped, target_az_phys_deg, az_offset_de
     raw_target_wrapped = (az_offset_deg + t_phys) % 360.0
     k = round((current_unwrapped - raw_target_wrapped) / 360.0)
     return raw_target_wrapped + 360.0 * k
+
+
+# ----------------------------
+# Cable wrap (unwrapped AZ limits)
+# ----------------------------
+# Limits are in degrees of physical AZ relative to home, continuous: with
+# (-360, 360) the antenna may turn one full turn either way from AZ=0
+# before the cable is fully wound.
+
+def wrap_candidates(target_az_phys_deg, az_offset_deg, lo_deg, hi_deg):
+    """
+    All unwrapped equivalents of a physical azimuth inside [lo_deg, hi_deg].
+    """
+    base = az_offset_deg + (target_az_phys_deg % 360.0)
+    lo = az_offset_deg + lo_deg
+    hi = az_offset_deg + hi_deg
+    k = -((base - lo) // 360.0)
+    out = []
+    while base + 360.0 * k <= hi + 1e-9:
+        out.append(base + 360.0 * k)
+        k += 1
+    return out
+
+
+def limited_unwrapped_target(ref_unwrapped, target_az_phys_deg, az_offset_deg, lo_deg, hi_deg):
+    """
+    Like nearest_unwrapped_target, but only among wraps inside the cable
+    limits: the one nearest to ref_unwrapped.
+    """
+    cands = wrap_candidates(target_az_phys_deg, az_offset_deg, lo_deg, hi_deg)
+    if not cands:
+        t = nearest_unwrapped_target(ref_unwrapped, target_az_phys_deg, az_offset_deg)
+        return min(max(t, az_offset_deg + lo_deg), az_offset_deg + hi_deg)
+    return min(cands, key=lambda c: abs(c - ref_unwrapped))
+
+
+def plan_track_wrap(current_unwrapped, track_az_deg, az_offset_deg, lo_deg, hi_deg):
+    """
+    Unwrapped value for the first point of a continuous AZ track such that
+    the whole track stays inside the cable limits (no unwind mid-track),
+    nearest to current_unwrapped. None if no wrap fits.
+    """
+    a0 = track_az_deg[0]
+    below = min(track_az_deg) - a0
+    above = max(track_az_deg) - a0
+    cands = wrap_candidates(a0, az_offset_deg, lo_deg - below, hi_deg - above)
+    if not cands:
+        return None
+    return min(cands, key=lambda c: abs(c - current_unwrapped))
@@ -0,0 +1,225 @@
+# server_bench.py
+# Latency benchmark for hamlib_server against the simulated rotator.
+#
+# Starts the server on a free local port, connects N extra clients that either
+# sit idle or poll `p` like a logger, and times get_pos round trips from one
+# measuring client. --syscalls instead feeds fixed command mixes straight into
+# hamlib_server.process_data() and counts the socket writes per read.
+#
+# Usage:
+#   python3 server_bench.py                      # 1, 10, 50, 200 idle clients
+#   python3 server_bench.py --clients 1 100 --pollers 20 --poll-hz 10
+#   python3 server_bench.py --syscalls
+
+import contextlib
+import io
+import socket
+import threading
+import time
+
+import hamlib_server
+import sim
+from controller import RotatorController
+
+
+def _connect(port):
+    c = socket.create_connection(("127.0.0.1", port))
+    c.settimeout(5.0)
+    return c
+
+
+def _read_lines(c, n):
+    data = b""
+    while data.count(b"\n") < n:
+        chunk = c.recv(4096)
+        if not chunk:
+            raise ConnectionError("server closed the connection")
+        data += chunk
+    return data
+
+
+def _poller(port, hz, stop):
+    c = _connect(port)
+    period = 1.0 / hz
+    try:
+        while not stop.is_set():
+            c.sendall(b"p\n")
+            _read_lines(c, 2)
+            stop.wait(period)
+    finally:
+        c.close()
+
+
+def measure(port, clients, pollers=0, poll_hz=10.0, samples=500):
+    """
+    get_pos round-trip percentiles (ms) with `clients` idle connections and
+    `pollers` clients polling p at poll_hz.
+    """
+    idle = [_connect(port) for _ in range(clients)]
+    stop = threading.Event()
+    threads = [threading.Thread(target=_poller, args=(port, poll_hz, stop), daemon=True)
+               for _ in range(pollers)]
+    for t in threads:
+        t.start()
+    c = _connect(port)
+    try:
+        time.sleep(0.2)
+        lat = []
+        for _ in range(samples):
+            t0 = time.perf_counter()
+            c.sendall(b"p\n")
+            _read_lines(c, 2)
+            lat.append(time.perf_counter() - t0)
+        lat.sort()
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+        c.close()
+        for x in idle:
+            x.close()
+        time.sleep(0.2)
+
+    def pct(p):
+        return lat[min(len(lat) - 1, int(len(lat) * p / 100.0))] * 1000.0
+
+    return {"p50_ms": pct(50), "p90_ms": pct(90), "p99_ms": pct(99), "max_ms": lat[-1] * 1000.0}
+
+
+def _sim_controller():
+    with contextlib.redirect_stdout(io.StringIO()):
+        rc = RotatorController(debug=False, backend=sim.SimBackend(realtime=True, seed=1))
+    rc.start()
+    return rc
+
+
+def start_server():
+    """
+    Simulated controller + hamlib_server.serve() on a free port, in a thread.
+    Returns (port, stop_fn).
+    """
+    rc = _sim_controller()
+    srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    srv.bind(("127.0.0.1", 0))
+    srv.listen(256)
+    running = [True]
+    t = threading.Thread(target=hamlib_server.serve, args=(srv, rc, lambda: running[0]), daemon=True)
+    t.start()
+
+    def stop():
+        running[0] = False
+        # wake the loop so it sees running == False
+        try:
+            _connect(srv.getsockname()[1]).close()
+        except OSError:
+            pass
+        t.join(timeout=2.0)
+        srv.close()
+        rc.shutdown()
+
+    return srv.getsockname()[1], stop
+
+
+# ----------------------------
+# Syscalls per command mix
+# ----------------------------
+# One entry = the bytes a client delivers in one read.
+MIXES = {
+    "poll": b"p\n",
+    "goto": b"P 123.40 45.00\n",
+    "gpredict": b"P 123.40 45.00\np\n",
+    "pipeline": b"p\nP 10 20\n_\n\\dump_state\np\n",
+    "extended": b"\\get_stats\n\\get_track\np\n",
+}
+
+
+class _CountingSock:
+    """
+    Socket stand-in for the server side of a client: counts write calls.
+    """
+    def __init__(self, sock):
+        self.sock = sock
+        self.writes = 0
+        self.bytes = 0
+
+    def send(self, data):
+        self.writes += 1
+        self.bytes += len(data)
+        return self.sock.send(data)
+
+
+def count_syscalls(rc, mixes=MIXES, reads=200):
+    """
+    Per mix: commands, socket writes and microseconds per read, replaying
+    the mix through process_data() over a socketpair.
+    """
+    results = {}
+    for name, payload in mixes.items():
+        n_cmds = len(hamlib_server.RotctlParser().feed(payload))
+        srv_side, cli_side = socket.socketpair()
+        cli_side.setblocking(False)
+        sock = _CountingSock(srv_side)
+        cc = hamlib_server.ClientConn(sock, "bench")
+        t_total = 0.0
+        try:
+            for _ in range(reads):
+                t0 = time.perf_counter()
+                hamlib_server.process_data(cc, payload, rc)
+                t_total += time.perf_counter() - t0
+                try:
+                    while cli_side.recv(65536):
+                        pass
+                except BlockingIOError:
+                    pass
+        finally:
+            srv_side.close()
+            cli_side.close()
+        writes = sock.writes / reads
+        results[name] = {
+            "cmds": n_cmds,
+            "writes": writes,
+            # one recv() per read plus the writes
+            "syscalls_per_cmd": (1.0 + writes) / max(1, n_cmds),
+            "bytes_per_write": sock.bytes / max(1, sock.writes),
+            "us_per_read": t_total / reads * 1e6,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    p = argparse.ArgumentParser(description="get_pos latency vs connected clients.")
+    p.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50, 200])
+    p.add_argument("--pollers", type=int, default=0, help="extra clients polling p")
+    p.add_argument("--poll-hz", type=float, default=10.0)
+    p.add_argument("--samples", type=int, default=500)
+    p.add_argument("--syscalls", action="store_true", help="count socket writes per command mix")
+    args = p.parse_args()
+
+    if args.syscalls:
+        rc = _sim_controller()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                res = count_syscalls(rc)
+        finally:
+            with contextlib.redirect_stdout(io.StringIO()):
+                rc.shutdown()
+        print(f"{'mix':10}{'cmds':>6}{'writes':>8}{'sys/cmd':>9}{'B/write':>9}{'us/read':>9}")
+        for name, r in res.items():
+            print(f"{name:10}{r['cmds']:6}{r['writes']:8.1f}{r['syscalls_per_cmd']:9.2f}"
+                  f"{r['bytes_per_write']:9.1f}{r['us_per_read']:9.1f}")
+        raise SystemExit(0)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        port, stop = start_server()
+    try:
+        print(f"{'idle':>6}{'pollers':>9}{'p50_ms':>9}{'p90_ms':>9}{'p99_ms':>9}{'max_ms':>9}")
+        for n in args.clients:
+            with contextlib.redirect_stdout(io.StringIO()):
+                r = measure(port, n, args.pollers, args.poll_hz, args.samples)
+            print(f"{n:6}{args.pollers:9}{r['p50_ms']:9.3f}{r['p90_ms']:9.3f}{r['p99_ms']:9.3f}{r['max_ms']:9.3f}")
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stop()
@@ -0,0 +1,504 @@
+# sim.py
+# Simulated rotator: motors, mechanics and AS5600 encoders, no Pi required.
+#
+# Drop-in backend for RotatorController:
+#
+#   import sim
+#   from controller import RotatorController
+#
+#   backend = sim.SimBackend()                    # virtual clock (faster than real time)
+#   rc = RotatorController(backend=backend)
+#   rc.set_target(180.0, 45.0)
+#   sim.run(rc, seconds=30.0)                     # runs in a fraction of a second
+#
+#   backend = sim.SimBackend(realtime=True)       # real clock, use rc.start() as usual
+#
+# Model (per axis, in encoder degrees):
+#   - PWM (0..255) -> drive fraction u = pwm/255
+#   - breakaway (static) and running (kinetic) friction thresholds; EL thresholds
+#     depend on elevation and direction (gravity load, self-locking worm gear)
+#   - steady speed rises linearly above the kinetic threshold up to vmax_dps,
+#     approached with a first-order time constant (motor + antenna inertia)
+#   - RELEASE coasts down, BRAKE stops faster
+#   - gear backlash: the motor side must cross a dead zone before the load moves
+#   - encoder: 12-bit quantization plus gaussian noise
+#
+# The encoders are simulated at the I2C register level, so position.AS5600 runs
+# its real code path (burst reads, CONF, STATUS/AGC) and counts transactions.
+
+import math
+import random
+import threading
+import time
+
+import config
+import position
+
+
+class Adafruit_MotorHAT:
+    """
+    Constants-only stand-in used when the real library is not installed.
+    """
+    FORWARD = 1
+    BACKWARD = 2
+    BRAKE = 3
+    RELEASE = 4
+
+
+# ----------------------------
+# Clocks
+# ----------------------------
+
+class SimClock:
+    """
+    Virtual clock with the time-module interface the controller uses.
+    sleep() just advances time, so a loop runs as fast as the CPU allows.
+    Only one thread may drive it (the controller disables its sampler and
+    read-worker threads when it sees `virtual = True`).
+    """
+    virtual = True
+
+    def __init__(self, start_epoch=1_700_000_000.0):
+        self._lock = threading.Lock()
+        self._now = 0.0
+        self._epoch = float(start_epoch)
+
+    def monotonic(self):
+        return self._now
+
+    def perf_counter(self):
+        return self._now
+
+    def time(self):
+        return self._epoch + self._now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            with self._lock:
+                self._now += float(seconds)
+
+    def advance(self, seconds):
+        self.sleep(seconds)
+
+
+# ----------------------------
+# Mechanics
+# ----------------------------
+
+class AxisModel:
+    """
+    One motor + gearbox + load, expressed in encoder degrees.
+    """
+    def __init__(self, name, forward_sign, vmax_dps=36.0, tau_s=0.08,
+                 coast_tau_s=0.05, brake_tau_s=0.015, static_frac=0.30,
+                 kinetic_ratio=0.75, backlash_deg=0.4, enc_start_deg=0.0,
+                 limits_enc=None, static_fn=None):
+        self.name = name
+        self.forward_sign = int(forward_sign)
+        self.vmax_dps = float(vmax_dps)
+        self.tau_s = float(tau_s)
+        self.coast_tau_s = float(coast_tau_s)
+        self.brake_tau_s = float(brake_tau_s)
+        self.static_frac = float(static_frac)
+        self.kinetic_ratio = float(kinetic_ratio)
+        self.backlash_deg = float(backlash_deg)
+        self.limits_enc = limits_enc          # (lo, hi) in continuous encoder degrees, or None
+        self.static_fn = static_fn            # f(axis, direction) -> breakaway fraction
+
+        self.load_deg = float(enc_start_deg)  # what the encoder sees (continuous)
+        self.motor_deg = float(enc_start_deg) # motor side of the backlash gap
+        self.vel_dps = 0.0                    # motor-side velocity
+
+        self.pwm = 0
+        self.mode = Adafruit_MotorHAT.RELEASE
+
+        # bookkeeping for benchmarks
+        self.breakaways = 0
+        self.travel_deg = 0.0
+
+    def breakaway_frac(self, direction):
+        if self.static_fn is not None:
+            return self.static_fn(self, direction)
+        return self.static_frac
+
+    def _drive(self):
+        """
+        Signed drive direction in encoder terms and drive fraction.
+        """
+        if self.mode == Adafruit_MotorHAT.FORWARD:
+            return self.forward_sign, self.pwm / 255.0
+        if self.mode == Adafruit_MotorHAT.BACKWARD:
+            return -self.forward_sign, self.pwm / 255.0
+        return 0, 0.0
+
+    def is_idle(self):
+        d, u = self._drive()
+        return self.vel_dps == 0.0 and (d == 0 or u <= 0.0)
+
+    def step(self, dt):
+        d, u = self._drive()
+
+        if d == 0 or u <= 0.0:
+            tau = self.brake_tau_s if self.mode == Adafruit_MotorHAT.BRAKE else self.coast_tau_s
+            self.vel_dps *= math.exp(-dt / tau)
+            if abs(self.vel_dps) < 0.05:
+                self.vel_dps = 0.0
+        else:
+            static = self.breakaway_frac(d)
+            kinetic = static * self.kinetic_ratio
+            moving = abs(self.vel_dps) > 0.0 and (self.vel_dps * d) > 0
+
+            if not moving and u < static:
+                # stuck: static friction holds (or we are reversing through zero)
+                self.vel_dps *= math.exp(-dt / self.coast_tau_s)
+                if abs(self.vel_dps) < 0.05:
+                    self.vel_dps = 0.0
+            else:
+                if not moving and self.vel_dps == 0.0:
+                    self.breakaways += 1
+                if u <= kinetic:
+                    v_ss = 0.0
+                else:
+                    v_ss = self.vmax_dps * (u - kinetic) / max(1e-6, 1.0 - kinetic)
+                self.vel_dps += (d * v_ss - self.vel_dps) * (1.0 - math.exp(-dt / self.tau_s))
+                if v_ss == 0.0 and abs(self.vel_dps) < 0.05:
+                    self.vel_dps = 0.0
+
+        # motor side moves; load follows once the backlash gap is taken up
+        self.motor_deg += self.vel_dps * dt
+        half = self.backlash_deg / 2.0
+        gap = self.motor_deg - self.load_deg
+        before = self.load_deg
+        if gap > half:
+            self.load_deg = self.motor_deg - half
+        elif gap < -half:
+            self.load_deg = self.motor_deg + half
+
+        if self.limits_enc is not None:
+            lo, hi = self.limits_enc
+            if self.load_deg < lo or self.load_deg > hi:
+                self.load_deg = min(hi, max(lo, self.load_deg))
+                self.motor_deg = self.load_deg
+                self.vel_dps = 0.0
+
+        self.travel_deg += abs(self.load_deg - before)
+
+
+class SimPlant:
+    """
+    Both axes, integrated lazily up to the clock's current time whenever a
+    motor command or encoder read touches them (works with real or virtual
+    clocks, from any thread).
+    """
+    SUBSTEP_S = 0.001
+
+    def __init__(self, clock, cal=None, az_start_enc=100.0, el_start_phys=0.0,
+                 noise_deg=0.03, seed=None):
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._t = clock.monotonic()
+        self.noise_deg = float(noise_deg)
+        self.rng = random.Random(seed)
+
+        cal = cal if cal is not None else config.load_cal()
+        self.el_offset_deg = float(cal.get("el_offset_deg", 0.0))
+
+        def el_static(axis, direction):
+            # Gravity load on a self-locking worm: UP is hardest near the
+            # horizon, DOWN is hardest near zenith.
+            el = math.radians(self.el_phys())
+            c = max(0.0, math.cos(el))
+            if direction > 0:
+                return 0.20 + 0.45 * c
+            return 0.80 - 0.45 * c
+
+        el_enc0 = self.el_offset_deg + el_start_phys
+        self.az = AxisModel("AZ", config.M1_FORWARD_SIGN, static_frac=0.30,
+                            backlash_deg=0.4, enc_start_deg=az_start_enc)
+        self.el = AxisModel("EL", config.M2_FORWARD_SIGN, static_fn=el_static,
+                            backlash_deg=0.6, enc_start_deg=el_enc0,
+                            limits_enc=(self.el_offset_deg - 3.0, self.el_offset_deg + 93.0))
+
+        self._by_bus = {config.ENCODER1_BUS: self.az, config.ENCODER2_BUS: self.el}
+
+    def el_phys(self):
+        return self.el.load_deg - self.el_offset_deg
+
+    def axis_for_bus(self, busnum):
+        return self._by_bus[busnum]
+
+    def axis_for_motor(self, num):
+        return self.az if num == 1 else self.el
+
+    def advance(self):
+        with self._lock:
+            now = self.clock.monotonic()
+            while self._t < now:
+                if self.az.is_idle() and self.el.is_idle():
+                    self._t = now
+                    break
+                dt = min(self.SUBSTEP_S, now - self._t)
+                self.az.step(dt)
+                self.el.step(dt)
+                self._t += dt
+
+    def encoder_counts(self, axis):
+        with self._lock:
+            self.advance()
+            deg = axis.load_deg + self.rng.gauss(0.0, self.noise_deg)
+        return int(round((deg % 360.0) * 4096.0 / 360.0)) % 4096
+
+
+# ----------------------------
+# I2C / MotorHAT stand-ins
+# ----------------------------
+
+class SimAS5600Device:
+    """
+    Register-level AS5600 on top of one AxisModel (Adafruit_GPIO.I2C.Device API).
+    """
+    def __init__(self, plant, axis, status=0x20, agc=0x80, magnitude=0x600):
+        self.plant = plant
+        self.axis = axis
+        self.conf = [0x00, 0x00]
+        self.status = status
+        self.agc = agc
+        self.magnitude = magnitude
+        self.transactions = 0
+
+    def _reg(self, reg, counts):
+        if reg == 0x07:
+            return self.conf[0]
+        if reg == 0x08:
+            return self.conf[1]
+        if reg == 0x0B:
+            return self.status
+        if reg in (0x0C, 0x0E):
+            return (counts >> 8) & 0x0F
+        if reg in (0x0D, 0x0F):
+            return counts & 0xFF
+        if reg == 0x1A:
+            return self.agc
+        if reg == 0x1B:
+            return (self.magnitude >> 8) & 0x0F
+        if reg == 0x1C:
+            return self.magnitude & 0xFF
+        return 0
+
+    def readU8(self, reg):
+        self.transactions += 1
+        return self._reg(reg, self.plant.encoder_counts(self.axis))
+
+    def readList(self, reg, length):
+        self.transactions += 1
+        counts = self.plant.encoder_counts(self.axis)  # one conversion per transaction
+        return bytearray(self._reg(reg + i, counts) for i in range(length))
+
+    def write8(self, reg, value):
+        self.writeList(reg, [value])
+
+    def writeList(self, reg, data):
+        self.transactions += 1
+        for i, v in enumerate(data):
+            if reg + i in (0x07, 0x08):
+                self.conf[reg + i - 0x07] = int(v) & 0xFF
+
+
+class SimPCA9685:
+    """
+    Register-level PCA9685 (Adafruit_GPIO.I2C.Device API). After every write
+    the LED channels are decoded back into per-axis PWM + H-bridge mode, so
+    both the library-style SimDCMotor and movement.MotorOutputs drive the
+    plant through the same registers. Auto-increment follows MODE1.AI.
+    """
+    def __init__(self, hat):
+        self.hat = hat
+        self.regs = bytearray(256)
+        self.transactions = 0
+
+    def readU8(self, reg):
+        self.transactions += 1
+        return self.regs[reg]
+
+    def write8(self, reg, value):
+        self.writeList(reg, [value])
+
+    def writeList(self, reg, data):
+        self.hat.plant.advance()
+        self.transactions += 1
+        auto_inc = bool(self.regs[0x00] & 0x20)
+        for i, v in enumerate(data):
+            self.regs[(reg + i) if auto_inc else reg] = int(v) & 0xFF
+        self.hat._decode()
+
+    def channel(self, ch):
+        base = 0x06 + 4 * ch
+        r = self.regs
+        on = r[base] | (r[base + 1] << 8)
+        off = r[base + 2] | (r[base + 3] << 8)
+        return on, off
+
+
+class SimPWM:
+    def __init__(self, hat):
+        self.i2c = SimPCA9685(hat)
+
+    def setPWM(self, channel, on, off):
+        # Same 4 single-byte writes as Adafruit_PWM_Servo_Driver.PWM.setPWM
+        base = 0x06 + 4 * channel
+        self.i2c.write8(base, on & 0xFF)
+        self.i2c.write8(base + 1, on >> 8)
+        self.i2c.write8(base + 2, off & 0xFF)
+        self.i2c.write8(base + 3, off >> 8)
+
+
+class SimDCMotor:
+    """
+    Same calls and register traffic as Adafruit_DCMotor:
+    setSpeed -> one setPWM (4 writes), run -> two setPin (8 writes).
+    """
+    def __init__(self, hat, pins):
+        self.hat = hat
+        self.PWMpin, self.IN1pin, self.IN2pin = pins
+
+    def _set_pin(self, pin, value):
+        if value:
+            self.hat._pwm.setPWM(pin, 4096, 0)
+        else:
+            self.hat._pwm.setPWM(pin, 0, 4096)
+
+    def setSpeed(self, speed):
+        self.hat.commands += 1
+        self.hat._pwm.setPWM(self.PWMpin, 0, max(0, min(255, int(speed))) * 16)
+
+    def run(self, command):
+        self.hat.commands += 1
+        if command == Adafruit_MotorHAT.FORWARD:
+            self._set_pin(self.IN2pin, 0)
+            self._set_pin(self.IN1pin, 1)
+        elif command == Adafruit_MotorHAT.BACKWARD:
+            self._set_pin(self.IN1pin, 0)
+            self._set_pin(self.IN2pin, 1)
+        elif command == Adafruit_MotorHAT.RELEASE:
+            self._set_pin(self.IN1pin, 0)
+            self._set_pin(self.IN2pin, 0)
+        # like the real library, BRAKE is not implemented at this level
+
+
+class SimMotorHAT:
+    def __init__(self, plant):
+        import movement  # lazy: movement falls back to this module for constants
+
+        self.plant = plant
+        self.commands = 0
+        self._pins = {n: movement.MOTOR_PINS[n] for n in (1, 2)}
+        self._pwm = SimPWM(self)
+        self._motors = {}
+
+    @property
+    def i2c_transactions(self):
+        return self._pwm.i2c.transactions
+
+    def getMotor(self, num):
+        if num not in self._motors:
+            self._motors[num] = SimDCMotor(self, self._pins[num])
+        return self._motors[num]
+
+    def _decode(self):
+        dev = self._pwm.i2c
+
+        def high(ch):
+            on, off = dev.channel(ch)
+            return bool(on & 0x1000) and not (off & 0x1000)
+
+        for num, (pwm_pin, in1, in2) in self._pins.items():
+            axis = self.plant.axis_for_motor(num)
+            on, off = dev.channel(pwm_pin)
+            if off & 0x1000:
+                duty = 0
+            elif on & 0x1000:
+                duty = 255
+            else:
+                duty = min(255, (off & 0x0FFF) // 16)
+            a, b = high(in1), high(in2)
+            if a and b:
+                mode = Adafruit_MotorHAT.BRAKE
+            elif a:
+                mode = Adafruit_MotorHAT.FORWARD
+            elif b:
+                mode = Adafruit_MotorHAT.BACKWARD
+            else:
+                mode = Adafruit_MotorHAT.RELEASE
+            axis.pwm = duty
+            axis.mode = mode
+
+
+class SimBackend:
+    """
+    What RotatorController(backend=...) needs: clock, init_motorhat(), make_encoder().
+    Learned EL breakaway values and EL load samples stay in memory.
+    """
+    breakaway_file = None
+    el_load_log_file = None
+
+    def __init__(self, realtime=False, clock=None, plant=None, **plant_kwargs):
+        if clock is None:
+            clock = time if realtime else SimClock()
+        self.clock = clock
+        self.plant = plant if plant is not None else SimPlant(clock, **plant_kwargs)
+        self.motorhat = None
+        self.encoders = []
+
+    def init_motorhat(self):
+        self.motorhat = SimMotorHAT(self.plant)
+        return self.motorhat
+
+    def make_encoder(self, busnum, name="ENC"):
+        dev = SimAS5600Device(self.plant, self.plant.axis_for_bus(busnum))
+        enc = position.AS5600(busnum, name=name, i2c=dev, clock=self.clock)
+        self.encoders.append(enc)
+        return enc
+
+
+def run(rc, seconds, until=None):
+    """
+    Drive rc's control loop on a virtual clock for `seconds` of simulated time
+    (or until `until(rc)` is true). Returns simulated seconds elapsed.
+    """
+    clock = rc.clock
+    period = 1.0 / float(config.CONTROL_HZ)
+    t0 = clock.monotonic()
+    end = t0 + float(seconds)
+    while clock.monotonic() < end:
+        rc._tick()
+        if until is not None and until(rc):
+            break
+        clock.sleep(period)
+    return clock.monotonic() - t0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from controller import RotatorController
+
+    p = argparse.ArgumentParser(description="Run the controller against the simulated rotator.")
+    p.add_argument("--az", type=float, default=180.0)
+    p.add_argument("--el", type=float, default=45.0)
+    p.add_argument("--seconds", type=float, default=30.0)
+    p.add_argument("--debug", action="store_true")
+    args = p.parse_args()
+
+    backend = SimBackend(seed=1)
+    rc = RotatorController(debug=args.debug, backend=backend)
+    rc.set_target(args.az, args.el)
+
+    wall0 = time.perf_counter()
+    step = 1.0
+    t = 0.0
+    while t < args.seconds:
+        t += run(rc, step)
+        az, el = rc.get_position()
+        print(f"[SIM] t={t:6.2f}s  AZ={az:7.2f}°  EL={el:6.2f}°", flush=True)
+    wall = time.perf_counter() - wall0
+    print(f"[SIM] {args.seconds:.1f}s simulated in {wall:.2f}s wall ({args.seconds / wall:.0f}x real time)", flush=True)
@@ -0,0 +1,136 @@
+# rotctld parser: commands split across reads.
+
+import hamlib_server
+from hamlib_server import RotctlParser
+
+
+def feed_all(parser, *reads):
+    out = []
+    for data in reads:
+        out += parser.feed(data)
+    return out
+
+
+def test_split_trailing_argument_waits_for_newline():
+    p = RotctlParser()
+    assert p.feed(b"p\n") == [("get_pos", [])]
+    assert p.feed(b"P 10 2") == []
+    assert p.pending()
+    assert p.feed(b"5\n") == [("set_pos", ["10", "25"])]
+    assert not p.pending()
+
+
+def test_split_inside_decimal():
+    p = RotctlParser()
+    assert feed_all(p, b"p\n", b"P 10 20", b".5\n") == [("get_pos", []), ("set_pos", ["10", "20.5"])]
+
+
+def test_split_name_and_separators():
+    p = RotctlParser()
+    assert feed_all(p, b"\\get", b"_pos\nP", b" 1", b"0 2", b"0\n") == [
+        ("get_pos", []), ("set_pos", ["10", "20"])]
+
+
+def test_whole_send_client_completes_at_end_of_read():
+    p = RotctlParser()
+    feed_all(p, b"p\n", b"P 1 2\n", b"p\n")
+    assert p.feed(b"P 10 20") == [("set_pos", ["10", "20"])]
+    assert p.feed(b"\n") == []
+
+
+def test_split_read_resets_whole_send_streak():
+    p = RotctlParser()
+    feed_all(p, b"p\n", b"P 1 2\n")
+    assert p.feed(b"P 10 2") == []
+    assert p.feed(b"5\n") == [("set_pos", ["10", "25"])]
+    assert p.feed(b"P 10 2") == []
+
+
+def test_flush_completes_unterminated_command():
+    p = RotctlParser()
+    p.feed(b"p\n")
+    assert p.feed(b"P 10 20") == []
+    assert p.flush() == [("set_pos", ["10", "20"])]
+    assert p.flush() == []
+
+
+def test_client_without_terminators_completes_at_end_of_read():
+    p = RotctlParser()
+    assert p.feed(b"P 20 5") == [("set_pos", ["20", "5"])]
+    assert p.feed(b"s") == [("stop", [])]
+    assert p.feed(b"pP 10 20") == [("get_pos", []), ("set_pos", ["10", "20"])]
+
+
+def test_incomplete_line_is_an_error():
+    p = RotctlParser()
+    assert p.feed(b"P 10\n") == [(None, ())]
+
+
+def test_process_data_holds_partial_until_idle():
+    class Sock:
+        def __init__(self):
+            self.sent = bytearray()
+
+        def send(self, data):
+            self.sent += data
+            return len(data)
+
+    class Rc:
+        def __init__(self):
+            self.targets = []
+
+        def set_target(self, az, el):
+            self.targets.append((az, el))
+
+        def stop(self):
+            pass
+
+    cc = hamlib_server.ClientConn(Sock(), "test")
+    rc = Rc()
+    assert hamlib_server.process_data(cc, b"S\nP 10 2", rc)
+    assert cc.partial_due is not None and rc.targets == []
+    assert hamlib_server.process_data(cc, b"5\n", rc)
+    assert cc.partial_due is None
+    assert rc.targets == [(10.0, 25.0)]
+    assert bytes(cc.sock.sent) == b"RPRT 0\nRPRT 0\n"
+    assert hamlib_server.process_data(cc, b"P 30 40", rc)
+    assert hamlib_server.flush_partial(cc, rc)
+    assert rc.targets[-1] == (30.0, 40.0)
+
+
+def test_wakeup_signals_again_after_drain():
+    w = hamlib_server.Wakeup()
+    try:
+        w.signal()
+        w.signal()
+        w.drain()
+        assert not w.pending
+        w.signal()
+        assert w.r.recv(16) == b"\0"
+    finally:
+        w.close()
+
+
+def test_flush_streams_latest_wins_while_output_queued():
+    class Sock:
+        def __init__(self):
+            self.sent = bytearray()
+
+        def send(self, data):
+            self.sent += data
+            return len(data)
+
+    class Snap:
+        def __init__(self, t):
+            self.t_unix, self.az, self.el = t, 1.0, 2.0
+
+    cc = hamlib_server.ClientConn(Sock(), "test")
+    cc.outbuf += b"pending"
+    cc.stream_snap.append(Snap(1.0))
+    cc.stream_snap.append(Snap(2.0))
+    assert hamlib_server.flush_streams([cc]) == []
+    assert cc.sock.sent == b""
+    cc.outbuf.clear()
+    assert hamlib_server.flush_streams([cc]) == []
+    assert bytes(cc.sock.sent) == b"Pos: 2.000 1.000000 2.000000\n"
+    assert not cc.stream_snap
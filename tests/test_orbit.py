@@ -0,0 +1,38 @@
+# Known-TLE check for orbit.Sgp4 against the published SGP4 verification
+# output (Vallado et al., "Revisiting Spacetrack Report #3", tcppver.out,
+# satellite 00005), which the reference `sgp4` package reproduces.
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import orbit
+
+TLE_00005 = (
+    "1 00005U 58002B   00179.78495062  .00000023  00000-0  28098-4 0  4753",
+    "2 00005  34.2682 348.7242 1859667 331.7664  19.3264 10.82419157413667",
+)
+
+# minutes since epoch -> TEME position, km
+EXPECTED_KM = {
+    0.0: (7022.46529266, -1400.08296755, 0.03995155),
+    360.0: (-7154.03120202, -3783.17682504, -3536.19412294),
+    720.0: (-7134.59340119, 6531.68641334, 3260.27186483),
+    1440.0: (-938.55923943, -6268.18748831, -4294.02924751),
+}
+
+
+def test_tle_epoch_and_elements():
+    tle = orbit.Tle(*TLE_00005)
+    assert tle.satnum == 5
+    # 2000 day 179.78495062
+    assert tle.epoch == pytest.approx(946684800.0 + 178.78495062 * 86400.0, abs=1e-3)
+    assert tle.ecco == pytest.approx(0.1859667)
+
+
+def test_sgp4_matches_reference_positions():
+    tle = orbit.Tle(*TLE_00005)
+    mins = sorted(EXPECTED_KM)
+    pos = orbit.Sgp4(tle).positions([tle.epoch + m * 60.0 for m in mins])
+    for row, m in zip(pos, mins):
+        assert row == pytest.approx(EXPECTED_KM[m], abs=1e-3), f"tsince={m} min"
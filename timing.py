@@ -0,0 +1,185 @@
+# timing.py
+# Fixed-memory timing histograms for the control loop.
+#
+# Everything here is written by the control thread and read (copied) by
+# whoever asks for stats; a slightly torn snapshot is fine for monitoring,
+# so there is no lock on the hot path.
+
+import time
+from array import array
+from bisect import bisect_left
+
+
+# Bucket upper edges in seconds: 50 us .. 2 s, roughly 1-2-5 spaced.
+# Anything slower lands in the final overflow bucket.
+DEFAULT_EDGES_S = (
+    0.00005, 0.0001, 0.0002, 0.0005,
+    0.001, 0.002, 0.005,
+    0.010, 0.020, 0.050,
+    0.100, 0.200, 0.500,
+    1.0, 2.0,
+)
+
+
+class Histogram:
+    def __init__(self, edges_s=DEFAULT_EDGES_S):
+        self.edges = array("d", edges_s)
+        self.reset()
+
+    def reset(self):
+        self.counts = array("L", [0]) * (len(self.edges) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds):
+        if seconds < 0:
+            seconds = 0.0
+        self.counts[bisect_left(self.edges, seconds)] += 1
+        self.n += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """
+        Upper edge of the bucket holding the p-th percentile (0..100).
+        Returns self.max for the overflow bucket.
+        """
+        if self.n == 0:
+            return 0.0
+        want = self.n * (p / 100.0)
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= want and c:
+                return self.edges[i] if i < len(self.edges) else self.max
+        return self.max
+
+    def summary(self):
+        n = self.n
+        return {
+            "n": n,
+            "mean_s": (self.total / n) if n else 0.0,
+            "p50_s": self.percentile(50),
+            "p90_s": self.percentile(90),
+            "p99_s": self.percentile(99),
+            "max_s": self.max,
+            "last_s": self.last,
+            "edges_s": list(self.edges),
+            "counts": list(self.counts),
+        }
+
+
+class LoopStats:
+    """
+    Per-controller loop instrumentation: tick, encoder read, motor write and
+    scheduling lateness histograms, overrun count and exceptions by type.
+    """
+    def __init__(self, period_s, clock=time):
+        self.period_s = float(period_s)
+        self.clock = clock
+        self.tick = Histogram()
+        self.encoder_read = Histogram()
+        self.motor_write = Histogram()
+        self.lateness = Histogram()
+        self.reset()
+
+    def reset(self):
+        for h in (self.tick, self.encoder_read, self.motor_write, self.lateness):
+            h.reset()
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0       # deadline slots dropped by the scheduler
+        self.rate_hz = (1.0 / self.period_s) if self.period_s > 0 else 0.0
+        self.exceptions = {}
+        self.last_exception = None
+        self.started = self.clock.monotonic()
+
+    def record_exception(self, exc):
+        name = type(exc).__name__
+        self.exceptions[name] = self.exceptions.get(name, 0) + 1
+        self.last_exception = f"{name}: {exc}"
+
+    def snapshot(self):
+        elapsed = self.clock.monotonic() - self.started
+        return {
+            "target_hz": 1.0 / self.period_s if self.period_s > 0 else 0.0,
+            "achieved_hz": (self.ticks / elapsed) if elapsed > 0 else 0.0,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "rate_hz": self.rate_hz,
+            "exceptions": dict(self.exceptions),
+            "last_exception": self.last_exception,
+            "tick": self.tick.summary(),
+            "encoder_read": self.encoder_read.summary(),
+            "motor_write": self.motor_write.summary(),
+            "lateness": self.lateness.summary(),
+        }
+
+
+class TimedMotor:
+    """
+    Wraps an Adafruit_DCMotor (or sim.SimDCMotor) and records each call's time.
+    """
+    def __init__(self, motor, hist: Histogram):
+        self.motor = motor
+        self.hist = hist
+
+    def setSpeed(self, speed):
+        t0 = time.perf_counter()
+        try:
+            return self.motor.setSpeed(speed)
+        finally:
+            self.hist.record(time.perf_counter() - t0)
+
+    def run(self, command):
+        t0 = time.perf_counter()
+        try:
+            return self.motor.run(command)
+        finally:
+            self.hist.record(time.perf_counter() - t0)
+
+
+def format_stats_lines(st):
+    """
+    Compact text form (one "Key: value" per line) for the Hamlib \\get_stats command.
+    """
+    def ms(x):
+        return f"{x * 1000.0:.3f}"
+
+    lines = [
+        f"TargetHz: {st['target_hz']:.2f}",
+        f"AchievedHz: {st['achieved_hz']:.2f}",
+        f"Ticks: {st['ticks']}",
+        f"Overruns: {st['overruns']}",
+        f"Skipped: {st['skipped']}",
+        f"RateHz: {st['rate_hz']:.2f}",
+    ]
+    for key, label in (("tick", "TickMs"), ("encoder_read", "EncReadMs"),
+                       ("motor_write", "MotorWriteMs"), ("lateness", "LateMs")):
+        h = st[key]
+        lines.append(
+            f"{label}: n={h['n']} mean={ms(h['mean_s'])} p50={ms(h['p50_s'])} "
+            f"p90={ms(h['p90_s'])} p99={ms(h['p99_s'])} max={ms(h['max_s'])}"
+        )
+    mo = st.get("motor_outputs")
+    if mo is not None:
+        lines.append(
+            f"MotorOut: calls={mo['calls']} avoided={mo['calls_avoided']} "
+            f"channels={mo['channel_writes']} i2c={mo['i2c_transactions']} block={int(mo['block_mode'])}"
+        )
+    arr = st.get("arrival")
+    if arr is not None:
+        parts = [f"move_s={arr['move_s']:.2f}" if arr["move_s"] is not None else "move_s=-"]
+        for ax in ("az", "el"):
+            a = arr[ax]
+            coast = "-" if a["last_coast_deg"] is None else f"{a['last_coast_deg']:.2f}"
+            parts.append(f"{ax}_rev={a['reversals']} {ax}_stops={a['predictive_stops']} {ax}_coast={coast}")
+        lines.append("Arrival: " + " ".join(parts))
+    exc = st["exceptions"]
+    lines.append("Exceptions: " + (" ".join(f"{k}={v}" for k, v in sorted(exc.items())) if exc else "none"))
+    return lines
@@ -0,0 +1,213 @@
+# tracking.py
+# Moving-target support: the target's angular rate, estimated from the
+# timestamped set_target() calls a tracking client (gpredict) sends during a
+# pass, so the controller can follow an extrapolated target instead of
+# stair-stepping between updates; and uploaded time-tagged trajectories
+# (program track) followed by interpolation.
+
+import math
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+import config
+import position
+
+
+class TargetRate:
+    """
+    Least-squares AZ/EL rate over the last few targets.
+
+    A target that jumps more than max_step_deg from the previous one, or
+    arrives more than max_gap_s after it, starts a new history (a plain
+    GOTO). A rate is only fitted once min_points targets have arrived at a
+    steady rhythm: every update interval within rhythm_tol (a fraction) of
+    their median. predict() extrapolates the fitted line to now + lead_s at
+    the full rate for one update interval, then fades the rate out linearly
+    until extrap_intervals intervals after the last update; past that, or
+    without a fit, there is no rate and the target is static. A tracker that
+    stops sending (LOS) or a few evenly spaced GOTOs therefore overshoot by
+    at most about (1 + extrap_intervals) / 2 update steps.
+    """
+    def __init__(self, history=4, min_points=3, max_gap_s=15.0, max_step_deg=10.0,
+                 extrap_intervals=1.5, rhythm_tol=0.5, lead_s=0.0, min_rate_dps=0.02):
+        self.min_points = max(2, int(min_points))
+        self.points = deque(maxlen=max(self.min_points, int(history)))   # (t, az_continuous, el)
+        self.max_gap_s = float(max_gap_s)
+        self.max_step_deg = float(max_step_deg)
+        self.extrap_intervals = max(1.0, float(extrap_intervals))
+        self.rhythm_tol = float(rhythm_tol)
+        self.lead_s = float(lead_s)
+        self.min_rate_dps = float(min_rate_dps)
+        self._fit = None    # (t_ref, az0, el0, az_rate, el_rate, interval_s)
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            history=getattr(config, "TRACK_HISTORY", 4),
+            min_points=getattr(config, "TRACK_MIN_POINTS", 3),
+            max_gap_s=getattr(config, "TRACK_MAX_GAP_S", 15.0),
+            max_step_deg=getattr(config, "TRACK_MAX_STEP_DEG", 10.0),
+            extrap_intervals=getattr(config, "TRACK_EXTRAP_INTERVALS", 1.5),
+            rhythm_tol=getattr(config, "TRACK_RHYTHM_TOL", 0.5),
+            lead_s=getattr(config, "TRACK_LEAD_S", 0.0),
+            min_rate_dps=getattr(config, "TRACK_MIN_RATE_DPS", 0.02),
+        )
+
+    def clear(self):
+        self.points.clear()
+        self._fit = None
+
+    def push(self, t, az_deg, el_deg):
+        """
+        Record a new target; returns True if it continues the current track.
+        """
+        az_deg = float(az_deg)
+        el_deg = float(el_deg)
+        cont = False
+        if self.points:
+            t1, az1, el1 = self.points[-1]
+            d_az = position.wrap_delta_deg(az_deg, az1 % 360.0)
+            dt = t - t1
+            cont = (0.0 < dt <= self.max_gap_s
+                    and abs(d_az) <= self.max_step_deg
+                    and abs(el_deg - el1) <= self.max_step_deg)
+            if cont:
+                az_deg = az1 + d_az     # keep AZ continuous across 0/360
+            else:
+                self.points.clear()
+        self.points.append((float(t), az_deg, el_deg))
+        self._fit = self._solve()
+        return cont
+
+    def _interval(self):
+        """
+        Median update interval, or None if the updates are not evenly paced.
+        """
+        pts = self.points
+        ivs = sorted(pts[i][0] - pts[i - 1][0] for i in range(1, len(pts)))
+        med = ivs[len(ivs) // 2] if len(ivs) % 2 else 0.5 * (ivs[len(ivs) // 2 - 1] + ivs[len(ivs) // 2])
+        if med <= 0.0:
+            return None
+        if ivs[0] < med * (1.0 - self.rhythm_tol) or ivs[-1] > med * (1.0 + self.rhythm_tol):
+            return None
+        return med
+
+    def _solve(self):
+        n = len(self.points)
+        if n < self.min_points:
+            return None
+        interval = self._interval()
+        if interval is None:
+            return None
+        t_ref = self.points[-1][0]
+        ts = [p[0] - t_ref for p in self.points]
+        mt = sum(ts) / n
+        stt = sum((x - mt) ** 2 for x in ts)
+        if stt <= 1e-9:
+            return None
+        fit = [t_ref]
+        rates = []
+        for k in (1, 2):
+            ys = [p[k] for p in self.points]
+            my = sum(ys) / n
+            rate = sum((x - mt) * (y - my) for x, y in zip(ts, ys)) / stt
+            fit.append(my - rate * mt)      # fitted value at t_ref
+            rates.append(rate)
+        return tuple(fit + rates + [interval])
+
+    def rates(self):
+        """
+        (az_dps, el_dps) of the current track, or None.
+        """
+        if self._fit is None:
+            return None
+        return self._fit[3], self._fit[4]
+
+    def predict(self, now):
+        """
+        (az_deg 0..360, el_deg, az_dps, el_dps) at now + lead_s, or None
+        when there is no usable rate. The returned rates include the fade.
+        """
+        fit = self._fit
+        if fit is None:
+            return None
+        t_ref, az0, el0, az_rate, el_rate, interval = fit
+        age = now - t_ref
+        horizon = interval * self.extrap_intervals
+        if age > horizon:
+            return None
+        if abs(az_rate) < self.min_rate_dps and abs(el_rate) < self.min_rate_dps:
+            return None
+        # Rate weight: 1 up to one interval, then linear down to 0 at horizon.
+        # dt is its integral, so the extrapolated position has no kink.
+        s = min(max(0.0, age) + self.lead_s, horizon)
+        fade = horizon - interval
+        if s <= interval or fade <= 0.0:
+            w, dt = 1.0, s
+        else:
+            x = s - interval
+            w = 1.0 - x / fade
+            dt = interval + x - 0.5 * x * x / fade
+        return ((az0 + az_rate * dt) % 360.0, el0 + el_rate * dt, az_rate * w, el_rate * w)
+
+
+class ProgramTrack:
+    """
+    Time-tagged trajectory: parallel t (unix seconds), az (continuous) and el
+    arrays. at(t) interpolates linearly and returns the segment rate; before
+    the first point it holds the first point, after the last the last one.
+    AZ stays continuous from the first point, so the caller can keep the
+    whole track on one cable wrap.
+    """
+    def __init__(self, points, max_points=20000):
+        self.t = array("d")
+        self.az = array("d")
+        self.el = array("d")
+        for t, az, el in points:
+            t = float(t)
+            az = float(az)
+            el = float(el)
+            if not (math.isfinite(t) and math.isfinite(az) and math.isfinite(el)):
+                raise ValueError("program track values must be finite")
+            if len(self.t) >= max_points:
+                raise ValueError(f"program track longer than {max_points} points")
+            if self.t:
+                if t <= self.t[-1]:
+                    raise ValueError("program track times must increase")
+                az = self.az[-1] + position.wrap_delta_deg(az, self.az[-1] % 360.0)
+            self.t.append(t)
+            self.az.append(az)
+            self.el.append(el)
+        if not self.t:
+            raise ValueError("empty program track")
+
+    @classmethod
+    def from_config(cls, points):
+        return cls(points, max_points=getattr(config, "PROGRAM_TRACK_MAX_POINTS", 20000))
+
+    def __len__(self):
+        return len(self.t)
+
+    @property
+    def start(self):
+        return self.t[0]
+
+    @property
+    def end(self):
+        return self.t[-1]
+
+    def at(self, t):
+        """
+        (az_deg continuous, el_deg, az_dps, el_dps) at unix time t.
+        """
+        i = bisect_right(self.t, t)
+        if i == 0:
+            return self.az[0], self.el[0], 0.0, 0.0
+        if i >= len(self.t):
+            return self.az[-1], self.el[-1], 0.0, 0.0
+        t0, t1 = self.t[i - 1], self.t[i]
+        az_rate = (self.az[i] - self.az[i - 1]) / (t1 - t0)
+        el_rate = (self.el[i] - self.el[i - 1]) / (t1 - t0)
+        dt = t - t0
+        return self.az[i - 1] + az_rate * dt, self.el[i - 1] + el_rate * dt, az_rate, el_rate